@@ -1,9 +1,4 @@
 from typing import Dict, List
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts.prompt import PromptTemplate
-from langchain_core.tools import Tool
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
 
 
 def aggregate_content(investor_profiles: dict) -> Dict[str, List]:
@@ -1,34 +1,59 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import re
 import time
 import random
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts.prompt import PromptTemplate
-from langchain_core.tools import Tool
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+import cancellation
+import research_cache
+import mock_data
+from provider_budgets import provider_slot
 from tools.search_tools import search_investor_profiles
 from tools.smart_profile_finder import smart_find_all_profiles
 
+# Send Gemini calls to another endpoint (e.g. the load-test stand-ins)
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL")
+
+# Profile URLs picked out of the agent's answer when the URL search fails
+AGENT_OUTPUT_URL_PATTERNS = {
+    'twitter': re.compile(r'twitter\.com/[\w-]+'),
+    'linkedin': re.compile(r'linkedin\.com/in/[\w-]+'),
+    'crunchbase': re.compile(r'crunchbase\.com/person/[\w-]+'),
+    'medium': re.compile(r'medium\.com/@[\w-]+'),
+}
+
 
 def rate_limited_llm_call(llm, prompt, max_retries=3):
     """
-    Make a rate-limited LLM call with exponential backoff
+    Make a rate-limited LLM call with exponential backoff.
+    Answers are cached per model and prompt, so identical prompts skip the API.
     """
+    cached = research_cache.get_llm_response(llm, prompt)
+    if cached is not None:
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=cached)
+
     for attempt in range(max_retries):
         try:
             # Add a small delay before each call
-            time.sleep(random.uniform(0.5, 1.5))
-            return llm.invoke(prompt)
+            cancellation.sleep(random.uniform(0.5, 1.5))
+            with provider_slot(metrics.llm_provider(llm)), \
+                    metrics.external_call(metrics.llm_provider(llm), "invoke") as call:
+                response = llm.invoke(prompt)
+                call['bytes_sent'] = len(str(prompt))
+                call['bytes'] = len(str(getattr(response, 'content', '')))
+            research_cache.store_llm_response(llm, prompt, response.content)
+            return response
         except Exception as e:
             if "429" in str(e) or "rate_limit" in str(e).lower():
+                metrics.inc("api_retries_total", provider=metrics.llm_provider(llm))
                 wait_time = (2 ** attempt) + random.uniform(0, 1)
                 print(f"Rate limit hit, waiting {wait_time:.2f} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
+                cancellation.sleep(wait_time)
                 if attempt == max_retries - 1:
                     print("Max retries exceeded, skipping this request")
                     raise e
@@ -37,6 +62,7 @@ def rate_limited_llm_call(llm, prompt, max_retries=3):
     return None
 
 
+@metrics.timed("investor_lookup_agent")
 def lookup(name: str, use_mock: bool = False) -> dict:
     """
     Find investor profiles across multiple platforms.
@@ -44,99 +70,24 @@ def lookup(name: str, use_mock: bool = False) -> dict:
     """
     
     if use_mock:
-        mock_profiles = {
-            "Marc Andreessen": {
-                "name": "Marc Andreessen",
-                "firm": "Andreessen Horowitz (a16z)",
-                "title": "Co-founder and General Partner",
-                "bio": "Co-founder of Netscape and Andreessen Horowitz, one of Silicon Valley's most influential venture capitalists. Pioneer of the web browser revolution and leading voice in software, crypto, and AI investments. Known for the famous quote 'Software is eating the world.'",
-                "urls": {
-                    "twitter": "https://twitter.com/pmarca",
-                    "linkedin": "https://www.linkedin.com/in/marcandreessen",
-                    "crunchbase": "https://www.crunchbase.com/person/marc-andreessen",
-                    "medium": "https://pmarca.medium.com",
-                    "firm": "https://a16z.com"
-                },
-                "image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1757154244/investors/dynamic/investors/dynamic/marc_andreessen.jpg"
-            },
-            "Mark Cuban": {
-                "name": "Mark Cuban",
-                "firm": "Mark Cuban Companies",
-                "title": "Owner and Principal Investor",
-                "bio": "Serial entrepreneur, investor, and owner of the Dallas Mavericks. Built and sold Broadcast.com to Yahoo for $5.7 billion. Known for his appearances on Shark Tank and investments in early-stage startups across technology, media, and consumer products.",
-                "urls": {
-                    "twitter": "https://twitter.com/mcuban",
-                    "linkedin": "https://www.linkedin.com/in/markcuban",
-                    "crunchbase": "https://www.crunchbase.com/person/mark-cuban",
-                    "medium": "https://markcuban.medium.com",
-                    "firm": "https://markcubancompanies.com"
-                },
-                "image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1756815654/investors/dynamic/investors/dynamic/mark_cuban.jpg"
-            },
-            "Peter Thiel": {
-                "name": "Peter Thiel",
-                "firm": "Founders Fund",
-                "title": "Co-founder and Managing Partner",
-                "bio": "Co-founder of PayPal and Palantir, and founding partner of Founders Fund. Early Facebook investor and author of 'Zero to One'. Known for contrarian thinking and investments in breakthrough technologies including SpaceX, Airbnb, and Stripe.",
-                "urls": {
-                    "twitter": "https://twitter.com/peterthiel",
-                    "linkedin": "https://www.linkedin.com/in/peterthiel",
-                    "crunchbase": "https://www.crunchbase.com/person/peter-thiel",
-                    "medium": "https://peterthiel.medium.com",
-                    "firm": "https://foundersfund.com"
-                },
-                "image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1757155912/investors/dynamic/investors/dynamic/peter_thiel.jpg"
-            },
-            "Paul Tudor Jones": {
-                "name": "Paul Tudor Jones",
-                "firm": "Tudor Investment Corporation",
-                "title": "Founder and Chief Investment Officer",
-                "bio": "Legendary macro trader and hedge fund manager who founded Tudor Investment Corporation. Known for predicting and profiting from the 1987 stock market crash. Increasingly active in venture capital and impact investing, particularly in education and environmental initiatives.",
-                "urls": {
-                    "twitter": "https://twitter.com/paultudorjones",
-                    "linkedin": "https://www.linkedin.com/in/paultudorjones",
-                    "crunchbase": "https://www.crunchbase.com/person/paul-tudor-jones-ii",
-                    "medium": "https://paultudorjones.medium.com",
-                    "firm": "https://tudorinvestment.com"
-                },
-                "image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1756826796/investors/dynamic/investors/dynamic/paul_tudor_jones.jpg"
-            },
-            "Cathie Wood": {
-                "name": "Cathie Wood",
-                "firm": "ARK Invest",
-                "title": "Founder and CEO",
-                "bio": "Founder and CEO of ARK Invest, focused on disruptive innovation investing. Known for bold predictions and concentrated bets on transformative technologies including genomics, artificial intelligence, energy storage, and space exploration. Strong advocate for Tesla and cryptocurrency.",
-                "urls": {
-                    "twitter": "https://twitter.com/cathiedwood",
-                    "linkedin": "https://www.linkedin.com/in/cathie-wood-ark-invest",
-                    "crunchbase": "https://www.crunchbase.com/person/cathie-wood",
-                    "medium": "https://cathiewood.medium.com",
-                    "firm": "https://ark-invest.com"
-                },
-                "image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1756815661/investors/dynamic/investors/dynamic/cathie_wood.jpg"
-            },
-            "default": {
-                "name": name,
-                "firm": "Sample Ventures",
-                "title": "General Partner",
-                "bio": "Experienced investor focusing on early-stage startups",
-                "urls": {
-                    "twitter": "https://twitter.com/sample",
-                    "linkedin": "https://www.linkedin.com/in/sample",
-                    "crunchbase": "https://www.crunchbase.com/person/sample",
-                    "firm": "https://sampleventures.com"
-                },
-                "image": ""
-            }
-        }
-        
-        return mock_profiles.get(name, mock_profiles["default"])
+        profile = mock_data.get("profiles", name)
+        # The default profile is shared, so fill in the name on a copy
+        return profile if profile["name"] else dict(profile, name=name)
+    
+    # Real implementation. The LangChain and Gemini SDKs take seconds to import,
+    # so they are loaded on the first real lookup rather than at startup.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    from langchain.prompts.prompt import PromptTemplate
+    from langchain_core.tools import Tool
+    from langchain.agents import create_react_agent, AgentExecutor
+    from agents.react_prompt import get_react_prompt
     
-    # Real implementation
     llm = ChatGoogleGenerativeAI(
         temperature=0, 
         model="gemini-2.5-flash",
-        google_api_key=os.getenv("GEMINI_API_KEY")
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        client_options={"api_endpoint": GEMINI_API_BASE_URL} if GEMINI_API_BASE_URL else None,
+        transport="rest" if GEMINI_API_BASE_URL else None
     )
     
     template = """Given the investor name {investor_name}, find their profiles across different platforms.
@@ -169,13 +120,13 @@ def lookup(name: str, use_mock: bool = False) -> dict:
         )
     ]
     
-    react_prompt = hub.pull("hwchase17/react")
-    agent = create_react_agent(llm=llm, tools=tools_for_agent, prompt=react_prompt)
+    agent = create_react_agent(llm=llm, tools=tools_for_agent, prompt=get_react_prompt())
     agent_executor = AgentExecutor(agent=agent, tools=tools_for_agent, verbose=True)
     
-    result = agent_executor.invoke(
-        input={"input": prompt_template.format_prompt(investor_name=name)}
-    )
+    with metrics.span("react_agent"):
+        result = agent_executor.invoke(
+            input={"input": prompt_template.format_prompt(investor_name=name)}
+        )
     
     # Parse the output and structure it properly
     output_text = result["output"]
@@ -211,22 +162,11 @@ def lookup(name: str, use_mock: bool = False) -> dict:
         print(f"Error finding profile URLs: {e}")
         
         # Fallback: Try to extract from agent response
-        import re
-        twitter_match = re.search(r'twitter\.com/[\w-]+', output_text.lower())
-        if twitter_match:
-            profile_data["urls"]["twitter"] = f"https://{twitter_match.group()}"
-        
-        linkedin_match = re.search(r'linkedin\.com/in/[\w-]+', output_text.lower())
-        if linkedin_match:
-            profile_data["urls"]["linkedin"] = f"https://{linkedin_match.group()}"
-        
-        crunchbase_match = re.search(r'crunchbase\.com/person/[\w-]+', output_text.lower())
-        if crunchbase_match:
-            profile_data["urls"]["crunchbase"] = f"https://{crunchbase_match.group()}"
-        
-        medium_match = re.search(r'medium\.com/@[\w-]+', output_text.lower())
-        if medium_match:
-            profile_data["urls"]["medium"] = f"https://{medium_match.group()}"
+        lowered = output_text.lower()
+        for platform, pattern in AGENT_OUTPUT_URL_PATTERNS.items():
+            match = pattern.search(lowered)
+            if match:
+                profile_data["urls"][platform] = f"https://{match.group()}"
     
     # Use improved image search for all investors
     try:
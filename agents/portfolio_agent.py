@@ -2,32 +2,54 @@ from typing import List, Dict
 import os
 import time
 import random
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts.prompt import PromptTemplate
-from langchain_core.tools import Tool
-from langchain.agents import create_react_agent, AgentExecutor
-from langchain import hub
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import metrics
+import cancellation
+import research_cache
+import mock_data
+from provider_budgets import provider_slot
 from tools.portfolio_tools import search_portfolio_companies
 from third_parties.company_links import enhance_portfolio_companies
+from tools import search_planner
+
+# Send Gemini calls to another endpoint (e.g. the load-test stand-ins)
+GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL")
+
+# Results of the broad portfolio search used for extraction, and how many (with content)
+# it needs before the targeted portfolio queries are skipped
+POOLED_PORTFOLIO_RESULTS = int(os.getenv("POOLED_PORTFOLIO_RESULTS", "10"))
+POOLED_PORTFOLIO_MIN_RESULTS = int(os.getenv("POOLED_PORTFOLIO_MIN_RESULTS", "3"))
 
 
 def rate_limited_llm_call(llm, prompt, max_retries=3):
     """
-    Make a rate-limited LLM call with exponential backoff
+    Make a rate-limited LLM call with exponential backoff.
+    Answers are cached per model and prompt, so identical prompts skip the API.
     """
+    cached = research_cache.get_llm_response(llm, prompt)
+    if cached is not None:
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=cached)
+
     for attempt in range(max_retries):
         try:
             # Add a small delay before each call
-            time.sleep(random.uniform(0.5, 1.5))
-            return llm.invoke(prompt)
+            cancellation.sleep(random.uniform(0.5, 1.5))
+            with provider_slot(metrics.llm_provider(llm)), \
+                    metrics.external_call(metrics.llm_provider(llm), "invoke") as call:
+                response = llm.invoke(prompt)
+                call['bytes_sent'] = len(str(prompt))
+                call['bytes'] = len(str(getattr(response, 'content', '')))
+            research_cache.store_llm_response(llm, prompt, response.content)
+            return response
         except Exception as e:
             if "429" in str(e) or "rate_limit" in str(e).lower():
+                metrics.inc("api_retries_total", provider=metrics.llm_provider(llm))
                 wait_time = (2 ** attempt) + random.uniform(0, 1)
                 print(f"Rate limit hit, waiting {wait_time:.2f} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
+                cancellation.sleep(wait_time)
                 if attempt == max_retries - 1:
                     print("Max retries exceeded, skipping this request")
                     raise e
@@ -40,30 +62,34 @@ def get_mock_portfolio_for_investor(investor_name: str) -> List[Dict]:
     """
     Get mock portfolio data for investors when API limits are hit
     """
-    if "Peter Thiel" in investor_name:
-        return [
-            {"name": "PayPal", "sector": "Fintech", "stage": "Co-founder", "date": "1998", "description": "Digital payments platform"},
-            {"name": "Palantir", "sector": "Software", "stage": "Co-founder", "date": "2003", "description": "Big data analytics"},
-            {"name": "Meta", "sector": "Social Media", "stage": "Series A", "date": "2004", "description": "Social networking platform"},
-            {"name": "SpaceX", "sector": "Aerospace", "stage": "Series A", "date": "2008", "description": "Space exploration company"},
-            {"name": "Stripe", "sector": "Fintech", "stage": "Series B", "date": "2011", "description": "Online payments infrastructure"}
-        ]
-    elif "Marc Andreessen" in investor_name:
-        return [
-            {"name": "Facebook", "sector": "Social Media", "stage": "Series A", "date": "2004", "description": "Social networking platform"},
-            {"name": "Twitter", "sector": "Social Media", "stage": "Series A", "date": "2009", "description": "Microblogging platform"},
-            {"name": "GitHub", "sector": "Software", "stage": "Series A", "date": "2012", "description": "Code hosting platform"},
-            {"name": "Pinterest", "sector": "Social Media", "stage": "Series A", "date": "2011", "description": "Visual discovery platform"},
-            {"name": "Coinbase", "sector": "Cryptocurrency", "stage": "Series B", "date": "2013", "description": "Cryptocurrency exchange"}
-        ]
-    else:
-        return [
-            {"name": "TechCorp", "sector": "Technology", "stage": "Series A", "date": "2023", "description": "AI-powered solutions"},
-            {"name": "DataFlow", "sector": "Software", "stage": "Series B", "date": "2022", "description": "Data analytics platform"},
-            {"name": "CloudNet", "sector": "Cloud Services", "stage": "Seed", "date": "2024", "description": "Cloud infrastructure"}
-        ]
+    return mock_data.get("fallback_portfolios", investor_name, match_within=True)
+
 
+def search_content_pieces(search_items: List[Dict], limit: int) -> List[str]:
+    """
+    Title, content and URL of the top search results that have content, for the extraction prompt
+    """
+    content_pieces = []
+    for item in search_items[:limit]:
+        title = item.get('title', '')
+        content = item.get('content', '')
+        url = item.get('url', '')
+        if content:
+            content_pieces.append(f"Title: {title}\nContent: {content}\nURL: {url}\n")
+    return content_pieces
 
+
+def is_usage_limit_error(results) -> bool:
+    """
+    Whether a Tavily response is the usage limit (432) error
+    """
+    if not isinstance(results, dict) or 'error' not in results:
+        return False
+    error_msg = str(results.get('error', ''))
+    return 'usage limit' in error_msg.lower() or '432' in error_msg
+
+
+@metrics.timed()
 def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[Dict]:
     """
     Discover portfolio companies for the given investor.
@@ -73,558 +99,17 @@ def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[D
     
     # For mock mode or when Crunchbase is not available
     if use_mock:
-        if "Mark Cuban" in investor_profiles.get("name", ""):
-            return [
-                {
-                    "name": "Magnolia Pictures",
-                    "sector": "Entertainment",
-                    "stage": "Acquisition",
-                    "date": "2003",
-                    "description": "Independent film production and distribution company",
-                    "investment_value": 30000000,
-                    "website": "https://magpictures.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "AXS TV",
-                    "sector": "Media & Broadcasting",
-                    "stage": "Investment",
-                    "date": "2012",
-                    "description": "Music and entertainment television network",
-                    "investment_value": 25000000,
-                    "website": "https://axs.tv",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Cost Plus Drugs",
-                    "sector": "Healthcare",
-                    "stage": "Founder",
-                    "date": "2022",
-                    "description": "Online pharmacy offering prescription drugs at cost plus 15%",
-                    "investment_value": 50000000,
-                    "website": "https://costplusdrugs.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Sharespost (Forge Global)",
-                    "sector": "Fintech",
-                    "stage": "Series B",
-                    "date": "2010",
-                    "description": "Private company stock trading platform, now part of Forge Global",
-                    "investment_value": 5000000,
-                    "website": "https://forgeglobal.com",
-                    "stock_symbol": "FRGE",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/FRGE"
-                },
-                {
-                    "name": "Appriss",
-                    "sector": "Software",
-                    "stage": "Series A",
-                    "date": "2008",
-                    "description": "Data analytics and information services",
-                    "investment_value": 3000000,
-                    "website": "https://appriss.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Cyberdust",
-                    "sector": "Social Media",
-                    "stage": "Seed",
-                    "date": "2014",
-                    "description": "Ephemeral messaging application",
-                    "investment_value": 2000000,
-                    "website": "https://cyberdust.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Netflix (Early Investment)",
-                    "sector": "Streaming Media",
-                    "stage": "Early Investment",
-                    "date": "2004",
-                    "description": "DVD-by-mail service transitioning to streaming",
-                    "investment_value": 1000000,
-                    "website": "https://netflix.com",
-                    "stock_symbol": "NFLX",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/NFLX"
-                }
-            ]
-        elif "Peter Thiel" in investor_profiles.get("name", ""):
-            return [
-                {
-                    "name": "Facebook (Meta)",
-                    "sector": "Social Media",
-                    "stage": "Series A",
-                    "date": "2004",
-                    "description": "Global social networking platform and metaverse company",
-                    "investment_value": 500000,
-                    "website": "https://meta.com",
-                    "stock_symbol": "META",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/META"
-                },
-                {
-                    "name": "SpaceX",
-                    "sector": "Aerospace",
-                    "stage": "Series A",
-                    "date": "2008",
-                    "description": "Private space exploration and satellite internet company",
-                    "investment_value": 20000000,
-                    "website": "https://spacex.com",
-                    "stock_symbol": "SPAX.PVT",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/SPAX.PVT/"
-                },
-                {
-                    "name": "Stripe",
-                    "sector": "Fintech",
-                    "stage": "Series B",
-                    "date": "2012",
-                    "description": "Online payment processing platform",
-                    "investment_value": 10000000,
-                    "website": "https://stripe.com",
-                    "stock_symbol": "STRI.PVT",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/STRI.PVT/"
-                },
-                {
-                    "name": "Airbnb",
-                    "sector": "Travel & Hospitality",
-                    "stage": "Series A",
-                    "date": "2009",
-                    "description": "Home-sharing and accommodation marketplace",
-                    "investment_value": 7000000,
-                    "website": "https://airbnb.com",
-                    "stock_symbol": "ABNB",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/ABNB"
-                },
-                {
-                    "name": "LinkedIn",
-                    "sector": "Professional Networking",
-                    "stage": "Series A",
-                    "date": "2004",
-                    "description": "Professional networking and career development platform",
-                    "investment_value": 1000000,
-                    "website": "https://linkedin.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Palantir",
-                    "sector": "Data Analytics",
-                    "stage": "Co-founder",
-                    "date": "2003",
-                    "description": "Big data analytics platform for government and enterprises",
-                    "investment_value": 200000000,
-                    "website": "https://palantir.com",
-                    "stock_symbol": "PLTR",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/PLTR"
-                },
-                {
-                    "name": "Anduril",
-                    "sector": "Defense Technology",
-                    "stage": "Series A",
-                    "date": "2017",
-                    "description": "Autonomous defense systems and military technology",
-                    "investment_value": 50000000,
-                    "website": "https://anduril.com",
-                    "stock_symbol": "ANIN.PVT",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/ANIN.PVT/"
-                },
-                {
-                    "name": "Roblox",
-                    "sector": "Gaming",
-                    "stage": "Pre-IPO",
-                    "date": "2020",
-                    "description": "Online game platform and game creation system",
-                    "investment_value": 25000000,
-                    "website": "https://roblox.com",
-                    "stock_symbol": "RBLX",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/RBLX"
-                }
-            ]
-        elif "Paul Tudor Jones" in investor_profiles.get("name", ""):
-            return [
-                {
-                    "name": "Robin Hood Foundation",
-                    "sector": "Non-profit",
-                    "stage": "Founder",
-                    "date": "1988",
-                    "description": "Anti-poverty non-profit organization",
-                    "investment_value": 100000000,
-                    "website": "https://robinhood.org",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "JUST Capital",
-                    "sector": "ESG Research",
-                    "stage": "Founder",
-                    "date": "2013",
-                    "description": "Research organization ranking companies on stakeholder performance",
-                    "investment_value": 50000000,
-                    "website": "https://justcapital.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Teach for America",
-                    "sector": "Education",
-                    "stage": "Major Donor",
-                    "date": "1990",
-                    "description": "Educational leadership program placing teachers in high-need schools",
-                    "investment_value": 25000000,
-                    "website": "https://teachforamerica.org",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Malaria No More",
-                    "sector": "Healthcare/Non-profit",
-                    "stage": "Major Donor",
-                    "date": "2006",
-                    "description": "Global malaria eradication initiative",
-                    "investment_value": 15000000,
-                    "website": "https://malarianomore.org",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Sustainable Fisheries Partnership",
-                    "sector": "Environmental",
-                    "stage": "Donor",
-                    "date": "2006",
-                    "description": "Ocean conservation and sustainable fishing practices",
-                    "investment_value": 10000000,
-                    "website": "https://sustainablefish.org",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Gold ETF Holdings",
-                    "sector": "Commodities",
-                    "stage": "Public Investment",
-                    "date": "2020",
-                    "description": "Gold exchange-traded fund for inflation hedge",
-                    "investment_value": 200000000,
-                    "website": "https://spdrgoldshares.com",
-                    "stock_symbol": "GLD",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/GLD"
-                },
-                {
-                    "name": "Bitcoin Holdings",
-                    "sector": "Cryptocurrency",
-                    "stage": "Direct Investment",
-                    "date": "2021",
-                    "description": "Bitcoin allocation for portfolio diversification",
-                    "investment_value": 150000000,
-                    "website": "https://bitcoin.org",
-                    "stock_symbol": "BTC-USD",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/BTC-USD"
-                }
-            ]
-        elif "Cathie Wood" in investor_profiles.get("name", ""):
-            return [
-                {
-                    "name": "Tesla",
-                    "sector": "Electric Vehicles",
-                    "stage": "Public Investment",
-                    "date": "2016",
-                    "description": "Electric vehicle and clean energy company",
-                    "investment_value": 2000000000,
-                    "website": "https://tesla.com",
-                    "stock_symbol": "TSLA",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/TSLA"
-                },
-                {
-                    "name": "Zoom",
-                    "sector": "Communication Technology",
-                    "stage": "Public Investment",
-                    "date": "2019",
-                    "description": "Video conferencing and communications platform",
-                    "investment_value": 500000000,
-                    "website": "https://zoom.us",
-                    "stock_symbol": "ZM",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/ZM"
-                },
-                {
-                    "name": "Square (Block)",
-                    "sector": "Fintech",
-                    "stage": "Public Investment",
-                    "date": "2018",
-                    "description": "Digital payments and financial services platform",
-                    "investment_value": 800000000,
-                    "website": "https://block.xyz",
-                    "stock_symbol": "SQ",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/SQ"
-                },
-                {
-                    "name": "Roku",
-                    "sector": "Streaming Media",
-                    "stage": "Public Investment",
-                    "date": "2017",
-                    "description": "Streaming platform and connected TV operating system",
-                    "investment_value": 400000000,
-                    "website": "https://roku.com",
-                    "stock_symbol": "ROKU",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/ROKU"
-                },
-                {
-                    "name": "Coinbase",
-                    "sector": "Cryptocurrency",
-                    "stage": "Pre-IPO/Public",
-                    "date": "2020",
-                    "description": "Cryptocurrency exchange and trading platform",
-                    "investment_value": 600000000,
-                    "website": "https://coinbase.com",
-                    "stock_symbol": "COIN",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/COIN"
-                },
-                {
-                    "name": "Unity Software",
-                    "sector": "Gaming Technology",
-                    "stage": "Public Investment",
-                    "date": "2020",
-                    "description": "Real-time 3D development platform",
-                    "investment_value": 300000000,
-                    "website": "https://unity.com",
-                    "stock_symbol": "U",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/U"
-                },
-                {
-                    "name": "10x Genomics",
-                    "sector": "Biotechnology",
-                    "stage": "Public Investment",
-                    "date": "2019",
-                    "description": "Life sciences technology company",
-                    "investment_value": 250000000,
-                    "website": "https://10xgenomics.com",
-                    "stock_symbol": "TXG",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/TXG"
-                },
-                {
-                    "name": "UiPath",
-                    "sector": "Automation Software",
-                    "stage": "Public Investment",
-                    "date": "2021",
-                    "description": "Robotic process automation platform",
-                    "investment_value": 180000000,
-                    "website": "https://uipath.com",
-                    "stock_symbol": "PATH",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/PATH"
-                },
-                {
-                    "name": "Teladoc Health",
-                    "sector": "Telemedicine",
-                    "stage": "Public Investment",
-                    "date": "2020",
-                    "description": "Virtual healthcare and telemedicine platform",
-                    "investment_value": 320000000,
-                    "website": "https://teladoc.com",
-                    "stock_symbol": "TDOC",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/TDOC"
-                }
-            ]
-        elif "Marc Andreessen" in investor_profiles.get("name", ""):
-            return [
-                {
-                    "name": "Meta (Facebook)",
-                    "sector": "Social Media",
-                    "stage": "Series A",
-                    "date": "2004",
-                    "description": "Global social networking platform connecting billions of users worldwide",
-                    "investment_value": 500000,  # $500K seed investment
-                    "website": "https://meta.com",
-                    "stock_symbol": "META",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/META"
-                },
-                {
-                    "name": "Twitter",
-                    "sector": "Social Media", 
-                    "stage": "Series A",
-                    "date": "2009",
-                    "description": "Real-time microblogging and social networking service",
-                    "investment_value": 50000000,  # $50M
-                    "website": "https://twitter.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Coinbase",
-                    "sector": "Cryptocurrency",
-                    "stage": "Series B",
-                    "date": "2013",
-                    "description": "Leading cryptocurrency exchange and digital wallet platform",
-                    "investment_value": 75000000,  # $75M
-                    "website": "https://coinbase.com",
-                    "stock_symbol": "COIN",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/COIN"
-                },
-                {
-                    "name": "GitHub",
-                    "sector": "Software Development",
-                    "stage": "Series A",
-                    "date": "2012",
-                    "description": "World's largest code hosting platform for version control and collaboration",
-                    "investment_value": 100000000,  # $100M
-                    "website": "https://github.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Airbnb",
-                    "sector": "Travel & Hospitality",
-                    "stage": "Series A",
-                    "date": "2009",
-                    "description": "Global marketplace for unique accommodations and experiences",
-                    "investment_value": 7200000,  # $7.2M
-                    "website": "https://airbnb.com",
-                    "stock_symbol": "ABNB",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/ABNB"
-                },
-                {
-                    "name": "Lyft",
-                    "sector": "Transportation",
-                    "stage": "Series C",
-                    "date": "2013",
-                    "description": "Ridesharing platform transforming urban transportation",
-                    "investment_value": 60000000,  # $60M
-                    "website": "https://lyft.com",
-                    "stock_symbol": "LYFT", 
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/LYFT"
-                },
-                {
-                    "name": "Pinterest",
-                    "sector": "Social Media",
-                    "stage": "Series A",
-                    "date": "2011",
-                    "description": "Visual discovery platform for ideas and inspiration",
-                    "investment_value": 45000000,  # $45M
-                    "website": "https://pinterest.com",
-                    "stock_symbol": "PINS",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/PINS"
-                },
-                {
-                    "name": "Instacart",
-                    "sector": "E-commerce",
-                    "stage": "Series A",
-                    "date": "2012",
-                    "description": "On-demand grocery delivery and pickup service",
-                    "investment_value": 44000000,  # $44M
-                    "website": "https://instacart.com",
-                    "stock_symbol": "CART",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/CART"
-                },
-                {
-                    "name": "Slack",
-                    "sector": "Enterprise Software",
-                    "stage": "Series A",
-                    "date": "2014",
-                    "description": "Business communication platform revolutionizing workplace collaboration",
-                    "investment_value": 50000000,  # $50M
-                    "website": "https://slack.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                },
-                {
-                    "name": "Okta",
-                    "sector": "Cybersecurity",
-                    "stage": "Series A",
-                    "date": "2011",
-                    "description": "Identity and access management platform for enterprises",
-                    "investment_value": 25000000,  # $25M
-                    "website": "https://okta.com",
-                    "stock_symbol": "OKTA",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/OKTA"
-                },
-                {
-                    "name": "Box",
-                    "sector": "Cloud Storage",
-                    "stage": "Series A",
-                    "date": "2010",
-                    "description": "Cloud content management platform for businesses",
-                    "investment_value": 48000000,  # $48M
-                    "website": "https://box.com",
-                    "stock_symbol": "BOX",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/BOX"
-                },
-                {
-                    "name": "Databricks",
-                    "sector": "Data Analytics",
-                    "stage": "Series B",
-                    "date": "2017",
-                    "description": "Unified data analytics platform for big data and machine learning",
-                    "investment_value": 120000000,  # $120M
-                    "website": "https://databricks.com",
-                    "stock_symbol": "DATB.PVT",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/DATB.PVT/"
-                },
-                {
-                    "name": "Stripe",
-                    "sector": "Fintech",
-                    "stage": "Series A",
-                    "date": "2012",
-                    "description": "Online payment processing platform for internet businesses",
-                    "investment_value": 70000000,  # $70M
-                    "website": "https://stripe.com",
-                    "stock_symbol": "STRI.PVT",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/STRI.PVT/"
-                },
-                {
-                    "name": "Clubhouse Media Group",
-                    "sector": "Social Audio",
-                    "stage": "Series B",
-                    "date": "2021",
-                    "description": "Audio-based social networking platform for live conversations",
-                    "investment_value": 35000000,  # $35M
-                    "website": "https://clubhouse.com",
-                    "stock_symbol": "CMGR",
-                    "yahoo_finance_url": "https://finance.yahoo.com/quote/CMGR/"
-                },
-                {
-                    "name": "OpenAI", 
-                    "sector": "Artificial Intelligence",
-                    "stage": "Investment",
-                    "date": "2019",
-                    "description": "AI research company developing GPT models and ChatGPT",
-                    "investment_value": 300000000,  # $300M
-                    "website": "https://openai.com",
-                    "stock_symbol": "",
-                    "yahoo_finance_url": ""
-                }
-            ]
-        
-        # Default portfolio for other investors
-        return [
-            {
-                "name": "TechStartup Inc",
-                "sector": "SaaS",
-                "stage": "Series A",
-                "date": "2023",
-                "description": "B2B software platform"
-            },
-            {
-                "name": "AI Solutions",
-                "sector": "Artificial Intelligence",
-                "stage": "Seed",
-                "date": "2024",
-                "description": "Machine learning infrastructure"
-            },
-            {
-                "name": "FinTech Pro",
-                "sector": "Financial Technology",
-                "stage": "Series B",
-                "date": "2023",
-                "description": "Digital payments platform"
-            }
-        ]
+        return mock_data.get("portfolios", investor_profiles.get("name", ""), match_within=True)
+    
+    # Real implementation using web search and AI extraction (the Gemini SDK is loaded on first use)
+    from langchain_google_genai import ChatGoogleGenerativeAI
     
-    # Real implementation using web search and AI extraction
     llm = ChatGoogleGenerativeAI(
         temperature=0, 
         model="gemini-2.5-flash",
-        google_api_key=os.getenv("GEMINI_API_KEY")
+        google_api_key=os.getenv("GEMINI_API_KEY"),
+        client_options={"api_endpoint": GEMINI_API_BASE_URL} if GEMINI_API_BASE_URL else None,
+        transport="rest" if GEMINI_API_BASE_URL else None
     )
     
     investor_name = investor_profiles.get("name", "")
@@ -633,8 +118,7 @@ def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[D
     print(f"Searching for portfolio companies for {investor_name} from {firm}")
     
     # Use multiple targeted searches
-    from langchain_tavily import TavilySearch
-    search = TavilySearch()
+    from tools.search_tools import tavily_search
     
     portfolio_companies = []
     all_search_results = []
@@ -648,24 +132,36 @@ def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[D
         f'"{firm}" recent investments 2023 2024'
     ]
     
-    # Perform searches and collect results
-    for query in search_queries:
+    # The query planner's broad portfolio search usually has enough to extract from
+    pooled = search_planner.broad_search('portfolio')
+    if isinstance(pooled, dict):
+        if is_usage_limit_error(pooled):
+            print("⚠️ Tavily API limit reached - falling back to mock data")
+            return get_mock_portfolio_for_investor(investor_name)
+        content_pieces = search_content_pieces(pooled.get('results') or [], POOLED_PORTFOLIO_RESULTS)
+        if len(content_pieces) >= POOLED_PORTFOLIO_MIN_RESULTS:
+            print(f"Using {len(content_pieces)} shared search results for portfolio extraction")
+            all_search_results.append("\n".join(content_pieces))
+            search_queries = []  # No targeted queries needed
+        else:
+            search_planner.record_follow_up("portfolio")
+    
+    # Perform searches and collect results. The last two queries mostly repeat
+    # the first three, so they are the first to go when the Tavily quota runs low.
+    for index, query in enumerate(search_queries):
+        # Only the first two result sets go to the LLM
+        if len(all_search_results) >= 2:
+            break
         try:
             print(f"Searching: {query}")
-            results = search.run(query)
+            results = tavily_search(query, query_class="portfolio", optional=index >= 3)
             
             # Tavily returns a dict with 'results' key containing search results
             if isinstance(results, dict) and 'results' in results:
                 search_items = results['results']
                 if search_items and len(search_items) > 0:
                     # Extract content from search results
-                    content_pieces = []
-                    for item in search_items[:5]:  # Use top 5 results per query
-                        title = item.get('title', '')
-                        content = item.get('content', '')
-                        url = item.get('url', '')
-                        if content:
-                            content_pieces.append(f"Title: {title}\nContent: {content}\nURL: {url}\n")
+                    content_pieces = search_content_pieces(search_items, 5)  # Use top 5 results per query
                     
                     if content_pieces:
                         combined_content = "\n".join(content_pieces)
@@ -678,11 +174,9 @@ def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[D
             else:
                 print(f"Unexpected results format: {type(results)}")
                 # Check if it's a Tavily API limit error
-                if isinstance(results, dict) and 'error' in results:
-                    error_msg = str(results.get('error', ''))
-                    if 'usage limit' in error_msg.lower() or '432' in error_msg:
-                        print("⚠️ Tavily API limit reached - falling back to mock data")
-                        return get_mock_portfolio_for_investor(investor_name)
+                if is_usage_limit_error(results):
+                    print("⚠️ Tavily API limit reached - falling back to mock data")
+                    return get_mock_portfolio_for_investor(investor_name)
                 
         except Exception as e:
             print(f"Search error for '{query}': {e}")
@@ -753,7 +247,8 @@ def discover_portfolio(investor_profiles: dict, use_mock: bool = True) -> List[D
             if json_match:
                 json_str = json_match.group()
                 try:
-                    parsed_companies = json.loads(json_str)
+                    with metrics.span("parse_portfolio"):
+                        parsed_companies = json.loads(json_str)
                     
                     # Validate and clean the data
                     for company in parsed_companies:
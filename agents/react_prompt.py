@@ -0,0 +1,46 @@
+"""
+The ReAct agent prompt, vendored from the LangChain hub (hwchase17/react).
+
+Pulling it from the hub cost a network round trip on every profile lookup
+and failed whenever the hub was unreachable. The text is fixed, so it is
+kept here and the PromptTemplate is built once and shared (a warmed-up
+master process builds it before forking, see warmup.py).
+"""
+import threading
+from typing import Any, Optional
+
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+react_prompt: Optional[Any] = None
+react_prompt_lock = threading.Lock()
+
+
+def get_react_prompt():
+    """
+    Return the ReAct PromptTemplate, building it on first use
+    """
+    global react_prompt
+    if react_prompt is None:
+        with react_prompt_lock:
+            if react_prompt is None:
+                from langchain.prompts.prompt import PromptTemplate
+                react_prompt = PromptTemplate.from_template(REACT_TEMPLATE)
+    return react_prompt
@@ -1,12 +1,46 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, Response
 from dotenv import load_dotenv
 import os
+import time
+from contextlib import nullcontext
 
-from investor_research import research_investor
+import metrics
+import research_cache
+import tracing
+import jobs
+import deadlines
+import cancellation
+import prewarm
+import compression
+import serialization
+import mock_data as mock_store
 
 load_dotenv()
 
 app = Flask(__name__, static_folder='static')
+# jsonify() through orjson when available (see serialization.py)
+app.json = serialization.JSONProvider(app)
+
+
+def start_background_threads():
+    """
+    Start the process's background threads. Under a preloading gunicorn
+    (gunicorn.conf.py) threads started in the master would be lost at fork,
+    so each worker starts its own from post_fork instead.
+    """
+    if prewarm.PREWARM_ENABLED:
+        prewarm.start_prewarm_scheduler()
+
+
+if os.getenv("GUNICORN_PRELOAD", "0") != "1":
+    start_background_threads()
+
+
+@app.after_request
+def compress_response(response):
+    # ETags/304s and gzip/Brotli for page, JSON and text responses
+    return compression.finalize_response(request, response)
+
 
 # Serve static images (if needed for other images)
 @app.route('/images/<filename>')
@@ -19,245 +53,189 @@ def index():
     return render_template("index.html")
 
 
+# /mock never changes, so it is serialized and compressed once at startup
+MOCK_BODY = compression.precompress(serialization.dumps(mock_store.payload("mock_response")) + b"\n")
+
+
 @app.route("/mock", methods=["GET"])
 def mock_data():
     """Return mock data for testing the UI"""
-    mock_response = {
-        "success": True,
-        "profile": {
-            "name": "Marc Andreessen",
-            "title": "Co-founder & General Partner",
-            "firm": "Andreessen Horowitz",
-            "bio": "Marc Andreessen is a prominent venture capitalist and co-founder of Andreessen Horowitz. He previously co-created the highly influential Mosaic Internet browser and co-founded Netscape. Known for his 'software is eating the world' thesis, he has invested in and advised many successful technology companies including Facebook, Twitter, GitHub, Pinterest, and Airbnb.",
-            "profile_image": "https://res.cloudinary.com/doqmqgbym/image/upload/v1756815192/investors/investors/marc_andreessen.jpg",
-            "profile_urls": {
-                "twitter": "https://twitter.com/pmarca",
-                "linkedin": "https://www.linkedin.com/in/pmarca",
-                "crunchbase": "https://www.crunchbase.com/person/marc-andreessen",
-                "medium": "https://medium.com/@pmarca",
-                "firm": "https://a16z.com"
-            }
-        },
-        "portfolio": [
-            {
-                "name": "Facebook",
-                "sector": "Social Media",
-                "stage": "Series B",
-                "investment_date": "2007",
-                "description": "Leading social networking platform connecting billions of users worldwide",
-                "website": "https://www.facebook.com",
-                "stock_symbol": "META",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/META"
-            },
-            {
-                "name": "GitHub",
-                "sector": "Developer Tools",
-                "stage": "Series A",
-                "investment_date": "2012",
-                "description": "World's largest platform for software development and version control",
-                "website": "https://github.com",
-                "stock_symbol": "MSFT",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/MSFT"
-            },
-            {
-                "name": "Airbnb",
-                "sector": "Travel & Hospitality",
-                "stage": "Series B",
-                "investment_date": "2011",
-                "description": "Online marketplace for lodging and tourism experiences",
-                "website": "https://www.airbnb.com",
-                "stock_symbol": "ABNB",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/ABNB"
-            },
-            {
-                "name": "Coinbase",
-                "sector": "Cryptocurrency",
-                "stage": "Series C",
-                "investment_date": "2013",
-                "description": "Digital currency exchange platform",
-                "website": "https://www.coinbase.com",
-                "stock_symbol": "COIN",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/COIN"
-            },
-            {
-                "name": "Slack",
-                "sector": "Enterprise Software",
-                "stage": "Series A",
-                "investment_date": "2014",
-                "description": "Business communication platform",
-                "website": "https://slack.com",
-                "stock_symbol": "CRM",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/CRM"
-            },
-            {
-                "name": "Instacart",
-                "sector": "E-commerce",
-                "stage": "Series A",
-                "investment_date": "2013",
-                "description": "Online grocery delivery and pickup service",
-                "website": "https://www.instacart.com",
-                "stock_symbol": "CART",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/CART"
-            },
-            {
-                "name": "Pinterest",
-                "sector": "Social Media",
-                "stage": "Series C",
-                "investment_date": "2012",
-                "description": "Visual discovery and idea platform",
-                "website": "https://www.pinterest.com",
-                "stock_symbol": "PINS",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/PINS"
-            },
-            {
-                "name": "Okta",
-                "sector": "Enterprise Software",
-                "stage": "Series B",
-                "investment_date": "2011",
-                "description": "Identity and access management platform",
-                "website": "https://www.okta.com",
-                "stock_symbol": "OKTA",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/OKTA"
-            },
-            {
-                "name": "Roblox",
-                "sector": "Gaming",
-                "stage": "Series D",
-                "investment_date": "2018",
-                "description": "Online gaming platform and game creation system",
-                "website": "https://www.roblox.com",
-                "stock_symbol": "RBLX",
-                "yahoo_finance_url": "https://finance.yahoo.com/quote/RBLX"
-            },
-            {
-                "name": "Clubhouse",
-                "sector": "Social Media",
-                "stage": "Series B",
-                "investment_date": "2021",
-                "description": "Audio-based social networking app",
-                "website": "https://www.clubhouse.com",
-                "stock_symbol": None,
-                "yahoo_finance_url": None
-            }
-        ],
-        "insights": {
-            "investment_themes": [
-                "Software is Eating the World",
-                "Consumer Internet Platforms",
-                "Enterprise SaaS",
-                "Crypto & Web3",
-                "AI & Machine Learning"
-            ],
-            "investment_thesis": "Marc Andreessen focuses on transformative technology companies that have the potential to disrupt traditional industries. His investment philosophy centers on the belief that software companies can achieve massive scale with minimal marginal costs, leading to unprecedented market opportunities.",
-            "sector_focus": [
-                "Enterprise Software (30%)",
-                "Social Media & Consumer (25%)",
-                "Cryptocurrency & Blockchain (20%)",
-                "Developer Tools & Infrastructure (15%)",
-                "E-commerce & Marketplaces (10%)"
-            ],
-            "notable_quotes": [
-                "Software is eating the world, and we're only at the beginning of this transformation.",
-                "The spread of computers and the Internet will put jobs in two categories: people who tell computers what to do, and people who are told by computers what to do.",
-                "In the startup world, you're either a genius or an idiot. You're never just an ordinary guy trying to get through the day.",
-                "The biggest risk is not taking any risk. In a world that's changing really quickly, the only strategy that is guaranteed to fail is not taking risks."
-            ],
-            "icebreakers": []
-        },
-        "medium_articles": [
-            {
-                "title": "Why Software Is Eating the World",
-                "excerpt": "More and more major businesses and industries are being run on software and delivered as online services...",
-                "date": "Aug 20, 2011",
-                "read_time": "12 min read",
-                "url": "https://a16z.com/2011/08/20/why-software-is-eating-the-world/",
-                "claps": 15000
-            },
-            {
-                "title": "The Future of AI and Its Impact on Society",
-                "excerpt": "Artificial intelligence is poised to transform every industry and aspect of human life...",
-                "date": "Mar 15, 2024",
-                "read_time": "8 min read",
-                "url": "#",
-                "claps": 8500
-            },
-            {
-                "title": "Building the Next Generation of Tech Companies",
-                "excerpt": "Lessons learned from investing in hundreds of startups over the past decade...",
-                "date": "Jan 10, 2024",
-                "read_time": "15 min read",
-                "url": "#",
-                "claps": 12000
-            }
-        ],
-        "news": [
-            {
-                "title": "Andreessen Horowitz Raises $7.2B for New Funds",
-                "excerpt": "The venture capital firm announces its largest fundraise to date, with plans to invest in AI, biotech, and crypto startups...",
-                "source": "TechCrunch",
-                "date": "Today",
-                "url": "https://techcrunch.com"
-            },
-            {
-                "title": "Marc Andreessen on the AI Revolution",
-                "excerpt": "In an exclusive interview, the prominent investor shares his thoughts on artificial intelligence and its potential impact...",
-                "source": "Forbes",
-                "date": "Yesterday",
-                "url": "https://forbes.com"
-            },
-            {
-                "title": "a16z Portfolio Company Goes Public at $10B Valuation",
-                "excerpt": "Another successful exit for Andreessen Horowitz as their portfolio company debuts on NASDAQ...",
-                "source": "Wall Street Journal",
-                "date": "2 days ago",
-                "url": "https://wsj.com"
-            },
-            {
-                "title": "Breaking: Marc Andreessen Joins Board of AI Unicorn",
-                "excerpt": "The respected investor brings decades of experience to fast-growing artificial intelligence company...",
-                "source": "Bloomberg",
-                "date": "3 days ago",
-                "url": "https://bloomberg.com"
-            },
-            {
-                "title": "Andreessen Predicts Major Shifts in Tech Landscape",
-                "excerpt": "Speaking at a recent conference, Marc Andreessen outlined key trends that will shape venture capital...",
-                "source": "VentureBeat",
-                "date": "5 days ago",
-                "url": "https://venturebeat.com"
-            }
-        ]
-    }
-    
-    return jsonify(mock_response)
+    return compression.precompressed_response(request, MOCK_BODY)
 
 
 @app.route("/research", methods=["POST"])
 def research():
+    # Imported on first use so web workers boot without the research pipeline's SDKs
+    from investor_research import build_research_payload
+    
     investor_name = request.form["investor_name"]
+    # ?debug=1 adds a Chrome trace-event timeline of the request to the response
+    debug = (request.args.get("debug") or request.form.get("debug", "")).lower() in ("1", "true", "yes")
     
+    # ?deadline=8 caps the request at 8 s, returning partial sections for stages that overrun
     try:
-        profile, portfolio, insights, news = research_investor(name=investor_name)
-        
-        # Also fetch Medium articles separately to include in response
-        from third_parties.medium import fetch_medium_articles
-        medium_url = profile.profile_urls.get("medium", "")
-        # Pass investor name to get articles ABOUT them
-        medium_articles = fetch_medium_articles(medium_url, mock=False, investor_name=investor_name) if medium_url else []
-        
-        return jsonify({
-            "success": True,
-            "profile": profile.to_dict(),
-            "portfolio": [company.to_dict() for company in portfolio],
-            "insights": insights.to_dict(),
-            "medium_articles": medium_articles,
-            "news": news
-        })
-    except Exception as e:
-        return jsonify({
-            "success": False,
-            "error": str(e)
-        }), 500
+        deadline = float(request.args.get("deadline") or request.form.get("deadline") or deadlines.RESEARCH_DEADLINE)
+    except ValueError:
+        return jsonify({"success": False, "error": "deadline must be a number of seconds"}), 400
+    
+    # Popular investors are kept warm by prewarm.py; serve a fresh cached result unless ?refresh=1
+    research_cache.record_request(investor_name)
+    refresh = (request.args.get("refresh") or request.form.get("refresh", "")).lower() in ("1", "true", "yes")
+    cached = None if refresh or debug else research_cache.get_research(investor_name)
+    if cached is not None:
+        return jsonify(dict(cached, cached=True))
+    
+    # The page sends a client_id so a closed tab (see /research/cancel) or a new
+    # search from the same tab stops this request at its next I/O boundary
+    client_id = request.form.get("client_id")
+    # Under asgi.py the server also cancels the request when the connection drops
+    token = cancellation.new_token(request.environ.get(cancellation.ENVIRON_KEY))
+    if client_id:
+        cancellation.register_client(client_id, token)
+    
+    with tracing.trace(f"research {investor_name}") if debug else nullcontext() as timeline:
+        try:
+            with cancellation.scope(token):
+                payload = build_research_payload(investor_name, deadline=deadline)
+            research_cache.store_research(investor_name, payload)
+            status = 200
+        except cancellation.Cancelled as e:
+            print(f"🛑 Research for {investor_name} cancelled ({e})")
+            payload = {
+                "success": False,
+                "cancelled": True,
+                "error": f"Request cancelled ({e})"
+            }
+            # nginx's "client closed request"
+            status = 499
+        except Exception as e:
+            payload = {
+                "success": False,
+                "error": str(e)
+            }
+            status = 500
+        finally:
+            if client_id:
+                cancellation.release_client(client_id, token)
+    
+    if debug:
+        payload["timeline"] = tracing.export(timeline)
+    return jsonify(payload), status
+
+
+@app.route("/research/cancel", methods=["POST"])
+def cancel_research():
+    """
+    Stop the research a browser tab is waiting on (sent with navigator.sendBeacon
+    when the tab closes). Accepts client_id as a form field or JSON.
+    """
+    data = request.get_json(silent=True) or {}
+    client_id = data.get("client_id") or request.form.get("client_id")
+    if not client_id:
+        return jsonify({"success": False, "error": "client_id is required"}), 400
+    return jsonify({"success": True, "cancelled": cancellation.cancel_client(client_id)})
+
+
+@app.route("/research/batch", methods=["POST"])
+def research_batch_endpoint():
+    """
+    Research a list of investors, streaming one JSON object per line as each finishes.
+    Accepts JSON {"names": [...], "concurrency": 8, "refresh": false} or a form
+    field "names" with one name per line.
+    """
+    from batch_research import research_batch, dedupe_names, BATCH_CONCURRENCY, BATCH_MAX_NAMES
+
+    data = request.get_json(silent=True) or {}
+    names = data.get("names") or request.form.get("names", "").splitlines()
+    if not isinstance(names, list) or not dedupe_names(names):
+        return jsonify({"success": False, "error": "Provide a list of investor names"}), 400
+    if len(dedupe_names(names)) > BATCH_MAX_NAMES:
+        return jsonify({"success": False, "error": f"At most {BATCH_MAX_NAMES} investors per batch"}), 400
+
+    # Clamped to 1..BATCH_CONCURRENCY so one request can't take more than the configured share
+    try:
+        concurrency = int(data.get("concurrency") or request.form.get("concurrency") or BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "concurrency must be a whole number"}), 400
+    concurrency = max(1, min(concurrency, BATCH_CONCURRENCY))
+    refresh = str(data.get("refresh") or request.form.get("refresh", "")).lower() in ("1", "true", "yes")
+
+    def stream():
+        for record in research_batch(names, concurrency=concurrency, refresh=refresh):
+            yield serialization.dumps(record) + b"\n"
+
+    return Response(stream(), mimetype="application/x-ndjson")
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """
+    Queue a research job and return its ID immediately (202).
+    Poll GET /jobs/<id> or subscribe to GET /jobs/<id>/events for progress.
+    """
+    data = request.get_json(silent=True) or {}
+    investor_name = (data.get("investor_name") or request.form.get("investor_name", "")).strip()
+    if not investor_name:
+        return jsonify({"success": False, "error": "investor_name is required"}), 400
+
+    jobs.start_workers()
+    job = jobs.submit_job(investor_name)
+    response = jsonify(dict(job, success=True, status_url=f"/jobs/{job['job_id']}"))
+    response.headers["Location"] = f"/jobs/{job['job_id']}"
+    return response, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Return a job's status, partial results and (when finished) the full result"""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify(dict(job, success=True))
+
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    job = jobs.cancel_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+    return jsonify(dict(job, success=True))
+
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Server-sent events: one "job" event each time the job changes, ending when it finishes
+    """
+    if jobs.get_job(job_id) is None:
+        return jsonify({"success": False, "error": "Job not found"}), 404
+
+    def stream():
+        last_update = None
+        last_sent = time.time()
+        while True:
+            job = jobs.get_job(job_id)
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                last_sent = time.time()
+                yield b"event: job\ndata: " + serialization.dumps(job) + b"\n\n"
+            elif time.time() - last_sent > 15:
+                # Comment line keeps proxies from closing an idle stream
+                last_sent = time.time()
+                yield b": keep-alive\n\n"
+            if job["status"] in jobs.FINISHED_STATUSES:
+                return
+            time.sleep(jobs.JOB_POLL_INTERVAL)
+
+    return Response(stream(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Expose pipeline timings and counters in Prometheus text format"""
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
 
 
 if __name__ == "__main__":
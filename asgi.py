@@ -0,0 +1,131 @@
+"""
+ASGI serving mode: one process holding hundreds of in-flight /research requests.
+
+A /research request spends 20-60 s waiting on LLM, Tavily and scraping
+calls, and a sync gunicorn worker is tied up for all of it. Here uvicorn
+owns the connections and a2wsgi runs the Flask app (the same routes) on a
+pool of ASGI_MAX_REQUESTS request threads. A waiting request costs an idle
+thread, not a worker process. Responses are sent through the event loop as
+they are produced, so the batch NDJSON stream and the job event stream work
+unchanged.
+
+a2wsgi only reads from the client while the request body is read, so the
+body is read here first and the connection is then watched for a
+disconnect. When the client goes away, the request's cancellation token is
+cancelled and /research stops at its next I/O boundary, like a
+/research/cancel beacon. Streams are closed after their current chunk.
+Throughput is still bounded by the provider budgets (PROVIDER_CONCURRENCY),
+so most in-flight requests spend their time queued for a Tavily/LLM slot.
+This mode only makes that waiting cheap.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker     # one event loop per worker
+"""
+import os
+import asyncio
+import threading
+from typing import Dict, Optional
+
+from a2wsgi import WSGIMiddleware
+
+import metrics
+import deadlines
+import cancellation
+from app import app as flask_app
+
+# Requests handled at once (each one holds a thread while the pipeline waits on I/O)
+ASGI_MAX_REQUESTS = int(os.getenv("ASGI_MAX_REQUESTS", "256"))
+
+# Threads for stages run under a deadline budget (deadlines.py). The content
+# stage runs four fetches at once, so the default covers every request thread.
+ASGI_STAGE_WORKERS = int(os.getenv("ASGI_STAGE_WORKERS", str(ASGI_MAX_REQUESTS * 4)))
+
+deadlines.set_stage_workers(ASGI_STAGE_WORKERS)
+
+
+def close_on_cancel(iterable, token: Dict):
+    """
+    Yield the response's chunks until the client disconnects. Closing a streamed
+    response runs its generator's cleanup (e.g. batch cancellation).
+    """
+    try:
+        for chunk in iterable:
+            if token['event'].is_set():
+                return
+            yield chunk
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+
+
+def cancellable_app(environ: Dict, start_response):
+    """
+    The Flask app, given the connection's cancellation token
+    """
+    token = environ['asgi.scope'][cancellation.ENVIRON_KEY]
+    environ[cancellation.ENVIRON_KEY] = token
+    return close_on_cancel(flask_app(environ, start_response), token)
+
+
+wsgi_app = WSGIMiddleware(cancellable_app, workers=ASGI_MAX_REQUESTS)
+
+
+async def read_body(receive) -> Optional[bytes]:
+    """
+    Read the whole request body, or None if the client went away first
+    """
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def watch_disconnect(receive, token: Dict, finished: threading.Event) -> None:
+    """
+    Cancel the request as soon as the client disconnects
+    """
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            # Servers also report a disconnect once the response is complete
+            if not finished.is_set():
+                metrics.inc("asgi_disconnects_total")
+                cancellation.cancel(token, "client_disconnected")
+            return
+
+
+async def app(scope, receive, send) -> None:
+    """
+    The ASGI application
+    """
+    if scope['type'] != 'http':
+        # Lifespan events are answered by a2wsgi
+        await wsgi_app(scope, receive, send)
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        return
+
+    token = cancellation.new_token()
+    finished = threading.Event()
+    watcher = asyncio.ensure_future(watch_disconnect(receive, token, finished))
+
+    async def replay_body() -> Dict:
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send_tracked(message: Dict) -> None:
+        if message['type'] == 'http.response.body' and not message.get('more_body', False):
+            finished.set()
+        await send(message)
+
+    metrics.gauge_add("asgi_requests_in_flight", 1)
+    try:
+        await wsgi_app(dict(scope, **{cancellation.ENVIRON_KEY: token}), replay_body, send_tracked)
+    finally:
+        metrics.gauge_add("asgi_requests_in_flight", -1)
+        watcher.cancel()
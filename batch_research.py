@@ -0,0 +1,159 @@
+"""
+Research many investors at once.
+
+Names are deduplicated, then researched concurrently. Every worker shares
+the search, LLM, image and research caches, and calls to Tavily and the
+LLMs are bounded by the process-wide provider budgets (provider_budgets.py).
+So throughput depends on the concurrency budget, not on the list length.
+Results are produced per investor as soon as each one finishes.
+
+    python batch_research.py names.txt                  # one name per line (or a JSON list)
+    python batch_research.py names.txt -o results.jsonl --concurrency 12
+    cat names.txt | python batch_research.py - --refresh
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+import metrics
+import research_cache
+import serialization
+import cancellation
+from investor_research import build_research_payload
+
+load_dotenv()
+
+# Investors researched at the same time in one batch
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Largest list accepted in one batch
+BATCH_MAX_NAMES = int(os.getenv("BATCH_MAX_NAMES", "500"))
+
+
+def dedupe_names(names: List[str]) -> List[str]:
+    """
+    Drop blanks and repeats (ignoring case and extra spaces), keeping the first spelling
+    """
+    seen = set()
+    unique = []
+    for name in names:
+        cleaned = ' '.join(str(name).split())
+        key = cleaned.lower()
+        if cleaned and key not in seen:
+            seen.add(key)
+            unique.append(cleaned)
+    return unique
+
+
+def research_one(investor_name: str, refresh: bool = False) -> Dict:
+    """
+    Research one investor for a batch, reusing a recent result unless refresh is set.
+    Never raises; failures are reported in the record.
+    """
+    start = time.perf_counter()
+    payload = None if refresh else research_cache.get_research(investor_name)
+    cached = payload is not None
+    if payload is None:
+        try:
+            # Provider budgets do the pacing, so skip the fixed per-step pauses
+            payload = build_research_payload(investor_name, pace=False)
+            research_cache.store_research(investor_name, payload)
+        except Exception as e:
+            print(f"❌ Batch research failed for {investor_name}: {e}")
+            payload = {"success": False, "error": str(e)}
+
+    metrics.inc("batch_investors_total", result="ok" if payload.get("success") else "error")
+    return dict(payload, investor=investor_name, cached=cached,
+                elapsed_s=round(time.perf_counter() - start, 2))
+
+
+def research_batch(names: List[str], concurrency: int = BATCH_CONCURRENCY,
+                   refresh: bool = False) -> Iterator[Dict]:
+    """
+    Research a list of investors concurrently, yielding one record per investor
+    as it completes and then a summary record ({"done": true, ...}).
+    """
+    unique = dedupe_names(names)
+    start = time.perf_counter()
+    succeeded = 0
+    print(f"📋 Batch of {len(unique)} investors ({len(names) - len(unique)} duplicates dropped), "
+          f"concurrency {concurrency}")
+
+    token = cancellation.new_token(cancellation.current_token.get())
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+    finished = False
+    try:
+        futures = [executor.submit(cancellation.run_with, token, research_one, name, refresh) for name in unique]
+        for future in as_completed(futures):
+            record = future.result()
+            succeeded += 1 if record.get("success") else 0
+            yield record
+        finished = True
+    finally:
+        # If the consumer stops early (client disconnected), don't start the rest
+        # and stop the running ones at their next I/O
+        executor.shutdown(wait=False, cancel_futures=True)
+        if not finished:
+            cancellation.cancel(token, "client_disconnected")
+
+    elapsed = time.perf_counter() - start
+    yield {
+        "done": True,
+        "total": len(unique),
+        "succeeded": succeeded,
+        "failed": len(unique) - succeeded,
+        "duplicates": len(names) - len(unique),
+        "elapsed_s": round(elapsed, 2),
+        "investors_per_minute": round(len(unique) / elapsed * 60, 2) if elapsed else 0.0
+    }
+
+
+def read_names(path: str) -> List[str]:
+    """
+    Read names from a file (or stdin for "-"): a JSON list or one name per line
+    """
+    text = sys.stdin.read() if path == "-" else open(path, 'r').read()
+    stripped = text.strip()
+    if stripped.startswith('['):
+        return json.loads(stripped)
+    return stripped.splitlines()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Research a list of investors and write JSON Lines")
+    parser.add_argument("names", help="File with one investor name per line or a JSON list ('-' for stdin)")
+    parser.add_argument("-o", "--output", help="Write JSON Lines here instead of stdout")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY)
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached research results")
+    args = parser.parse_args(argv)
+
+    names = read_names(args.names)
+    if len(dedupe_names(names)) > BATCH_MAX_NAMES:
+        print(f"❌ At most {BATCH_MAX_NAMES} investors per batch")
+        return 1
+
+    if args.output:
+        out = open(args.output, 'w')
+    else:
+        # Keep pipeline progress prints out of the JSON Lines stream
+        out, sys.stdout = sys.stdout, sys.stderr
+    failed = 0
+    try:
+        for record in research_batch(names, concurrency=args.concurrency, refresh=args.refresh):
+            failed = record.get("failed", failed)
+            out.write(serialization.dumps(record).decode('utf-8') + "\n")
+            out.flush()
+    finally:
+        if args.output:
+            out.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
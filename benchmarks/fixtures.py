@@ -0,0 +1,287 @@
+"""
+Record/replay fixtures for the research pipeline.
+
+recording(path) wraps the real Tavily, LLM, HTTP (requests), LangChain Hub
+and Cloudinary clients and saves every response to a JSON cassette.
+replaying(path) serves responses from the cassette instead, sleeping for
+the recorded or injected latency, so the whole pipeline runs offline.
+
+A cassette holds one list of calls per channel. Replay matches a call by
+its exact request key first; unless strict, a call with no exact match
+(for example an LLM prompt that changed slightly) gets the next unused
+entry recorded on that channel.
+"""
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Callable
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CHANNELS = ("tavily", "llm", "http", "hub", "cloudinary")
+
+
+class FixtureMissing(Exception):
+    """Raised in replay mode when a call has no recorded response"""
+
+
+class RecordedError(Exception):
+    """Replays an exception that the real client raised while recording"""
+
+
+# Set while a recorded call is running, so nested calls (e.g. the HTTP
+# request Tavily makes internally) are not recorded twice
+call_depth = threading.local()
+
+
+def request_key(channel: str, text: str) -> str:
+    """
+    Stable key for a request on a channel
+    """
+    return hashlib.sha1(f"{channel}|{text}".encode("utf-8")).hexdigest()
+
+
+def load_cassette(path: str) -> Dict[str, List[Dict]]:
+    """
+    Read a cassette file, returning empty channels if it does not exist
+    """
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        data = {}
+    channels = data.get('channels', {})
+    return {channel: list(channels.get(channel, [])) for channel in CHANNELS}
+
+
+def save_cassette(path: str, channels: Dict[str, List[Dict]]) -> None:
+    """
+    Write a cassette file
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'version': 1, 'channels': channels}, f, indent=1, sort_keys=True)
+
+
+# --- Per-channel request keys and response encoding -------------------------
+
+def tavily_request(args, kwargs) -> str:
+    tool_input = args[1] if len(args) > 1 else kwargs.get('tool_input')
+    return json.dumps(tool_input, sort_keys=True, default=str)
+
+
+def llm_request(args, kwargs) -> str:
+    llm, prompt = args[0], args[1] if len(args) > 1 else kwargs.get('input')
+    text = prompt.to_string() if hasattr(prompt, 'to_string') else str(prompt)
+    model = getattr(llm, 'model_name', None) or getattr(llm, 'model', '')
+    return f"{type(llm).__name__}|{model}|{text}"
+
+
+def http_request(args, kwargs) -> str:
+    method, url = args[1], args[2]
+    params = kwargs.get('params')
+    return f"{method.upper()} {url} {json.dumps(params, sort_keys=True, default=str) if params else ''}".strip()
+
+
+def hub_request(args, kwargs) -> str:
+    return args[0]
+
+
+def encode_llm(message) -> Dict:
+    return {'content': getattr(message, 'content', str(message))}
+
+
+def decode_llm(data: Dict):
+    from langchain_core.messages import AIMessage
+    return AIMessage(content=data['content'])
+
+
+def encode_http(response: requests.Response) -> Dict:
+    return {
+        'status': response.status_code,
+        'url': response.url,
+        'headers': dict(response.headers),
+        'body': base64.b64encode(response.content).decode('ascii')
+    }
+
+
+def decode_http(data: Dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = data['status']
+    response.url = data['url']
+    response.headers = CaseInsensitiveDict(data.get('headers', {}))
+    response._content = base64.b64decode(data.get('body', ''))
+    response.reason = ""
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+def encode_hub(prompt) -> Dict:
+    from langchain_core.load import dumps
+    return {'prompt': dumps(prompt)}
+
+
+def decode_hub(data: Dict):
+    from langchain_core.load import loads
+    return loads(data['prompt'])
+
+
+def plain(value):
+    return json.loads(json.dumps(value, default=str))
+
+
+def patch_targets() -> List[Dict]:
+    """
+    Every client call the pipeline makes, with how to key and store it
+    """
+    import langchain.hub
+    import cloudinary.api
+    import cloudinary.uploader
+    from langchain_tavily import TavilySearch
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    def cloudinary_request(name):
+        return lambda args, kwargs: f"{name} {args[0] if args else ''}"
+
+    return [
+        # ChatGoogleGenerativeAI overrides invoke, so it needs its own patch
+        {'channel': 'llm', 'owner': ChatGoogleGenerativeAI, 'attr': 'invoke',
+         'key': llm_request, 'encode': encode_llm, 'decode': decode_llm},
+        {'channel': 'tavily', 'owner': TavilySearch, 'attr': 'run',
+         'key': tavily_request, 'encode': plain, 'decode': lambda data: data},
+        {'channel': 'llm', 'owner': BaseChatModel, 'attr': 'invoke',
+         'key': llm_request, 'encode': encode_llm, 'decode': decode_llm},
+        {'channel': 'http', 'owner': requests.Session, 'attr': 'request',
+         'key': http_request, 'encode': encode_http, 'decode': decode_http},
+        {'channel': 'hub', 'owner': langchain.hub, 'attr': 'pull',
+         'key': hub_request, 'encode': encode_hub, 'decode': decode_hub},
+        {'channel': 'cloudinary', 'owner': cloudinary.uploader, 'attr': 'upload',
+         'key': cloudinary_request('upload'), 'encode': plain, 'decode': lambda data: data},
+        {'channel': 'cloudinary', 'owner': cloudinary.api, 'attr': 'resource',
+         'key': cloudinary_request('resource'), 'encode': plain, 'decode': lambda data: data},
+        {'channel': 'cloudinary', 'owner': cloudinary.api, 'attr': 'usage',
+         'key': cloudinary_request('usage'), 'encode': plain, 'decode': lambda data: data},
+    ]
+
+
+@contextmanager
+def patched(make_wrapper: Callable):
+    """
+    Swap every patch target for make_wrapper(target, original) and restore afterwards
+    """
+    originals = []
+    try:
+        for target in patch_targets():
+            original = getattr(target['owner'], target['attr'])
+            originals.append((target['owner'], target['attr'], original))
+            setattr(target['owner'], target['attr'], make_wrapper(target, original))
+        yield
+    finally:
+        for owner, attr, original in reversed(originals):
+            setattr(owner, attr, original)
+
+
+@contextmanager
+def recording(path: str):
+    """
+    Call the real services and save every response to the cassette at path
+    """
+    channels = {channel: [] for channel in CHANNELS}
+    lock = threading.Lock()
+
+    def make_wrapper(target, original):
+        def wrapper(*args, **kwargs):
+            if getattr(call_depth, 'value', 0):
+                return original(*args, **kwargs)
+
+            request = target['key'](args, kwargs)
+            entry = {'key': request_key(target['channel'], request), 'request': request[:300]}
+            call_depth.value = 1
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+                entry['response'] = target['encode'](result)
+                return result
+            except Exception as e:
+                entry['error'] = {'type': type(e).__name__, 'message': str(e)}
+                raise
+            finally:
+                call_depth.value = 0
+                entry['duration'] = round(time.perf_counter() - start, 4)
+                with lock:
+                    channels[target['channel']].append(entry)
+        return wrapper
+
+    with patched(make_wrapper):
+        try:
+            yield channels
+        finally:
+            save_cassette(path, channels)
+
+
+@contextmanager
+def replaying(path: str, latency: Optional[Dict[str, float]] = None,
+              latency_scale: float = 1.0, strict: bool = False):
+    """
+    Serve every call from the cassette at path.
+
+    Each replayed call sleeps for latency[channel] seconds if given, otherwise
+    for its recorded duration times latency_scale (0 disables sleeping).
+    Yields a dict of per-channel call counts.
+    """
+    latency = latency or {}
+    channels = load_cassette(path)
+    by_key = {channel: defaultdict(deque) for channel in CHANNELS}
+    for channel, entries in channels.items():
+        for entry in entries:
+            by_key[channel][entry['key']].append(entry)
+    used = set()
+    cursors = {channel: 0 for channel in CHANNELS}
+    counts = {channel: 0 for channel in CHANNELS}
+    lock = threading.Lock()
+
+    def next_entry(channel: str, key: str, request: str) -> Dict:
+        with lock:
+            counts[channel] += 1
+            matches = by_key[channel].get(key)
+            if matches:
+                # Reuse the last recording once repeats run out
+                entry = matches.popleft() if len(matches) > 1 else matches[0]
+                used.add(id(entry))
+                return entry
+            if not strict:
+                entries = channels[channel]
+                while cursors[channel] < len(entries):
+                    entry = entries[cursors[channel]]
+                    cursors[channel] += 1
+                    if id(entry) not in used:
+                        used.add(id(entry))
+                        return entry
+        raise FixtureMissing(f"No recorded {channel} response for: {request[:120]}")
+
+    def make_wrapper(target, original):
+        def wrapper(*args, **kwargs):
+            request = target['key'](args, kwargs)
+            entry = next_entry(target['channel'], request_key(target['channel'], request), request)
+
+            delay = latency.get(target['channel'], entry.get('duration', 0) * latency_scale)
+            if delay > 0:
+                time.sleep(delay)
+
+            if 'error' in entry:
+                error = entry['error']
+                if target['channel'] == 'http':
+                    raise requests.ConnectionError(error['message'])
+                raise RecordedError(error['message'])
+            return target['decode'](entry['response'])
+        return wrapper
+
+    with patched(make_wrapper):
+        yield counts
@@ -0,0 +1,107 @@
+"""
+Import-time report for the web process and the research pipeline.
+
+Imports each module in a fresh interpreter with `python -X importtime` and
+reports how long the import took, the peak RSS afterwards, the packages
+that cost the most and which heavy SDKs (LangChain, Gemini, Groq, Tavily,
+BeautifulSoup, Cloudinary) were loaded. `app` should load none of them:
+they are imported when their pipeline stage first runs.
+
+    python benchmarks/import_report.py                      # app, investor_research, jobs, batch_research
+    python benchmarks/import_report.py app --runs 5 --top 15
+    python benchmarks/import_report.py app --max-ms 400     # exit 1 if importing app takes longer
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+
+DEFAULT_MODULES = ["app", "investor_research", "jobs", "batch_research"]
+
+# SDKs that should only load when the stage that needs them runs
+HEAVY_MODULES = (
+    "langchain", "langchain_core", "langsmith", "langchain_groq", "langchain_google_genai",
+    "langchain_tavily", "google.ai.generativelanguage", "bs4", "cloudinary",
+)
+
+# Runs in the child interpreter after the import, reporting what it loaded
+PROBE = (
+    "import sys, json, resource;"
+    "print(json.dumps({{'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,"
+    " 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))"
+)
+
+
+def measure_import(module: str) -> Dict:
+    """
+    Import a module in a fresh interpreter and collect -X importtime output
+    """
+    code = f"import {module}\n" + PROBE.format(heavy=HEAVY_MODULES)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # "import time:  self [us] | cumulative | <indent>module"; the indent shows nesting
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        timings.append({'module': name, 'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    total = next((t['cumulative_us'] for t in timings if t['module'] == module), 0)
+    return {'module': module, 'total_us': total, 'timings': timings,
+            'rss_kb': probe['rss_kb'], 'heavy': probe['heavy']}
+
+
+def top_packages(timings: List[Dict], limit: int) -> List[tuple]:
+    """
+    Self time summed per top-level package, most expensive first
+    """
+    packages: Dict[str, int] = {}
+    for timing in timings:
+        package = timing['module'].split('.')[0]
+        packages[package] = packages.get(package, 0) + timing['self_us']
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def report(module: str, runs: int, top: int) -> Dict:
+    """
+    Measure a module (best of several runs, since the first is skewed by disk caches) and print it
+    """
+    best = min((measure_import(module) for _ in range(max(1, runs))), key=lambda m: m['total_us'])
+    print(f"\n{module}: {best['total_us'] / 1000:.0f} ms, peak RSS {best['rss_kb'] / 1024:.0f} MB")
+    print(f"  heavy SDKs loaded: {', '.join(best['heavy']) or 'none'}")
+    for package, self_us in top_packages(best['timings'], top):
+        print(f"  {package:<32} {self_us / 1000:8.1f} ms")
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Report import time and memory for the app's modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module; the fastest is reported")
+    parser.add_argument("--top", type=int, default=10, help="Packages to list per module")
+    parser.add_argument("--max-ms", type=float, help="Fail if any module takes longer than this to import")
+    args = parser.parse_args(argv)
+
+    results = [report(module, args.runs, args.top) for module in args.modules]
+    if args.max_ms is not None:
+        slow = [r['module'] for r in results if r['total_us'] / 1000 > args.max_ms]
+        if slow:
+            print(f"\n❌ Over the {args.max_ms:.0f} ms import budget: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+"""
+Offline benchmark for the research pipeline.
+
+Runs research_investor for every investor in the corpus against recorded
+fixtures (see fixtures.py) and reports wall time, CPU time, peak traced
+memory and per-stage call counts, with no network access.
+
+    python benchmarks/run_benchmarks.py --record               # record fixtures from the live services
+    python benchmarks/run_benchmarks.py                        # replay with the recorded latency
+    python benchmarks/run_benchmarks.py --latency-scale 0      # no injected latency (pure CPU cost)
+    python benchmarks/run_benchmarks.py --latency llm=2 --latency tavily=0.5
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json --tolerance 0.2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+DEFAULT_CORPUS = os.path.join(BENCHMARK_DIR, "corpus.json")
+DEFAULT_FIXTURES = os.path.join(BENCHMARK_DIR, "fixtures")
+
+# Clients refuse to construct without keys; replayed runs never use them
+PLACEHOLDER_KEYS = ("TAVILY_API_KEY", "GROQ_API_KEY", "GEMINI_API_KEY", "GOOGLE_API_KEY")
+
+
+def fixture_path(fixtures_dir: str, investor_name: str) -> str:
+    """
+    One cassette per investor
+    """
+    slug = '_'.join(investor_name.lower().split()).replace('-', '_')
+    return os.path.join(fixtures_dir, f"{slug}.json")
+
+
+def parse_latency(values: List[str]) -> Dict[str, float]:
+    """
+    Parse --latency channel=seconds options
+    """
+    latency = {}
+    for value in values or []:
+        channel, _, seconds = value.partition('=')
+        latency[channel.strip()] = float(seconds)
+    return latency
+
+
+def isolate_caches(work_dir: str) -> None:
+    """
+    Keep on-disk caches out of the benchmark so every run starts cold
+    """
+    os.environ["IMAGE_CACHE_PATH"] = os.path.join(work_dir, "image_cache.json")
+    os.environ["CLOUDINARY_MANIFEST_PATH"] = os.path.join(work_dir, "cloudinary_manifest.json")
+    os.environ["RESEARCH_CACHE_PATH"] = os.path.join(work_dir, "research_cache.db")
+
+
+def reset_caches(work_dir: str, run_index: int) -> None:
+    """
+    Point the image and research caches at fresh files for the next run
+    """
+    import research_cache
+    from third_parties import image_cache
+    # Write the previous run's pending entries to its own file before switching
+    image_cache.flush()
+    with image_cache.cache_lock:
+        image_cache.IMAGE_CACHE_PATH = os.path.join(work_dir, f"image_cache_{run_index}.json")
+        image_cache.cache_entries = None
+    research_cache.RESEARCH_CACHE_PATH = os.path.join(work_dir, f"research_cache_{run_index}.db")
+
+
+def run_investor(investor_name: str, cassette: str, record: bool, latency: Dict[str, float],
+                 latency_scale: float, strict: bool) -> Dict:
+    """
+    Run the full pipeline once for an investor and measure it
+    """
+    import fixtures
+    import metrics
+    from investor_research import research_investor
+
+    metrics.reset()
+    tracemalloc.reset_peak()
+    error = None
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if record:
+        context = fixtures.recording(cassette)
+    else:
+        context = fixtures.replaying(cassette, latency=latency, latency_scale=latency_scale, strict=strict)
+    with context as calls:
+        try:
+            research_investor(name=investor_name)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    peak = tracemalloc.get_traced_memory()[1]
+
+    if record:
+        calls = {channel: len(entries) for channel, entries in calls.items()}
+    snapshot = metrics.snapshot()
+
+    return {
+        'investor': investor_name,
+        'wall_s': round(wall, 3),
+        'cpu_s': round(cpu, 3),
+        'peak_mb': round(peak / (1024 * 1024), 2),
+        'calls': dict(calls),
+        'stages': snapshot['stages'],
+        'api_calls': snapshot['api_calls'],
+        'error': error
+    }
+
+
+def print_report(results: List[Dict]) -> None:
+    """
+    Print per-investor and per-stage tables
+    """
+    print(f"\n{'Investor':<24}{'wall s':>9}{'cpu s':>9}{'peak MB':>9}{'llm':>6}{'tavily':>8}{'http':>6}  status")
+    print("-" * 86)
+    for result in results:
+        calls = result['calls']
+        status = "ok" if not result['error'] else result['error'][:40]
+        print(f"{result['investor'][:23]:<24}{result['wall_s']:>9.2f}{result['cpu_s']:>9.2f}{result['peak_mb']:>9.1f}"
+              f"{calls.get('llm', 0):>6}{calls.get('tavily', 0):>8}{calls.get('http', 0):>6}  {status}")
+
+    stages = {}
+    for result in results:
+        for stage, totals in result['stages'].items():
+            merged = stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+            merged['count'] += totals['count']
+            merged['seconds'] += totals['seconds']
+
+    print(f"\n{'Stage':<32}{'calls':>8}{'total s':>10}{'mean s':>10}")
+    print("-" * 60)
+    for stage, totals in sorted(stages.items(), key=lambda item: -item[1]['seconds']):
+        mean = totals['seconds'] / totals['count'] if totals['count'] else 0.0
+        print(f"{stage[:31]:<32}{totals['count']:>8}{totals['seconds']:>10.2f}{mean:>10.3f}")
+
+
+def compare_with_baseline(results: List[Dict], baseline_path: str, tolerance: float) -> bool:
+    """
+    Flag investors whose wall time grew by more than the tolerance. Returns True if none did.
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = {result['investor']: result for result in json.load(f)['results']}
+
+    ok = True
+    print(f"\n📏 Comparing with {baseline_path} (tolerance {tolerance:.0%})")
+    for result in results:
+        previous = baseline.get(result['investor'])
+        if not previous:
+            continue
+        # Small absolute slack so sub-100ms runs don't flap
+        limit = previous['wall_s'] * (1 + tolerance) + 0.05
+        if result['wall_s'] > limit:
+            ok = False
+            print(f"   ❌ {result['investor']}: {previous['wall_s']:.2f}s -> {result['wall_s']:.2f}s")
+        else:
+            print(f"   ✅ {result['investor']}: {previous['wall_s']:.2f}s -> {result['wall_s']:.2f}s")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark research_investor against recorded fixtures")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSON list of investor names")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory of recorded cassettes")
+    parser.add_argument("--record", action="store_true", help="Call the live services and record cassettes")
+    parser.add_argument("--latency", action="append", metavar="CHANNEL=SECONDS",
+                        help="Inject a fixed latency per call (channels: tavily, llm, http, hub, cloudinary)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply recorded call durations (0 disables injected latency)")
+    parser.add_argument("--strict", action="store_true", help="Fail on calls with no exact recorded match")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--save", help="Write results to a JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from --save to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, 'r') as f:
+        corpus = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="investalytics-bench-")
+    isolate_caches(work_dir)
+    if not args.record:
+        for key in PLACEHOLDER_KEYS:
+            os.environ.setdefault(key, "replay")
+
+    # Import the pipeline and the SDKs it loads lazily up front, so module
+    # import is not counted as run time or memory
+    import investor_research
+    investor_research.preload_sdks()
+
+    tracemalloc.start()
+    results = []
+    run_index = 0
+    for investor_name in corpus:
+        cassette = fixture_path(args.fixtures, investor_name)
+        if not args.record and not os.path.exists(cassette):
+            print(f"⚠️ No fixtures for {investor_name} (run with --record); skipping")
+            continue
+        for _ in range(1 if args.record else args.repeat):
+            reset_caches(work_dir, run_index)
+            run_index += 1
+            print(f"\n⏱️ {investor_name}")
+            results.append(run_investor(investor_name, cassette, args.record, parse_latency(args.latency),
+                                        args.latency_scale, args.strict))
+    tracemalloc.stop()
+
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'created_at': time.time(), 'results': results}, f, indent=2)
+        print(f"\n💾 Saved results to {args.save}")
+
+    if args.compare and not compare_with_baseline(results, args.compare, args.tolerance):
+        return 1
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
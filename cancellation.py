@@ -0,0 +1,148 @@
+"""
+Cooperative cancellation for research requests.
+
+A token is attached to the running request (a context variable, like the
+trace and the deadline budget) and checked at every I/O boundary: before
+each Tavily search, LLM call, Wikipedia/Medium fetch and image check, and
+during pauses and retry backoff. Once cancelled, the next check raises
+Cancelled, so work for an abandoned request stops instead of spending
+worker time and API quota.
+
+Tokens are cancelled when the browser tab closes (a beacon to
+/research/cancel), when the connection drops (under asgi.py), when the
+same client starts another search, when a background job is cancelled, or
+when a stage overruns its deadline.
+"""
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Dict
+
+import metrics
+
+current_token = contextvars.ContextVar("current_token", default=None)
+
+# WSGI environ key for a token the server cancels when the client disconnects (see asgi.py)
+ENVIRON_KEY = "investalytics.cancel_token"
+
+clients_lock = threading.Lock()
+active_clients: Dict[str, Dict] = {}
+
+
+class Cancelled(BaseException):
+    """
+    Raised at the next I/O boundary once the request's token is cancelled.
+    A BaseException (like KeyboardInterrupt) so the pipeline's broad
+    `except Exception` fallbacks don't swallow it and carry on.
+    """
+
+
+def new_token(parent: Optional[Dict] = None) -> Dict:
+    """
+    Create a token; cancelling the parent also cancels it
+    """
+    token = {'event': threading.Event(), 'reason': None, 'children': [], 'lock': threading.Lock()}
+    if parent is not None:
+        with parent['lock']:
+            parent['children'].append(token)
+            if parent['event'].is_set():
+                cancel(token, parent['reason'])
+    return token
+
+
+def cancel(token: Dict, reason: str = "cancelled") -> None:
+    """
+    Cancel a token and all of its children
+    """
+    with token['lock']:
+        if token['event'].is_set():
+            return
+        token['reason'] = reason
+        token['event'].set()
+        children = list(token['children'])
+    for child in children:
+        cancel(child, reason)
+
+
+@contextmanager
+def scope(token: Optional[Dict]):
+    """
+    Make token the current request's token inside the block
+    """
+    reset = current_token.set(token)
+    try:
+        yield token
+    finally:
+        current_token.reset(reset)
+
+
+def run_with(token: Optional[Dict], func, *args, **kwargs):
+    """
+    Call func under token (for work handed to another thread)
+    """
+    with scope(token):
+        return func(*args, **kwargs)
+
+
+def is_cancelled() -> bool:
+    """
+    Check whether the current request has been cancelled
+    """
+    token = current_token.get()
+    return token is not None and token['event'].is_set()
+
+
+def check() -> None:
+    """
+    Raise Cancelled if the current request has been cancelled (call before any I/O)
+    """
+    token = current_token.get()
+    if token is not None and token['event'].is_set():
+        metrics.inc("cancelled_calls_total", reason=token['reason'])
+        raise Cancelled(token['reason'])
+
+
+def sleep(seconds: float) -> None:
+    """
+    time.sleep() that wakes up and raises as soon as the request is cancelled
+    """
+    token = current_token.get()
+    if token is None:
+        time.sleep(seconds)
+        return
+    if token['event'].wait(seconds):
+        check()
+
+
+def register_client(client_id: str, token: Dict) -> None:
+    """
+    Track the request a browser tab is waiting on. A new search from the
+    same client supersedes (cancels) the one it had running.
+    """
+    with clients_lock:
+        previous = active_clients.get(client_id)
+        active_clients[client_id] = token
+    if previous is not None and previous is not token:
+        cancel(previous, "superseded")
+
+
+def release_client(client_id: str, token: Dict) -> None:
+    """
+    Forget a client's request once it has finished
+    """
+    with clients_lock:
+        if active_clients.get(client_id) is token:
+            active_clients.pop(client_id)
+
+
+def cancel_client(client_id: str, reason: str = "client_disconnected") -> bool:
+    """
+    Cancel the request a client is waiting on. Returns False if it had none.
+    """
+    with clients_lock:
+        token = active_clients.pop(client_id, None)
+    if token is None:
+        return False
+    cancel(token, reason)
+    return True
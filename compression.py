@@ -0,0 +1,179 @@
+"""
+Response compression and ETags.
+
+Every buffered 200 response gets a strong ETag computed from its body.
+GET/HEAD requests (and the /research lookup) carrying a matching
+If-None-Match header get an empty 304. Text and JSON bodies are then
+compressed with Brotli when the client accepts it, otherwise with gzip
+(`brotli` is in requirements.txt; an install without it falls back to gzip). Compressed bodies are
+memoised by ETag, so repeat responses (the page, cached research, mock
+data) are compressed only once. Streamed responses (batch NDJSON, job
+events, files) pass through untouched.
+
+Bodies that never change (the /mock payload) can be compressed once up
+front with precompress() and served with precompressed_response().
+"""
+import os
+import gzip
+import hashlib
+import threading
+from typing import Optional, Dict, Tuple
+
+from flask import Response
+from werkzeug.http import remove_entity_headers
+
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing (bytes)
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+
+# gzip level (1-9) and Brotli quality (0-11): fast settings, since most bodies are compressed per request
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Compressed bodies kept in memory, by ETag and encoding
+COMPRESSED_CACHE_SIZE = int(os.getenv("COMPRESSED_CACHE_SIZE", "64"))
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'text/html', 'text/plain', 'text/css', 'image/svg+xml'
+)
+
+# POST endpoints that only look data up, so a matching If-None-Match may be answered with 304
+CONDITIONAL_POST_ENDPOINTS = {'research'}
+
+compressed_lock = threading.Lock()
+compressed_bodies: Dict[Tuple[str, str], bytes] = {}
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best encoding the client accepts ('br' or 'gzip'), or None
+    """
+    offered = {}
+    for part in (accept_encoding or "").split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            offered[coding.strip().lower()] = quality
+
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+        if offered.get(coding, offered.get('*', 0.0)) > 0:
+            return coding
+    return None
+
+
+def strong_etag(body: bytes) -> str:
+    """
+    A strong validator for a response body
+    """
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def compress(body: bytes, encoding: str, etag: str) -> bytes:
+    """
+    Compress a body, reusing the result for bodies seen before
+    """
+    key = (etag, encoding)
+    with compressed_lock:
+        cached = compressed_bodies.get(key)
+    if cached is not None:
+        return cached
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+    with compressed_lock:
+        compressed_bodies[key] = compressed
+        while len(compressed_bodies) > COMPRESSED_CACHE_SIZE:
+            compressed_bodies.pop(next(iter(compressed_bodies)))
+    return compressed
+
+
+def not_modified(response):
+    """
+    Turn a response into an empty 304, keeping its validators
+    """
+    response.status_code = 304
+    response.set_data(b'')
+    remove_entity_headers(response.headers)
+    metrics.inc("http_responses_total", encoding="not_modified")
+    return response
+
+
+def finalize_response(request, response):
+    """
+    after_request hook: add an ETag, answer conditional requests with 304 and
+    compress what's left according to the request's Accept-Encoding
+    """
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed \
+            or 'Content-Encoding' in response.headers:
+        return response
+
+    body = response.get_data()
+    etag = response.get_etag()[0] or strong_etag(body)
+    compressible = response.mimetype in COMPRESSIBLE_TYPES and len(body) >= COMPRESS_MIN_SIZE
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding', '')) if compressible else None
+
+    # Each encoding is a different representation, so it gets its own tag
+    response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    if 'Cache-Control' not in response.headers:
+        # Let browsers keep a copy but check it with If-None-Match before reuse
+        response.headers['Cache-Control'] = 'no-cache'
+
+    conditional = request.method in ('GET', 'HEAD') or request.endpoint in CONDITIONAL_POST_ENDPOINTS
+    if conditional and response.get_etag()[0] in request.if_none_match:
+        return not_modified(response)
+
+    if encoding:
+        response.set_data(compress(body, encoding, etag))
+        response.headers['Content-Encoding'] = encoding
+    metrics.inc("http_responses_total", encoding=encoding or "identity")
+    return response
+
+
+def precompress(body: bytes, mimetype: str = 'application/json') -> Dict:
+    """
+    Prepare a fixed body once: its ETag and its bytes in every encoding we can serve,
+    compressed at the highest settings since it only happens at startup
+    """
+    bodies = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body, quality=11)
+    return {'etag': strong_etag(body), 'mimetype': mimetype, 'bodies': bodies}
+
+
+def precompressed_response(request, prepared: Dict):
+    """
+    Serve a precompress()ed body as-is, in the encoding the client prefers
+    """
+    encoding = accepted_encoding(request.headers.get('Accept-Encoding', ''))
+    etag = f"{prepared['etag']}-{encoding}" if encoding else prepared['etag']
+    # direct_passthrough keeps finalize_response from touching the body again
+    response = Response(prepared['bodies'][encoding or 'identity'], mimetype=prepared['mimetype'],
+                        direct_passthrough=True)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-cache'
+    if etag in request.if_none_match:
+        return not_modified(response)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    metrics.inc("http_responses_total", encoding=encoding or "identity")
+    return response
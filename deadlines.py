@@ -0,0 +1,190 @@
+"""
+Per-request latency budgets.
+
+A budget is a total deadline for one research request. Each pipeline stage
+gets a share of it (see STAGE_SHARES); a stage that is still running when its
+time runs out is cancelled and the pipeline continues with a fallback
+(cached values, mock data or an empty section), and the section is recorded
+as partial so the response can say so.
+
+    with deadlines.budget(8) as active:
+        research_investor(name)
+    active['partial']   # {"portfolio": "timeout", ...}
+
+Without a budget, stages run inline exactly as before.
+"""
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Optional, Dict, Callable, Any
+
+import metrics
+import tracing
+import cancellation
+
+current_budget = contextvars.ContextVar("current_budget", default=None)
+
+# Default total deadline for /research (seconds), kept under the 30 s Heroku router timeout; 0 disables it
+RESEARCH_DEADLINE = float(os.getenv("RESEARCH_DEADLINE", "25"))
+
+# Share of the total budget reserved for each stage, in pipeline order. A stage
+# may use whatever is left minus what the later stages have reserved, so time
+# saved early goes to later stages; stages not listed here count as last.
+STAGE_SHARES = (
+    ('lookup', 0.3),
+    ('portfolio', 0.25),
+    ('content', 0.2),
+    ('insights', 0.25),
+)
+
+# Threads that run stages under a budget (an overrun stage holds its thread until its next cancellation check)
+DEADLINE_STAGE_WORKERS = int(os.getenv("DEADLINE_STAGE_WORKERS", "32"))
+
+stage_executor = ThreadPoolExecutor(max_workers=DEADLINE_STAGE_WORKERS, thread_name_prefix="stage")
+
+
+def set_stage_workers(count: int) -> None:
+    """
+    Resize the stage thread pool (asgi.py sizes it for its request threads).
+    Stages already running finish on the old pool.
+    """
+    global stage_executor
+    previous = stage_executor
+    stage_executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="stage")
+    previous.shutdown(wait=False)
+
+
+def new_budget(seconds: float) -> Dict:
+    """
+    Create a budget that expires seconds from now
+    """
+    start = time.perf_counter()
+    return {
+        'total': seconds,
+        'start': start,
+        'expires_at': start + seconds,
+        'partial': {},
+        'lock': threading.Lock()
+    }
+
+
+@contextmanager
+def budget(seconds: Optional[float]):
+    """
+    Run the block under a total deadline of seconds. With seconds=None (or 0)
+    the block runs under the enclosing budget, if any, or none at all.
+    """
+    if not seconds:
+        yield current_budget.get()
+        return
+
+    active = new_budget(seconds)
+    token = current_budget.set(active)
+    try:
+        yield active
+    finally:
+        current_budget.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left in the current budget, or None if there is no budget
+    """
+    active = current_budget.get()
+    if active is None:
+        return None
+    return max(0.0, active['expires_at'] - time.perf_counter())
+
+
+def stage_timeout(stage: str) -> Optional[float]:
+    """
+    How long a stage may run: the time remaining minus what later stages have reserved
+    """
+    active = current_budget.get()
+    if active is None:
+        return None
+    names = [name for name, _ in STAGE_SHARES]
+    later = STAGE_SHARES[names.index(stage) + 1:] if stage in names else ()
+    reserved = active['total'] * sum(share for _, share in later)
+    return max(0.0, remaining() - reserved)
+
+
+def mark_partial(section: str, reason: str) -> None:
+    """
+    Record that a section of the response was degraded (timeout, skipped, ...)
+    """
+    active = current_budget.get()
+    if active is None:
+        return
+    with active['lock']:
+        active['partial'][section] = reason
+    metrics.inc("deadline_degraded_total", section=section, reason=reason)
+    tracing.record_instant(f"partial: {section}", "deadline", {'section': section, 'reason': reason})
+
+
+def start_stage(func: Callable[[], Any]):
+    """
+    Run func on a stage thread under its own cancellation token, so it can be
+    stopped at its next I/O boundary if it is abandoned
+    """
+    token = cancellation.new_token(cancellation.current_token.get())
+    future = stage_executor.submit(tracing.bind(cancellation.run_with), token, func)
+    return future, token
+
+
+def run_stage(stage: str, func: Callable[[], Any], fallback: Callable[[], Any], sections=None) -> Any:
+    """
+    Run func within the stage's share of the budget. If it doesn't finish in time,
+    return fallback() and mark the stage's sections (default: the stage itself) partial.
+    """
+    timeout = stage_timeout(stage)
+    if timeout is None:
+        return func()
+
+    sections = sections or [stage]
+    if timeout <= 0:
+        for section in sections:
+            mark_partial(section, "skipped")
+        return fallback()
+
+    future, token = start_stage(func)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        print(f"⏱️ {stage} ran past its {timeout:.1f}s budget; continuing with partial data")
+        cancellation.cancel(token, "deadline")
+        for section in sections:
+            mark_partial(section, "timeout")
+        return fallback()
+
+
+def run_parallel(stage: str, tasks: Dict[str, Callable[[], Any]], fallbacks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """
+    Run independent fetches for a stage. Under a budget they run concurrently and
+    any still running when the stage's share is used up fall back and are marked
+    partial; without one they run inline, one after another.
+    """
+    timeout = stage_timeout(stage)
+    if timeout is None:
+        return {name: task() for name, task in tasks.items()}
+
+    if timeout <= 0:
+        for name in tasks:
+            mark_partial(name, "skipped")
+        return {name: fallbacks[name]() for name in tasks}
+
+    started = {name: start_stage(task) for name, task in tasks.items()}
+    wait_until = time.perf_counter() + timeout
+    results = {}
+    for name, (future, token) in started.items():
+        try:
+            results[name] = future.result(timeout=max(0.0, wait_until - time.perf_counter()))
+        except FutureTimeout:
+            print(f"⏱️ {name} ran past the {stage} budget; continuing without it")
+            cancellation.cancel(token, "deadline")
+            mark_partial(name, "timeout")
+            results[name] = fallbacks[name]()
+    return results
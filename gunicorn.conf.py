@@ -0,0 +1,38 @@
+"""
+gunicorn settings (the Procfile runs `gunicorn app:app`, which loads this file).
+
+With preload_app the master imports the app and runs warmup.warm_up()
+before forking, so the workers share the SDKs, prompts, mock data and
+compiled regexes copy-on-write instead of each importing them on its first
+request. Background threads (the pre-warm scheduler) don't survive a fork,
+so they are started in each worker by post_fork.
+"""
+import os
+
+# Address to listen on (Heroku-style $PORT)
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+# Worker processes and threads per worker
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Research requests can run for minutes
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "300"))
+
+# Set GUNICORN_PRELOAD=0 to import the app in each worker instead of once in the master
+preload_app = os.getenv("GUNICORN_PRELOAD", "1").lower() in ("1", "true", "yes")
+
+# Tells app.py to leave background threads to post_fork
+os.environ["GUNICORN_PRELOAD"] = "1" if preload_app else "0"
+
+
+def when_ready(server):
+    if preload_app:
+        import warmup
+        warmup.warm_up(freeze=True)
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import app
+        app.start_background_threads()
@@ -1,35 +1,92 @@
 from dotenv import load_dotenv
-from langchain.prompts.prompt import PromptTemplate
-from langchain_groq import ChatGroq
-from typing import Tuple, List
+from typing import List, Optional, Callable
 import os
 import time
 import random
-from output_parsers import InvestorProfile, PortfolioCompany, InvestmentInsights, insights_parser
+import re
+import importlib
+import metrics
+import cancellation
+import research_cache
+import deadlines
+from provider_budgets import provider_slot
+from output_parsers import (
+    InvestorProfile, PortfolioCompany, InvestmentInsights, ResearchResult,
+    get_insights_parser, get_insights_format_instructions
+)
 from agents.investor_lookup_agent import lookup as investor_lookup_agent
-from agents.portfolio_agent import discover_portfolio
+from agents.portfolio_agent import discover_portfolio, get_mock_portfolio_for_investor
 from agents.content_agent import aggregate_content
 from third_parties.twitter import fetch_recent_tweets
 from third_parties.linkedin import fetch_linkedin_posts
 from third_parties.medium import fetch_medium_articles
 from third_parties.crunchbase import fetch_portfolio_data
 from third_parties.news import fetch_investor_news
+from tools import search_planner
+
+
+# Quick access investors (mock data available)
+QUICK_ACCESS_INVESTORS = ["Marc Andreessen", "Mark Cuban", "Peter Thiel", "Paul Tudor Jones", "Cathie Wood"]
+
+# Markers of a quoted statement in a search snippet
+QUOTE_PATTERN = re.compile(r'["“”]|\b(?:said|says|told|according to)\b', re.IGNORECASE)
+
+# Quotes found in the shared search results that make the dedicated quote searches unnecessary
+POOLED_QUOTES_MIN = int(os.getenv("POOLED_QUOTES_MIN", "3"))
+
+# SDKs the pipeline imports when their stage first runs, so web workers boot without them
+LAZY_SDK_MODULES = (
+    "langchain_core.messages",
+    "langchain_core.output_parsers",
+    "langchain.prompts.prompt",
+    "langchain_groq",
+    "langchain_google_genai",
+    "langchain.agents",
+    "langchain_tavily",
+    "bs4",
+    "cloudinary.uploader",
+    "cloudinary.api",
+)
+
+
+def preload_sdks() -> None:
+    """
+    Import the lazily loaded SDKs now (benchmarks, or before forking workers)
+    """
+    for module in LAZY_SDK_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            print(f"Could not preload {module}: {e}")
 
 
 def rate_limited_llm_call(llm, prompt, max_retries=3):
     """
-    Make a rate-limited LLM call with exponential backoff
+    Make a rate-limited LLM call with exponential backoff.
+    Answers are cached per model and prompt, so identical prompts skip the API.
     """
+    cached = research_cache.get_llm_response(llm, prompt)
+    if cached is not None:
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=cached)
+
     for attempt in range(max_retries):
         try:
             # Add a small delay before each call
-            time.sleep(random.uniform(0.5, 1.5))
-            return llm.invoke(prompt)
+            cancellation.sleep(random.uniform(0.5, 1.5))
+            with provider_slot(metrics.llm_provider(llm)), \
+                    metrics.external_call(metrics.llm_provider(llm), "invoke") as call:
+                response = llm.invoke(prompt)
+                call['bytes_sent'] = len(str(prompt))
+                call['bytes'] = len(str(getattr(response, 'content', '')))
+            research_cache.store_llm_response(llm, prompt, response.content)
+            return response
         except Exception as e:
             if "429" in str(e) or "rate_limit" in str(e).lower():
+                metrics.inc("api_retries_total", provider=metrics.llm_provider(llm))
                 wait_time = (2 ** attempt) + random.uniform(0, 1)
                 print(f"Rate limit hit, waiting {wait_time:.2f} seconds before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
+                cancellation.sleep(wait_time)
                 if attempt == max_retries - 1:
                     print("Max retries exceeded, skipping this request")
                     raise e
@@ -38,13 +95,21 @@ def rate_limited_llm_call(llm, prompt, max_retries=3):
     return None
 
 
+def is_quote_about(content: str, investor_name: str) -> bool:
+    """
+    Whether a search snippet looks like it quotes the investor
+    """
+    last_name = investor_name.split()[-1].lower() if investor_name.split() else ""
+    return bool(last_name) and last_name in content.lower() and bool(QUOTE_PATTERN.search(content))
+
+
+@metrics.timed()
 def search_investor_quotes(investor_name: str) -> List[dict]:
     """
     Search specifically for quotes from the investor.
     """
     try:
-        from langchain_tavily import TavilySearch
-        search = TavilySearch()
+        from tools.search_tools import tavily_search
         
         # Search specifically for quotes
         search_queries = [
@@ -53,10 +118,23 @@ def search_investor_quotes(investor_name: str) -> List[dict]:
             f'"{investor_name}" famous quotes technology'
         ]
         
+        # Snippets quoting the investor in the query planner's shared results (the news
+        # search) usually make the quote searches unnecessary
         quotes = []
+        if search_planner.broad_search('news') is not None:
+            for item in search_planner.pooled_results():
+                content = item.get('content', '')
+                if content and is_quote_about(content, investor_name):
+                    quotes.append({"text": content[:500], "source": "web"})
+            quotes = quotes[:6]
+            if len(quotes) >= POOLED_QUOTES_MIN:
+                print(f"Found {len(quotes)} quotes in shared search results")
+                return quotes
+            search_planner.record_follow_up("quotes")
+        
         for query in search_queries[:2]:  # Limit to avoid API limits
             try:
-                results = search.run(query)
+                results = tavily_search(query, query_class="quotes")
                 if isinstance(results, dict) and 'results' in results:
                     for item in results['results'][:3]:
                         content = item.get('content', '')
@@ -71,88 +149,238 @@ def search_investor_quotes(investor_name: str) -> List[dict]:
         return []
 
 
-def research_investor(name: str) -> Tuple[InvestorProfile, List[PortfolioCompany], InvestmentInsights, List[dict]]:
+def cached_section(name: str, section: str, default):
     """
-    Main orchestration function that researches an investor and returns comprehensive insights.
+    A section of the last cached research payload for an investor (deadline fallback)
+    """
+    cached = research_cache.get_research(name) or {}
+    return cached.get(section) or default
+
+
+def lookup_from_profile(name: str, profile: dict) -> dict:
+    """
+    Turn a payload's profile section back into the investor lookup format
+    """
+    return {
+        "name": profile.get("name", name),
+        "firm": profile.get("firm", ""),
+        "title": profile.get("title", ""),
+        "bio": profile.get("bio", ""),
+        "urls": profile.get("profile_urls", {}),
+        "image": profile.get("profile_image", "")
+    }
+
+
+def fallback_profile(name: str) -> dict:
+    """
+    Lookup result to use when the profile lookup runs out of time
+    """
+    return lookup_from_profile(name, cached_section(name, "profile", {}))
+
+
+def investment_value(value) -> float:
+    """
+    Investment amount as a number (the LLM sometimes returns text or null)
+    """
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def portfolio_from_data(portfolio_data: List[dict]) -> List[PortfolioCompany]:
+    """
+    Build portfolio company records from discovered (or cached) company dicts.
+    This is where outside data enters the pipeline, so fields are normalized here.
     """
-    
-    # Quick access investors (mock data available)
-    quick_access_investors = ["Marc Andreessen", "Mark Cuban", "Peter Thiel", "Paul Tudor Jones", "Cathie Wood"]
-    use_mock_data = name in quick_access_investors
-    
-    # Step 1: Find investor profiles across platforms
-    print(f"Searching for investor profiles for: {name}")
-    investor_profiles = investor_lookup_agent(name=name, use_mock=use_mock_data)
-    
-    # Add delay between steps to prevent rate limiting
-    time.sleep(1)
-    
-    # Step 2: Build investor profile
-    profile = InvestorProfile(
-        name=investor_profiles.get("name", name),
-        firm=investor_profiles.get("firm", ""),
-        title=investor_profiles.get("title", ""),
-        bio=investor_profiles.get("bio", ""),
-        profile_urls=investor_profiles.get("urls", {}),
-        profile_image=investor_profiles.get("image", "")
-    )
-    
-    # Step 3: Fetch portfolio companies
-    print("Discovering portfolio companies...")
-    time.sleep(1)  # Add delay before API-heavy operation
-    portfolio_data = discover_portfolio(investor_profiles, use_mock=use_mock_data)
     portfolio = []
-    
     for company_data in portfolio_data:
         # Ensure required fields have default values (empty strings)
         portfolio.append(PortfolioCompany(
-            name=company_data.get("name", ""),
-            sector=company_data.get("sector", ""),
+            name=company_data.get("name") or "",
+            sector=company_data.get("sector") or "",
             stage=company_data.get("stage") or "",  # Use 'or' to handle None
             investment_date=company_data.get("date") or company_data.get("investment_date") or "",  # Check both possible keys
-            description=company_data.get("description", ""),
-            investment_value=company_data.get("investment_value", 0),
-            website=company_data.get("website", ""),
-            stock_symbol=company_data.get("stock_symbol", ""),
-            yahoo_finance_url=company_data.get("yahoo_finance_url", "")
+            description=company_data.get("description") or "",
+            investment_value=investment_value(company_data.get("investment_value")),
+            website=company_data.get("website") or "",
+            stock_symbol=company_data.get("stock_symbol") or "",
+            yahoo_finance_url=company_data.get("yahoo_finance_url") or ""
         ))
-    
-    # Step 4: Aggregate recent content
-    print("Aggregating recent social media content...")
-    tweets = fetch_recent_tweets(investor_profiles.get("urls", {}).get("twitter", ""), mock=use_mock_data, investor_name=name)
-    linkedin_posts = fetch_linkedin_posts(investor_profiles.get("urls", {}).get("linkedin", ""), mock=use_mock_data)
-    # Pass investor name to get articles ABOUT them, not BY them
-    medium_articles = fetch_medium_articles(
-        investor_profiles.get("urls", {}).get("medium", ""), 
-        mock=use_mock_data,
-        investor_name=name
+    return portfolio
+
+
+def fallback_insights(name: str) -> InvestmentInsights:
+    """
+    Insights to use when the LLM runs out of time: the cached ones, or empty sections
+    """
+    cached = cached_section(name, "insights", None)
+    if cached:
+        return InvestmentInsights(**cached)
+    return InvestmentInsights(
+        investment_themes=[], sector_focus=[], stage_preference="", recent_deals=[],
+        investment_thesis="", notable_quotes=[], icebreakers=[]
     )
+
+
+@metrics.timed()
+def research_investor(name: str, pace: bool = True,
+                      progress: Optional[Callable[[str, dict], None]] = None,
+                      deadline: Optional[float] = None,
+                      allow_mock: bool = True) -> ResearchResult:
+    """
+    Main orchestration function that researches an investor and returns comprehensive insights,
+    along with all the content gathered for them (each source is fetched once).
+    pace=False skips the fixed pauses between steps; batch runs rely on the provider budgets instead.
+    progress, if given, is called as progress(step, partial_payload) after each step finishes
+    (background jobs use it to publish partial results; it may raise to stop the research).
+    deadline (seconds) caps the whole run: stages that overrun their share of it are replaced
+    by cached values, mock data or empty sections (see deadlines.py).
+    allow_mock=False fetches real data even for the quick access investors (cache pre-warming).
+    """
+    report = progress or (lambda step, partial: None)
     
-    # Step 5: Fetch latest news
-    print("Fetching latest news...")
-    news = fetch_investor_news(name, limit=5, use_mock=use_mock_data)
-    
-    # Step 5b: Search for investor quotes if tweets are empty
-    print("Searching for investor quotes...")
-    investor_quotes = search_investor_quotes(name) if not tweets else []
+    # Consumers share a few broad Tavily searches instead of each sending their own (see tools/search_planner.py)
+    with deadlines.budget(deadline), search_planner.pool(name):
+        # The fixed pauses would eat most of a deadline
+        pace = pace and deadlines.remaining() is None
+        
+        use_mock_data = allow_mock and name in QUICK_ACCESS_INVESTORS
+        
+        # Step 1: Find investor profiles across platforms
+        print(f"Searching for investor profiles for: {name}")
+        investor_profiles = deadlines.run_stage(
+            "lookup",
+            lambda: investor_lookup_agent(name=name, use_mock=use_mock_data),
+            lambda: fallback_profile(name),
+            sections=["profile"]
+        )
+        
+        # Add delay between steps to prevent rate limiting
+        if pace:
+            cancellation.sleep(1)
+        
+        # Step 2: Build investor profile
+        profile = InvestorProfile(
+            name=investor_profiles.get("name", name),
+            firm=investor_profiles.get("firm", ""),
+            title=investor_profiles.get("title", ""),
+            bio=investor_profiles.get("bio", ""),
+            profile_urls=investor_profiles.get("urls", {}),
+            profile_image=investor_profiles.get("image", "")
+        )
+        report("profile", {"profile": profile.to_dict()})
+        search_planner.set_firm(profile.firm)
+        
+        # Step 3: Fetch portfolio companies
+        print("Discovering portfolio companies...")
+        if pace:
+            cancellation.sleep(1)  # Add delay before API-heavy operation
+        portfolio_data = deadlines.run_stage(
+            "portfolio",
+            lambda: discover_portfolio(investor_profiles, use_mock=use_mock_data),
+            lambda: cached_section(name, "portfolio", None) or get_mock_portfolio_for_investor(name)
+        )
+        portfolio = portfolio_from_data(portfolio_data)
+        report("portfolio", {"portfolio": [company.to_dict() for company in portfolio]})
+        
+        urls = investor_profiles.get("urls", {})
+        
+        def fetch_tweets_or_quotes():
+            tweets = fetch_recent_tweets(urls.get("twitter", ""), mock=use_mock_data, investor_name=name)
+            # Step 5b: Search for investor quotes if tweets are empty
+            if tweets:
+                return tweets, []
+            print("Searching for investor quotes...")
+            return tweets, search_investor_quotes(name)
+        
+        # Steps 4-5: Aggregate recent content and fetch latest news
+        print("Aggregating recent social media content and news...")
+        content = deadlines.run_parallel(
+            "content",
+            {
+                "tweets": fetch_tweets_or_quotes,
+                "linkedin_posts": lambda: fetch_linkedin_posts(urls.get("linkedin", ""), mock=use_mock_data),
+                # Pass investor name to get articles ABOUT them, not BY them
+                "medium_articles": lambda: fetch_medium_articles(urls.get("medium", ""), mock=use_mock_data, investor_name=name),
+                "news": lambda: fetch_investor_news(name, limit=5, use_mock=use_mock_data),
+            },
+            {
+                "tweets": lambda: ([], []),
+                "linkedin_posts": lambda: [],
+                "medium_articles": lambda: cached_section(name, "medium_articles", []),
+                "news": lambda: cached_section(name, "news", []),
+            }
+        )
+        tweets, investor_quotes = content["tweets"]
+        linkedin_posts = content["linkedin_posts"]
+        medium_articles = content["medium_articles"]
+        news = content["news"]
+        report("news", {"news": news, "medium_articles": medium_articles})
+        
+        # Step 6: Generate AI insights
+        print("Generating investment insights...")
+        if pace:
+            cancellation.sleep(2)  # Longer delay before final AI processing
+        # Combine tweets with quote search results if tweets are empty
+        enhanced_tweets = tweets if tweets else investor_quotes
+        insights = deadlines.run_stage(
+            "insights",
+            lambda: generate_investment_insights(
+                profile=profile,
+                portfolio=portfolio,
+                tweets=enhanced_tweets,  # Use enhanced tweets
+                linkedin_posts=linkedin_posts,
+                medium_articles=medium_articles,
+                news=news  # Pass news for quote extraction
+            ),
+            lambda: fallback_insights(name)
+        )
+        report("insights", {"insights": insights.to_dict()})
     
-    # Step 6: Generate AI insights
-    print("Generating investment insights...")
-    time.sleep(2)  # Longer delay before final AI processing
-    # Combine tweets with quote search results if tweets are empty
-    enhanced_tweets = tweets if tweets else investor_quotes
-    insights = generate_investment_insights(
+    return ResearchResult(
         profile=profile,
         portfolio=portfolio,
-        tweets=enhanced_tweets,  # Use enhanced tweets
-        linkedin_posts=linkedin_posts,
+        insights=insights,
+        news=news,
         medium_articles=medium_articles,
-        news=news  # Pass news for quote extraction
+        tweets=tweets,
+        investor_quotes=investor_quotes,
+        linkedin_posts=linkedin_posts,
+        lookup=investor_profiles
     )
-    
-    return profile, portfolio, insights, news
 
 
+def build_research_payload(name: str, pace: bool = True,
+                           progress: Optional[Callable[[str, dict], None]] = None,
+                           deadline: Optional[float] = None,
+                           allow_mock: bool = True) -> dict:
+    """
+    Research an investor and build the JSON payload served by /research.
+    Raises on failure; callers decide how to report the error.
+    With a deadline, sections that ran out of time are listed under "partial_sections".
+    """
+    with deadlines.budget(deadline) as active:
+        result = research_investor(name=name, pace=pace, progress=progress, allow_mock=allow_mock)
+
+    payload = {
+        "success": True,
+        "profile": result.profile.to_dict(),
+        "portfolio": [company.to_dict() for company in result.portfolio],
+        "insights": result.insights.to_dict(),
+        "medium_articles": result.medium_articles,
+        "news": result.news,
+        "fetched_at": time.time()
+    }
+    if allow_mock and name in QUICK_ACCESS_INVESTORS:
+        payload["mock"] = True
+    if active is not None:
+        payload["partial"] = bool(active['partial'])
+        payload["partial_sections"] = dict(active['partial'])
+    return payload
+
+
+@metrics.timed()
 def generate_investment_insights(
     profile: InvestorProfile,
     portfolio: List[PortfolioCompany],
@@ -223,10 +451,14 @@ def generate_investment_insights(
     {format_instructions}
     """
     
+    # Loaded here rather than at import so the web process starts without the LangChain/Groq SDKs
+    from langchain.prompts.prompt import PromptTemplate
+    from langchain_groq import ChatGroq
+    
     prompt_template = PromptTemplate(
         input_variables=["investor_name", "firm", "portfolio", "tweets", "posts", "articles", "news"],
         template=insights_template,
-        partial_variables={"format_instructions": insights_parser.get_format_instructions()}
+        partial_variables={"format_instructions": get_insights_format_instructions()}
     )
     
     llm = ChatGroq(
@@ -247,7 +479,8 @@ def generate_investment_insights(
     
     # Make rate-limited call
     response = rate_limited_llm_call(llm, formatted_prompt)
-    insights = insights_parser.parse(response.content)
+    with metrics.span("parse_insights"):
+        insights = get_insights_parser().parse(response.content)
     
     return insights
 
@@ -256,4 +489,4 @@ if __name__ == "__main__":
     load_dotenv()
     
     print("Investor Research Assistant")
-    profile, portfolio, insights, news = research_investor(name="Marc Andreessen")
\ No newline at end of file
+    result = research_investor(name="Marc Andreessen")
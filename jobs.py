@@ -0,0 +1,310 @@
+"""
+Background research jobs backed by a local SQLite queue.
+
+POST /jobs stores a job and returns its ID straight away; worker threads
+claim queued jobs, run the research and publish partial results after each
+step (profile, portfolio, news, insights), so a slow investor no longer
+hits the 30 s router timeout. Failed jobs are retried with backoff, jobs
+can be cancelled while queued or running, and finished results are written
+to the research cache.
+
+Workers start inside the web process on first use. To run extra workers
+on the same machine:
+
+    python jobs.py --workers 4
+"""
+import os
+import sys
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+from typing import Optional, Dict, List
+
+from dotenv import load_dotenv
+
+import metrics
+import research_cache
+import serialization
+import cancellation
+
+load_dotenv()
+
+JOBS_DB_PATH = os.getenv(
+    "JOBS_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "jobs.db")
+)
+
+# Worker threads started in each web process (0 = only standalone workers run jobs)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Attempts per job before it is marked failed, and the first retry delay (doubles each time)
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_DELAY = float(os.getenv("JOB_RETRY_DELAY", "5"))
+
+# A running job with no progress for this long is assumed to have lost its worker (seconds)
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "600"))
+
+# How long idle workers wait between queue polls (seconds)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+connections = threading.local()
+workers_lock = threading.Lock()
+worker_threads: List[threading.Thread] = []
+queue_wakeup = threading.Event()
+
+# Cancellation tokens of the jobs running in this process, by job ID
+running_tokens: Dict[str, Dict] = {}
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested"""
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Open (once per thread) the jobs database, creating the table if needed
+    """
+    connection = getattr(connections, 'connection', None)
+    if connection is None:
+        os.makedirs(os.path.dirname(JOBS_DB_PATH) or '.', exist_ok=True)
+        connection = sqlite3.connect(JOBS_DB_PATH, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, investor_name TEXT NOT NULL, status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+            " step TEXT, partial TEXT, result TEXT, error TEXT, cancel_requested INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL, run_after REAL NOT NULL,"
+            " started_at REAL, finished_at REAL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, run_after)")
+        connections.connection = connection
+    return connection
+
+
+def job_to_dict(row: sqlite3.Row) -> Dict:
+    """
+    Public view of a job row
+    """
+    job = {
+        'job_id': row['id'],
+        'investor_name': row['investor_name'],
+        'status': row['status'],
+        'step': row['step'],
+        'attempts': row['attempts'],
+        'max_attempts': row['max_attempts'],
+        'error': row['error'],
+        'cancel_requested': bool(row['cancel_requested']),
+        'created_at': row['created_at'],
+        'updated_at': row['updated_at'],
+        'started_at': row['started_at'],
+        'finished_at': row['finished_at'],
+        'partial': serialization.loads(row['partial']) if row['partial'] else {},
+    }
+    if row['result']:
+        job['result'] = serialization.loads(row['result'])
+    return job
+
+
+def submit_job(investor_name: str, max_attempts: int = JOB_MAX_ATTEMPTS) -> Dict:
+    """
+    Queue a research job and return it
+    """
+    now = time.time()
+    job_id = uuid.uuid4().hex
+    get_connection().execute(
+        "INSERT INTO jobs (id, investor_name, status, max_attempts, created_at, updated_at, run_after)"
+        " VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+        (job_id, investor_name, max_attempts, now, now, now)
+    )
+    metrics.inc("jobs_total", event="submitted")
+    queue_wakeup.set()
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> Optional[Dict]:
+    """
+    Return a job, or None if there is no such job
+    """
+    row = get_connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return job_to_dict(row) if row else None
+
+
+def cancel_job(job_id: str) -> Optional[Dict]:
+    """
+    Cancel a job. Queued jobs stop at once; running jobs stop at their next I/O
+    boundary (or after their current step when run by another process).
+    """
+    now = time.time()
+    connection = get_connection()
+    connection.execute(
+        "UPDATE jobs SET status = 'cancelled', cancel_requested = 1, finished_at = ?, updated_at = ?"
+        " WHERE id = ? AND status = 'queued'",
+        (now, now, job_id)
+    )
+    connection.execute(
+        "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = 'running'",
+        (now, job_id)
+    )
+    token = running_tokens.get(job_id)
+    if token is not None:
+        cancellation.cancel(token, "job_cancelled")
+    return get_job(job_id)
+
+
+def claim_next_job() -> Optional[Dict]:
+    """
+    Atomically move the oldest due job from queued to running and return it
+    """
+    connection = get_connection()
+    now = time.time()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        # Jobs whose worker died mid-run go back to the queue
+        connection.execute(
+            "UPDATE jobs SET status = 'queued', run_after = ? WHERE status = 'running' AND updated_at < ?",
+            (now, now - JOB_STALE_AFTER)
+        )
+        row = connection.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY run_after LIMIT 1", (now,)
+        ).fetchone()
+        if row is None:
+            connection.execute("COMMIT")
+            return None
+        connection.execute(
+            "UPDATE jobs SET status = 'running', attempts = attempts + 1, error = NULL,"
+            " started_at = ?, updated_at = ? WHERE id = ?",
+            (now, now, row['id'])
+        )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    return get_job(row['id'])
+
+
+def record_progress(job_id: str, step: str, partial: Dict) -> None:
+    """
+    Save a partial result after a research step; raises JobCancelled if the job was cancelled
+    """
+    connection = get_connection()
+    row = connection.execute("SELECT partial, cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None or row['cancel_requested']:
+        raise JobCancelled(job_id)
+    merged = dict(serialization.loads(row['partial']) if row['partial'] else {}, **partial)
+    connection.execute(
+        "UPDATE jobs SET step = ?, partial = ?, updated_at = ? WHERE id = ?",
+        (step, serialization.dumps(merged), time.time(), job_id)
+    )
+
+
+def finish_job(job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+    """
+    Mark a job finished (succeeded, failed or cancelled)
+    """
+    now = time.time()
+    get_connection().execute(
+        "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+        (status, serialization.dumps(result) if result is not None else None, error, now, now, job_id)
+    )
+    metrics.inc("jobs_total", event=status)
+
+
+def retry_job(job: Dict, error: str) -> None:
+    """
+    Put a failed job back in the queue with exponential backoff, or fail it for good
+    """
+    if job['attempts'] >= job['max_attempts']:
+        print(f"❌ Job {job['job_id']} ({job['investor_name']}) failed after {job['attempts']} attempts: {error}")
+        finish_job(job['job_id'], "failed", error=error)
+        return
+
+    delay = JOB_RETRY_DELAY * (2 ** (job['attempts'] - 1))
+    print(f"🔁 Job {job['job_id']} ({job['investor_name']}) failed, retrying in {delay:.0f}s: {error}")
+    now = time.time()
+    get_connection().execute(
+        "UPDATE jobs SET status = 'queued', error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+        (error, now + delay, now, job['job_id'])
+    )
+    metrics.inc("jobs_total", event="retried")
+
+
+def run_job(job: Dict) -> None:
+    """
+    Research the job's investor, publishing partial results as each step finishes
+    """
+    from investor_research import build_research_payload
+
+    job_id = job['job_id']
+    print(f"🏃 Job {job_id}: researching {job['investor_name']} (attempt {job['attempts']})")
+    token = running_tokens[job_id] = cancellation.new_token()
+    try:
+        with cancellation.scope(token), metrics.span("research_job"):
+            payload = build_research_payload(
+                job['investor_name'],
+                progress=lambda step, partial: record_progress(job_id, step, partial)
+            )
+        research_cache.store_research(job['investor_name'], payload)
+        finish_job(job_id, "succeeded", result=payload)
+        print(f"✅ Job {job_id} finished")
+    except (JobCancelled, cancellation.Cancelled):
+        print(f"🛑 Job {job_id} cancelled")
+        finish_job(job_id, "cancelled")
+    except Exception as e:
+        retry_job(job, str(e))
+    finally:
+        running_tokens.pop(job_id, None)
+
+
+def worker_loop(stop: Optional[threading.Event] = None) -> None:
+    """
+    Claim and run jobs until stop is set
+    """
+    while stop is None or not stop.is_set():
+        try:
+            job = claim_next_job()
+        except Exception as e:
+            print(f"Job queue error: {e}")
+            job = None
+
+        if job is None:
+            queue_wakeup.wait(JOB_POLL_INTERVAL)
+            queue_wakeup.clear()
+            continue
+        run_job(job)
+
+
+def start_workers(count: int = JOB_WORKERS) -> None:
+    """
+    Start in-process worker threads (idempotent)
+    """
+    with workers_lock:
+        alive = [thread for thread in worker_threads if thread.is_alive()]
+        for index in range(len(alive), count):
+            thread = threading.Thread(target=worker_loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            alive.append(thread)
+        worker_threads[:] = alive
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run background research job workers")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1))
+    args = parser.parse_args(argv)
+
+    print(f"👷 Running {args.workers} job workers on {JOBS_DB_PATH}")
+    start_workers(args.workers)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        print("\nStopping job workers")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
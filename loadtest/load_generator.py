@@ -0,0 +1,216 @@
+"""
+Open-loop load generator for /research.
+
+Sends requests at a fixed target rate (independent of how fast the server
+answers) and reports throughput, p50/p95/p99 latency and error rates.
+Several rates can be given to step the load up and find where a single
+dyno stops keeping up.
+
+    python loadtest/load_generator.py --url http://localhost:5001 --rps 0.5,1,2 --duration 60
+    python loadtest/load_generator.py --spawn-stubs --rps 1,2,4    # start the app and stand-ins locally
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+
+LOADTEST_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(LOADTEST_DIR)
+
+DEFAULT_INVESTORS = [
+    "Naval Ravikant", "Reid Hoffman", "Fred Wilson", "Bill Gurley", "Keith Rabois",
+    "Elad Gil", "Sarah Guo", "Mary Meeker", "Chamath Palihapitiya", "Aileen Lee",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of numbers
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def send_research(url: str, investor_name: str, timeout: float) -> Dict:
+    """
+    POST one research request and time it
+    """
+    start = time.perf_counter()
+    try:
+        response = requests.post(f"{url}/research", data={"investor_name": investor_name}, timeout=timeout)
+        elapsed = time.perf_counter() - start
+        try:
+            success = bool(response.json().get("success"))
+        except ValueError:
+            success = False
+        return {'latency': elapsed, 'status': response.status_code, 'ok': response.status_code == 200 and success}
+    except requests.Timeout:
+        return {'latency': time.perf_counter() - start, 'status': 'timeout', 'ok': False}
+    except requests.RequestException as e:
+        return {'latency': time.perf_counter() - start, 'status': type(e).__name__, 'ok': False}
+
+
+def run_stage(url: str, rps: float, duration: float, investors: List[str], timeout: float,
+              max_in_flight: int) -> Dict:
+    """
+    Drive /research at rps for duration seconds and summarize the results
+    """
+    results = []
+    results_lock = threading.Lock()
+    in_flight = [0]
+    peak_in_flight = [0]
+    dropped = [0]
+
+    def worker(investor_name):
+        result = send_research(url, investor_name, timeout)
+        with results_lock:
+            results.append(result)
+            in_flight[0] -= 1
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="load")
+    start = time.perf_counter()
+    sent = 0
+    while True:
+        # Schedule by wall clock so slow responses don't lower the offered load
+        due = start + sent / rps
+        now = time.perf_counter()
+        if due - start >= duration:
+            break
+        if due > now:
+            time.sleep(due - now)
+        with results_lock:
+            if in_flight[0] >= max_in_flight:
+                dropped[0] += 1
+                sent += 1
+                continue
+            in_flight[0] += 1
+            peak_in_flight[0] = max(peak_in_flight[0], in_flight[0])
+        executor.submit(worker, random.choice(investors))
+        sent += 1
+    executor.shutdown(wait=True)
+    elapsed = time.perf_counter() - start
+
+    latencies = [r['latency'] for r in results if r['ok']]
+    errors = {}
+    for r in results:
+        if not r['ok']:
+            errors[str(r['status'])] = errors.get(str(r['status']), 0) + 1
+
+    return {
+        'target_rps': rps,
+        'sent': sent,
+        'completed': len(results),
+        'succeeded': len(latencies),
+        'dropped': dropped[0],
+        'throughput_rps': round(len(latencies) / elapsed, 3) if elapsed else 0.0,
+        'error_rate': round(1 - len(latencies) / len(results), 3) if results else 0.0,
+        'errors': errors,
+        'p50_s': round(percentile(latencies, 50), 3),
+        'p95_s': round(percentile(latencies, 95), 3),
+        'p99_s': round(percentile(latencies, 99), 3),
+        'peak_in_flight': peak_in_flight[0],
+        'elapsed_s': round(elapsed, 1),
+    }
+
+
+def print_stage(stage: Dict) -> None:
+    errors = ", ".join(f"{status}: {count}" for status, count in stage['errors'].items()) or "-"
+    print(f"{stage['target_rps']:>8.2f}{stage['throughput_rps']:>10.2f}{stage['p50_s']:>9.2f}{stage['p95_s']:>9.2f}"
+          f"{stage['p99_s']:>9.2f}{stage['error_rate']:>8.1%}{stage['peak_in_flight']:>7}{stage['dropped']:>8}  {errors}")
+
+
+def spawn_local_stack(port: int, stub_port_base: int, stub_args: List[str]) -> List[subprocess.Popen]:
+    """
+    Start the provider stand-ins and the Flask app pointed at them
+    """
+    sys.path.insert(0, LOADTEST_DIR)
+    import stub_providers
+
+    ports = {name: stub_port_base + offset for offset, name in enumerate(stub_providers.PROVIDER_ORDER)}
+    env = dict(os.environ, **stub_providers.env_for("127.0.0.1", ports))
+    stubs = subprocess.Popen([sys.executable, os.path.join(LOADTEST_DIR, "stub_providers.py"),
+                              "--port-base", str(stub_port_base)] + stub_args,
+                             stdout=subprocess.DEVNULL)
+    app_code = f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"
+    app = subprocess.Popen([sys.executable, "-c", app_code], cwd=ROOT_DIR, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(120):
+        try:
+            requests.get(f"{url}/metrics", timeout=1)
+            break
+        except requests.RequestException:
+            time.sleep(0.5)
+    return [stubs, app]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test /research at one or more target rates")
+    parser.add_argument("--url", default="http://127.0.0.1:5001")
+    parser.add_argument("--rps", default="0.5,1,2", help="Comma-separated target rates, run in order")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds per rate")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout (seconds)")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="Client-side concurrency cap")
+    parser.add_argument("--investors", help="JSON list of investor names to sample from")
+    parser.add_argument("--spawn-stubs", action="store_true",
+                        help="Start the stand-ins and the app locally (ignores --url)")
+    parser.add_argument("--port", type=int, default=5055, help="App port when using --spawn-stubs")
+    parser.add_argument("--stub-port-base", type=int, default=8400)
+    parser.add_argument("--stub-arg", action="append", default=[],
+                        help="Extra argument for stub_providers.py (repeatable), e.g. --stub-arg=--tavily-quota=200")
+    parser.add_argument("--save", help="Write stage results to a JSON file")
+    args = parser.parse_args(argv)
+
+    investors = DEFAULT_INVESTORS
+    if args.investors:
+        with open(args.investors, 'r') as f:
+            investors = json.load(f)
+
+    processes = []
+    url = args.url
+    if args.spawn_stubs:
+        processes = spawn_local_stack(args.port, args.stub_port_base, args.stub_arg)
+        url = f"http://127.0.0.1:{args.port}"
+
+    stages = []
+    try:
+        print(f"🚀 Load testing {url}/research ({args.duration:.0f}s per rate)\n")
+        print(f"{'target':>8}{'thru/s':>10}{'p50 s':>9}{'p95 s':>9}{'p99 s':>9}{'errors':>8}{'peak':>7}{'dropped':>8}  by status")
+        print("-" * 86)
+        for rps in [float(value) for value in args.rps.split(',') if value.strip()]:
+            stage = run_stage(url, rps, args.duration, investors, args.timeout, args.max_in_flight)
+            stages.append(stage)
+            print_stage(stage)
+    finally:
+        for process in processes:
+            process.terminate()
+
+    # The sustainable rate is the highest one that kept up with low errors
+    sustained = [s for s in stages if s['error_rate'] <= 0.01 and s['throughput_rps'] >= 0.9 * s['target_rps']]
+    if sustained:
+        best = max(sustained, key=lambda s: s['target_rps'])
+        print(f"\n✅ Sustained {best['target_rps']:.2f} req/s with p95 {best['p95_s']:.2f}s "
+              f"(~{best['peak_in_flight']} concurrent research requests)")
+    else:
+        print("\n❌ No rate was sustained without errors")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'url': url, 'stages': stages}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+Local stand-ins for the external providers used by /research.
+
+Runs one small HTTP server per provider (Tavily, Groq, Gemini, Medium,
+Wikipedia and the LangChain Hub) with a log-normal latency distribution,
+per-provider rate limits that answer 429, and a Tavily quota that answers
+432 "usage limit" once exhausted, so /research can be load tested without
+touching (or paying for) the real APIs.
+
+    python loadtest/stub_providers.py --print-env      # env vars that point the app at the stubs
+    python loadtest/stub_providers.py --tavily-quota 500 --rate-limit groq=2 --latency gemini=3000
+"""
+import sys
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict, Optional, List
+
+# Median latency (ms) per provider, roughly what production traces show
+DEFAULT_LATENCY_MS = {
+    'tavily': 900,
+    'groq': 1800,
+    'gemini': 2500,
+    'medium': 700,
+    'wikipedia': 150,
+    'hub': 200,
+}
+
+# Spread of the log-normal latency distribution (p95 is about 2x the median)
+LATENCY_SIGMA = 0.45
+
+# Profile pages the Tavily stand-in adds when a query names the platform
+PLATFORM_PROFILE_URLS = {
+    'twitter': "https://x.com/{handle}",
+    'linkedin': "https://www.linkedin.com/in/{slug}",
+    'crunchbase': "https://www.crunchbase.com/person/{slug}",
+}
+
+PROVIDER_ORDER = ('tavily', 'groq', 'gemini', 'medium', 'wikipedia', 'hub')
+
+# The ReAct prompt served by the hub stand-in (same text as hwchase17/react)
+REACT_TEMPLATE = """Answer the following questions as best you can. You have access to the following tools:
+
+{tools}
+
+Use the following format:
+
+Question: the input question you must answer
+Thought: you should always think about what to do
+Action: the action to take, should be one of [{tool_names}]
+Action Input: the input to the action
+Observation: the result of the action
+... (this Thought/Action/Action Input/Observation can repeat N times)
+Thought: I now know the final answer
+Final Answer: the final answer to the original input question
+
+Begin!
+
+Question: {input}
+Thought:{agent_scratchpad}"""
+
+INSIGHTS_RESPONSE = {
+    "investment_themes": ["AI infrastructure", "Developer tools", "Fintech"],
+    "sector_focus": ["Artificial Intelligence", "Enterprise Software"],
+    "stage_preference": "Seed to Series B",
+    "recent_deals": [{"company": "Example AI", "stage": "Series A"}],
+    "investment_thesis": "Back technical founders building platforms early.",
+    "notable_quotes": [],
+    "icebreakers": ["What are you most excited about this year?"]
+}
+
+PORTFOLIO_RESPONSE = [
+    {"name": "Example AI", "sector": "Artificial Intelligence", "stage": "Series A",
+     "date": "2024", "description": "Foundation model tooling"},
+    {"name": "Sample Pay", "sector": "Fintech", "stage": "Seed",
+     "date": "2023", "description": "Payments infrastructure"}
+]
+
+
+class ProviderState:
+    """
+    Shared knobs and counters for one stand-in provider
+    """
+
+    def __init__(self, name: str, median_ms: float, rate_limit: Optional[float] = None,
+                 quota: Optional[int] = None, error_rate: float = 0.0):
+        self.name = name
+        self.median_ms = median_ms
+        self.rate_limit = rate_limit
+        self.quota = quota
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.tokens = rate_limit or 0.0
+        self.refilled_at = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.over_quota = 0
+
+    def admit(self) -> Optional[int]:
+        """
+        Decide whether to serve a request; returns an error status or None
+        """
+        with self.lock:
+            self.requests += 1
+            if self.quota is not None and self.requests > self.quota:
+                self.over_quota += 1
+                return 432
+            if self.rate_limit:
+                now = time.monotonic()
+                self.tokens = min(self.rate_limit, self.tokens + (now - self.refilled_at) * self.rate_limit)
+                self.refilled_at = now
+                if self.tokens < 1:
+                    self.throttled += 1
+                    return 429
+                self.tokens -= 1
+        if self.error_rate and random.random() < self.error_rate:
+            return 503
+        return None
+
+    def sleep(self) -> None:
+        """
+        Wait for a latency drawn from a log-normal distribution around the median
+        """
+        time.sleep(random.lognormvariate(math.log(self.median_ms / 1000.0), LATENCY_SIGMA))
+
+
+def make_handler(state: ProviderState):
+    """
+    Build the request handler class for one provider
+    """
+
+    class ProviderHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def send_body(self, status: int, body: bytes, content_type: str = "application/json", headers: Dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def send_json(self, status: int, payload, headers: Dict = None):
+            self.send_body(status, json.dumps(payload).encode("utf-8"), headers=headers)
+
+        def read_json(self) -> Dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            try:
+                return json.loads(self.rfile.read(length))
+            except ValueError:
+                return {}
+
+        def handle_request(self):
+            if self.path.startswith("/images/"):
+                # Image URLs handed out by the stubs (verified with HEAD by the image search)
+                return self.send_body(200, b"\xff\xd8\xff\xe0stub-jpeg", content_type="image/jpeg")
+            body = self.read_json() if self.command == "POST" else {}
+            status = state.admit()
+            if status == 432:
+                return self.send_json(432, {"detail": {"error": "This request exceeds your plan's set usage limit. "
+                                                                "Please upgrade your plan or contact support@tavily.com"}})
+            if status == 429:
+                return self.send_json(429, {"error": {"message": "Rate limit reached, please try again later",
+                                                      "type": "rate_limit_exceeded"}}, headers={"Retry-After": "1"})
+            if status:
+                return self.send_json(status, {"error": {"message": "Service unavailable"}})
+
+            state.sleep()
+            handler = getattr(self, f"serve_{state.name}")
+            handler(urlparse(self.path), body)
+
+        do_GET = handle_request
+        do_POST = handle_request
+        do_HEAD = handle_request
+
+        # --- Providers ---------------------------------------------------------
+
+        def serve_tavily(self, url, body):
+            query = body.get("query", "")
+            seed = hashlib.md5(query.encode("utf-8")).hexdigest()[:8]
+            host = f"http://{self.headers.get('Host')}"
+            results = [{
+                "title": f"{query[:60]} - result {i + 1}",
+                "url": f"https://example.com/{seed}/{i}",
+                "content": f'"{query[:40]}" invested in Example AI and Sample Pay. '
+                           f'"We back founders early," the investor said in 2024.',
+                "score": round(0.9 - i * 0.1, 2)
+            } for i in range(body.get("max_results") or 5)]
+            # Like the real search, a query naming a platform also finds the person's page on it
+            name = query.split('"')[1] if query.count('"') >= 2 else query
+            slug = "-".join(name.lower().split())
+            for platform, platform_url in PLATFORM_PROFILE_URLS.items():
+                if platform in query.lower():
+                    results.insert(0, {"title": f"{name} | {platform.title()}",
+                                       "url": platform_url.format(slug=slug, handle=slug.replace('-', '')),
+                                       "content": f"{name}, investor.", "score": 0.95})
+            images = [f"{host}/images/{seed}-{i}.jpg" for i in range(3)] if body.get("include_images") else []
+            self.send_json(200, {"query": query, "results": results, "images": images,
+                                 "response_time": round(state.median_ms / 1000.0, 2)})
+
+        def serve_groq(self, url, body):
+            content = "```json\n" + json.dumps(INSIGHTS_RESPONSE) + "\n```"
+            self.send_json(200, {
+                "id": f"chatcmpl-{random.randint(0, 1 << 30)}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "llama-3.3-70b-versatile"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 1200, "completion_tokens": 400, "total_tokens": 1600}
+            })
+
+        def serve_gemini(self, url, body):
+            prompt = json.dumps(body.get("contents", ""))
+            if "Final Answer" in prompt:
+                text = "Thought: I now know the final answer\nFinal Answer: Investor profile found."
+            elif "portfolio" in prompt.lower():
+                text = json.dumps(PORTFOLIO_RESPONSE)
+            else:
+                text = "No additional information."
+            response = {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP", "index": 0}],
+                "usageMetadata": {"promptTokenCount": 900, "candidatesTokenCount": 150, "totalTokenCount": 1050}
+            }
+            # The ReAct agent streams; over REST a stream is a JSON array of responses
+            self.send_json(200, [response] if "streamGenerateContent" in url.path else response)
+
+        def serve_medium(self, url, body):
+            host = f"http://{self.headers.get('Host')}"
+            if url.path.startswith("/search"):
+                query = parse_qs(url.query).get("q", ["investor"])[0]
+                # URLs contain "medium.com" so the scraper fetches their metadata from this stub too
+                articles = [{
+                    "@type": "Article",
+                    "headline": f"What {query} taught us about building companies ({i + 1})",
+                    "url": f"{host}/medium.com/@writer/article-{i}-a1b2c3",
+                    "description": f"A look at how {query} picks founders.",
+                    "datePublished": f"2024-0{i + 1}-15"
+                } for i in range(3)]
+                html = ('<html><head><script type="application/ld+json">' + json.dumps(articles) +
+                        '</script></head><body></body></html>')
+            else:
+                html = ('<html><body><article><time datetime="2024-03-01T09:00:00.000Z">Mar 1, 2024</time>'
+                        '<span data-testid="storyReadTime">6 min read</span><p>Article body</p></article></body></html>')
+            self.send_body(200, html.encode("utf-8"), content_type="text/html; charset=utf-8")
+
+        def serve_wikipedia(self, url, body):
+            params = parse_qs(url.query)
+            host = f"http://{self.headers.get('Host')}"
+            titles = (params.get("titles") or params.get("gsrsearch") or ["Unknown"])[0].split("|")
+            pages = [{
+                "pageid": 1000 + i,
+                "ns": 0,
+                "title": title,
+                "index": i + 1,
+                "thumbnail": {"source": f"{host}/images/{title.replace(' ', '_')}.jpg", "width": 800, "height": 1000},
+                "pageimage": f"{title.replace(' ', '_')}.jpg"
+            } for i, title in enumerate(titles)]
+            self.send_json(200, {"batchcomplete": True, "query": {"pages": pages}})
+
+        def serve_hub(self, url, body):
+            manifest = {
+                "lc": 1, "type": "constructor",
+                "id": ["langchain", "prompts", "prompt", "PromptTemplate"],
+                "kwargs": {"input_variables": ["agent_scratchpad", "input", "tool_names", "tools"],
+                           "template": REACT_TEMPLATE, "template_format": "f-string"}
+            }
+            if url.path.startswith("/info"):
+                return self.send_json(200, {"version": "0.10.0", "instance_flags": {}})
+            self.send_json(200, {"commit_hash": "stub", "manifest": manifest, "examples": []})
+
+    return ProviderHandler
+
+
+def env_for(host: str, ports: Dict[str, int]) -> Dict[str, str]:
+    """
+    Environment variables that point the app at the stand-ins
+    """
+    base = {name: f"http://{host}:{port}" for name, port in ports.items()}
+    return {
+        "TAVILY_API_BASE_URL": base['tavily'],
+        "GROQ_API_BASE": base['groq'],
+        "GEMINI_API_BASE_URL": base['gemini'],
+        "MEDIUM_BASE_URL": base['medium'],
+        "WIKIPEDIA_API_URL": f"{base['wikipedia']}/w/api.php",
+        "LANGSMITH_ENDPOINT": base['hub'],
+        "TAVILY_API_KEY": "stub",
+        "GROQ_API_KEY": "stub",
+        "GEMINI_API_KEY": "stub",
+    }
+
+
+def start_stub_providers(host: str = "127.0.0.1", port_base: int = 8400,
+                         latency: Dict[str, float] = None, rate_limits: Dict[str, float] = None,
+                         tavily_quota: Optional[int] = None, error_rate: float = 0.0) -> Dict[str, Dict]:
+    """
+    Start every stand-in on consecutive ports in background threads.
+    Returns {provider: {'server', 'state', 'port'}}.
+    """
+    latency = dict(DEFAULT_LATENCY_MS, **(latency or {}))
+    rate_limits = rate_limits or {}
+    providers = {}
+    for offset, name in enumerate(PROVIDER_ORDER):
+        state = ProviderState(name, latency[name], rate_limits.get(name),
+                              tavily_quota if name == 'tavily' else None, error_rate)
+        server = ThreadingHTTPServer((host, port_base + offset), make_handler(state))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"stub-{name}", daemon=True).start()
+        providers[name] = {'server': server, 'state': state, 'port': port_base + offset}
+    return providers
+
+
+def parse_pairs(values: List[str]) -> Dict[str, float]:
+    """
+    Parse provider=value options
+    """
+    pairs = {}
+    for value in values or []:
+        name, _, number = value.partition('=')
+        pairs[name.strip()] = float(number)
+    return pairs
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run local stand-ins for the research providers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port-base", type=int, default=8400)
+    parser.add_argument("--latency", action="append", metavar="PROVIDER=MS", help="Median latency override")
+    parser.add_argument("--rate-limit", action="append", metavar="PROVIDER=RPS", help="Answer 429 above this rate")
+    parser.add_argument("--tavily-quota", type=int, help="Answer 432 usage limit after this many Tavily calls")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--print-env", action="store_true", help="Print export lines for the app and exit")
+    args = parser.parse_args(argv)
+
+    ports = {name: args.port_base + offset for offset, name in enumerate(PROVIDER_ORDER)}
+    if args.print_env:
+        for key, value in env_for(args.host, ports).items():
+            print(f"export {key}={value}")
+        return
+
+    providers = start_stub_providers(args.host, args.port_base, parse_pairs(args.latency),
+                                     parse_pairs(args.rate_limit), args.tavily_quota, args.error_rate)
+    print("🧪 Provider stand-ins running:")
+    for name, provider in providers.items():
+        print(f"   {name:<10} http://{args.host}:{provider['port']}  (median {provider['state'].median_ms:.0f} ms)")
+    print("\nPoint the app at them with:")
+    for key, value in env_for(args.host, ports).items():
+        print(f"   export {key}={value}")
+
+    try:
+        while True:
+            time.sleep(10)
+            summary = ", ".join(f"{name} {p['state'].requests} req/{p['state'].throttled} 429/{p['state'].over_quota} 432"
+                                for name, p in providers.items() if p['state'].requests)
+            if summary:
+                print(f"📊 {summary}")
+    except KeyboardInterrupt:
+        print("\nStopping stand-ins")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,269 @@
+"""
+Lightweight in-process metrics for the research pipeline.
+
+Stages and external calls are wrapped in spans that record latency
+histograms, call/error counters and in-flight gauges. Everything is kept
+in memory per process and rendered in Prometheus text format by /metrics.
+Spans are also added to the request timeline when tracing is active.
+"""
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Tuple, Optional, Callable
+
+import tracing
+
+# Histogram bucket upper bounds (seconds); pipeline stages range from ms to a minute
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "investalytics"
+
+METRIC_HELP = {
+    "stage_duration_seconds": ("histogram", "Time spent in each pipeline stage"),
+    "stage_errors_total": ("counter", "Pipeline stages that raised an exception"),
+    "stage_in_flight": ("gauge", "Pipeline stages currently running"),
+    "api_duration_seconds": ("histogram", "Latency of external API calls"),
+    "api_calls_total": ("counter", "External API calls made"),
+    "api_errors_total": ("counter", "External API calls that failed"),
+    "api_retries_total": ("counter", "External API calls retried after rate limiting"),
+    "api_in_flight": ("gauge", "External API calls currently running"),
+    "cache_requests_total": ("counter", "Cache lookups by cache and result (hit/miss)"),
+    "batch_investors_total": ("counter", "Investors finished by batch research, by result"),
+    "deadline_degraded_total": ("counter", "Response sections degraded to fallbacks by the request deadline"),
+    "cancelled_calls_total": ("counter", "External calls skipped because their request was cancelled"),
+    "prewarm_refreshes_total": ("counter", "Investors refreshed by the cache pre-warm scheduler, by result"),
+    "jobs_total": ("counter", "Background research job events (submitted, retried, succeeded, ...)"),
+    "http_responses_total": ("counter", "Buffered responses by encoding (br, gzip, identity) or not_modified"),
+    "tavily_shed_total": ("counter", "Tavily searches shed to save quota, by query class"),
+    "tavily_quota_remaining": ("gauge", "Tavily credits left in the current day and month"),
+    "search_pool_total": ("counter", "Broad Tavily searches of the query planner, searched or shared with another consumer"),
+    "search_pool_follow_ups_total": ("counter", "Targeted Tavily searches sent because the shared results couldn't answer, by consumer"),
+    "asgi_requests_in_flight": ("gauge", "Requests being handled by the ASGI server (asgi.py)"),
+    "asgi_disconnects_total": ("counter", "Requests cancelled because the client disconnected (asgi.py)"),
+}
+
+metrics_lock = threading.Lock()
+counters: Dict[Tuple[str, Tuple], float] = {}
+gauges: Dict[Tuple[str, Tuple], float] = {}
+histograms: Dict[Tuple[str, Tuple], Dict] = {}
+
+
+def label_key(labels: Dict) -> Tuple:
+    """
+    Turn a label dict into a hashable, ordered key
+    """
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """
+    Increment a counter
+    """
+    key = (name, label_key(labels))
+    with metrics_lock:
+        counters[key] = counters.get(key, 0) + amount
+
+
+def gauge_add(name: str, amount: float, **labels) -> None:
+    """
+    Move a gauge up or down
+    """
+    key = (name, label_key(labels))
+    with metrics_lock:
+        gauges[key] = gauges.get(key, 0) + amount
+
+
+def gauge_set(name: str, value: float, **labels) -> None:
+    """
+    Set a gauge to a value
+    """
+    key = (name, label_key(labels))
+    with metrics_lock:
+        gauges[key] = value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """
+    Record a value in a histogram
+    """
+    key = (name, label_key(labels))
+    with metrics_lock:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a cache lookup as a hit or a miss
+    """
+    result = "hit" if hit else "miss"
+    inc("cache_requests_total", cache=cache, result=result)
+    tracing.record_instant(f"cache {result}: {cache}", "cache", {'cache': cache, 'result': result})
+
+
+@contextmanager
+def span(stage: str, **labels):
+    """
+    Time a pipeline stage:
+
+        with metrics.span("discover_portfolio"):
+            ...
+
+    Yields a dict of details (item counts, cache status, ...) for the request timeline.
+    """
+    attrs = {}
+    gauge_add("stage_in_flight", 1, stage=stage)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        inc("stage_errors_total", stage=stage)
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        observe("stage_duration_seconds", end - start, stage=stage, **labels)
+        gauge_add("stage_in_flight", -1, stage=stage)
+        tracing.record_span(stage, "stage", start, end, dict(labels, **attrs))
+
+
+@contextmanager
+def external_call(provider: str, operation: str = ""):
+    """
+    Time a call to an external service (Tavily, Groq, Gemini, Wikipedia, ...).
+    Set attrs['error'] = True inside the block for calls that fail without raising;
+    'bytes' / 'bytes_sent' and other details are shown in the request timeline.
+    """
+    attrs = {}
+    labels = {'provider': provider, 'operation': operation or None}
+    inc("api_calls_total", **labels)
+    gauge_add("api_in_flight", 1, provider=provider)
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        observe("api_duration_seconds", end - start, **labels)
+        gauge_add("api_in_flight", -1, provider=provider)
+        if attrs.get('error'):
+            inc("api_errors_total", **labels)
+        tracing.record_span(f"{provider} {operation}".strip(), provider, start, end, dict(labels, **attrs))
+
+
+def timed(stage: Optional[str] = None) -> Callable:
+    """
+    Decorator form of span(), defaulting the stage name to the function name
+    """
+    def decorator(func):
+        stage_name = stage or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def llm_provider(llm) -> str:
+    """
+    Name the provider behind a LangChain chat model for metric labels
+    """
+    name = type(llm).__name__.lower()
+    if 'groq' in name:
+        return 'groq'
+    if 'google' in name or 'gemini' in name:
+        return 'gemini'
+    return name
+
+
+def format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+    """
+    Render a label key as {a="1",b="2"}
+    """
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+def render_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text exposition format
+    """
+    with metrics_lock:
+        counter_items = sorted(counters.items())
+        gauge_items = sorted(gauges.items())
+        histogram_items = sorted((key, dict(value, buckets=list(value['buckets'])))
+                                 for key, value in histograms.items())
+
+    lines = []
+    described = set()
+
+    def describe(name):
+        if name not in described:
+            described.add(name)
+            metric_type, help_text = METRIC_HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {metric_type}")
+
+    for (name, labels), value in counter_items + gauge_items:
+        describe(name)
+        lines.append(f"{METRIC_PREFIX}_{name}{format_labels(labels)} {value:g}")
+
+    for (name, labels), histogram in histogram_items:
+        describe(name)
+        for bound, count in zip(LATENCY_BUCKETS, histogram['buckets']):
+            lines.append(f"{METRIC_PREFIX}_{name}_bucket{format_labels(labels, (('le', f'{bound:g}'),))} {count}")
+        lines.append(f"{METRIC_PREFIX}_{name}_bucket{format_labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+        lines.append(f"{METRIC_PREFIX}_{name}_sum{format_labels(labels)} {histogram['sum']:.6f}")
+        lines.append(f"{METRIC_PREFIX}_{name}_count{format_labels(labels)} {histogram['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> Dict[str, Dict]:
+    """
+    Summarize stage timings and API call counts (used by the benchmark harness)
+    """
+    with metrics_lock:
+        stages = {}
+        for (name, labels), histogram in histograms.items():
+            if name == "stage_duration_seconds":
+                stage = dict(labels).get('stage')
+                totals = stages.setdefault(stage, {'count': 0, 'seconds': 0.0})
+                totals['count'] += histogram['count']
+                totals['seconds'] += histogram['sum']
+
+        api_calls = {}
+        api_errors = {}
+        for (name, labels), value in counters.items():
+            label_map = dict(labels)
+            call = f"{label_map.get('provider', '')} {label_map.get('operation', '')}".strip()
+            if name == "api_calls_total":
+                api_calls[call] = api_calls.get(call, 0) + int(value)
+            elif name == "api_errors_total":
+                api_errors[call] = api_errors.get(call, 0) + int(value)
+
+    return {'stages': stages, 'api_calls': api_calls, 'api_errors': api_errors}
+
+
+def reset() -> None:
+    """
+    Clear all metrics (used by tests and benchmarks)
+    """
+    with metrics_lock:
+        counters.clear()
+        gauges.clear()
+        histograms.clear()
@@ -0,0 +1,68 @@
+"""
+Read-only store for the mock datasets (data/mock_data.json).
+
+Mock profiles, portfolios, news, tweets, Medium articles and the /mock
+payload live in one versioned JSON file. It is parsed once, on first use,
+and every caller shares the same objects. Each dataset is keyed by
+normalized investor name, with a "default" entry for everyone else, so a
+lookup is a dict access. Callers must copy an entry before changing it.
+"""
+import os
+import json
+import threading
+from typing import Any, Dict
+
+MOCK_DATA_PATH = os.getenv(
+    "MOCK_DATA_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "mock_data.json")
+)
+
+# Bump together with "version" in the data file when its layout changes
+MOCK_DATA_VERSION = 1
+
+load_lock = threading.Lock()
+store: Dict[str, Any] = {}
+
+
+def normalize_name(name: str) -> str:
+    """
+    Dataset key for an investor name (case and spacing don't matter)
+    """
+    return ' '.join(str(name or '').lower().split())
+
+
+def load() -> Dict[str, Any]:
+    """
+    Parse the data file on first use and return it
+    """
+    if store:
+        return store
+    with load_lock:
+        if not store:
+            with open(MOCK_DATA_PATH, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MOCK_DATA_VERSION:
+                raise ValueError(f"{MOCK_DATA_PATH} is version {data.get('version')}, expected {MOCK_DATA_VERSION}")
+            store.update(data)
+    return store
+
+
+def get(dataset: str, investor_name: str = "", match_within: bool = False) -> Any:
+    """
+    An investor's entry in a dataset, or the dataset's default entry.
+    With match_within, a known name contained in investor_name also matches
+    (e.g. "Mark Cuban (Shark Tank)"), as the old inline checks did.
+    """
+    entries = load()[dataset]
+    key = normalize_name(investor_name)
+    entry = entries.get(key)
+    if entry is None and match_within and key:
+        entry = next((value for known, value in entries.items() if known != 'default' and known in key), None)
+    return entries['default'] if entry is None else entry
+
+
+def payload(name: str) -> Any:
+    """
+    A top-level entry that isn't keyed by investor (e.g. the /mock response)
+    """
+    return load()[name]
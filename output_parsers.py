@@ -1,50 +1,47 @@
-from typing import List, Dict, Any
-from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field
-
-
-class InvestorProfile(BaseModel):
-    name: str = Field(description="Full name of the investor")
-    firm: str = Field(description="Venture capital firm or company")
-    title: str = Field(description="Current position/title")
-    bio: str = Field(description="Professional biography")
-    profile_urls: Dict[str, str] = Field(description="URLs for different platforms")
-    profile_image: str = Field(description="Profile image URL")
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+
+# Profiles and portfolio companies are built by the pipeline itself, so they are
+# plain slotted records; pydantic validation is kept for the LLM's insights, which
+# come from outside. ResearchPayload describes the finished /research response.
+
+
+def record_to_dict(record) -> Dict[str, Any]:
+    """
+    Shallow dict of a slotted record's fields (no deep copy, unlike dataclasses.asdict)
+    """
+    return {name: getattr(record, name) for name in record.__slots__}
+
+
+@dataclass(slots=True)
+class InvestorProfile:
+    name: str  # Full name of the investor
+    firm: str  # Venture capital firm or company
+    title: str  # Current position/title
+    bio: str  # Professional biography
+    profile_urls: Dict[str, str]  # URLs for different platforms
+    profile_image: str  # Profile image URL
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "name": self.name,
-            "firm": self.firm,
-            "title": self.title,
-            "bio": self.bio,
-            "profile_urls": self.profile_urls,
-            "profile_image": self.profile_image
-        }
-
-
-class PortfolioCompany(BaseModel):
-    name: str = Field(description="Company name")
-    sector: str = Field(description="Industry sector")
-    stage: str = Field(description="Investment stage (Seed, Series A, etc.)")
-    investment_date: str = Field(description="Date of investment")
-    description: str = Field(description="Brief company description")
-    investment_value: float = Field(description="Investment amount in USD", default=0)
-    website: str = Field(description="Company website URL", default="")
-    stock_symbol: str = Field(description="Stock ticker symbol if public", default="")
-    yahoo_finance_url: str = Field(description="Yahoo Finance page URL if public", default="")
+        return record_to_dict(self)
+
+
+@dataclass(slots=True)
+class PortfolioCompany:
+    name: str  # Company name
+    sector: str  # Industry sector
+    stage: str  # Investment stage (Seed, Series A, etc.)
+    investment_date: str  # Date of investment
+    description: str  # Brief company description
+    investment_value: float = 0  # Investment amount in USD
+    website: str = ""  # Company website URL
+    stock_symbol: str = ""  # Stock ticker symbol if public
+    yahoo_finance_url: str = ""  # Yahoo Finance page URL if public
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "name": self.name,
-            "sector": self.sector,
-            "stage": self.stage,
-            "investment_date": self.investment_date,
-            "description": self.description,
-            "investment_value": self.investment_value,
-            "website": self.website,
-            "stock_symbol": self.stock_symbol,
-            "yahoo_finance_url": self.yahoo_finance_url
-        }
+        return record_to_dict(self)
 
 
 class InvestmentInsights(BaseModel):
@@ -57,16 +54,61 @@ class InvestmentInsights(BaseModel):
     icebreakers: List[str] = Field(description="5 conversation starters")
     
     def to_dict(self) -> Dict[str, Any]:
-        return {
-            "investment_themes": self.investment_themes,
-            "sector_focus": self.sector_focus,
-            "stage_preference": self.stage_preference,
-            "recent_deals": self.recent_deals,
-            "investment_thesis": self.investment_thesis,
-            "notable_quotes": self.notable_quotes,
-            "icebreakers": self.icebreakers
-        }
-
-
-# Create parsers for structured output
-insights_parser = PydanticOutputParser(pydantic_object=InvestmentInsights)
\ No newline at end of file
+        return self.model_dump()
+
+
+# Everything one research run gathered, so each source is fetched once per request
+@dataclass(slots=True)
+class ResearchResult:
+    profile: InvestorProfile
+    portfolio: List[PortfolioCompany]
+    insights: InvestmentInsights
+    news: List[Dict[str, Any]]
+    medium_articles: List[Dict[str, Any]]
+    tweets: List[Dict[str, Any]]
+    investor_quotes: List[Dict[str, Any]]  # quote search results, used when there are no tweets
+    linkedin_posts: List[Dict[str, Any]]
+    lookup: Dict[str, Any]  # raw profile lookup (URLs by platform, image, ...)
+
+
+class ResearchPayload(BaseModel):
+    """
+    Schema of the /research response built by build_research_payload(). It is
+    checked in the tests, not per request.
+    """
+    model_config = ConfigDict(extra='allow')
+
+    success: bool
+    profile: InvestorProfile
+    portfolio: List[PortfolioCompany]
+    insights: InvestmentInsights
+    medium_articles: List[Dict[str, Any]]
+    news: List[Dict[str, Any]]
+    fetched_at: float
+
+
+# Parser for structured output, created on first use (langchain_core pulls in
+# langsmith, which is slow to import and not needed until insights are generated)
+insights_parser: Optional[Any] = None
+insights_format_instructions: Optional[str] = None
+
+
+def get_insights_parser():
+    """
+    Return the InvestmentInsights output parser
+    """
+    global insights_parser
+    if insights_parser is None:
+        from langchain_core.output_parsers import PydanticOutputParser
+        insights_parser = PydanticOutputParser(pydantic_object=InvestmentInsights)
+    return insights_parser
+
+
+def get_insights_format_instructions() -> str:
+    """
+    Return the parser's format instructions (rendering them walks the JSON schema, so it's done once)
+    """
+    global insights_format_instructions
+    if insights_format_instructions is None:
+        insights_format_instructions = get_insights_parser().get_format_instructions()
+    return insights_format_instructions
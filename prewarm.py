@@ -0,0 +1,270 @@
+"""
+Keep the research cache warm for the most requested investors.
+
+Every /research request is counted (research_cache.record_request). During
+off-peak hours a background scheduler takes the top-N investors and
+refreshes whichever sections of their cached payload are older than that
+section's cadence: news every few hours, Medium and insights daily, the
+portfolio every few days, and the full profile lookup weekly. Each cycle
+spends at most PREWARM_TAVILY_BUDGET estimated Tavily calls, so pre-warming
+never eats the quota needed by live traffic. Popular lookups, including
+the quick access investors, are then served real data from the cache
+instead of mocks.
+
+    python prewarm.py --once --ignore-hours     # one cycle now
+    python prewarm.py                           # run the scheduler in the foreground
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict, List
+
+from dotenv import load_dotenv
+
+import metrics
+import research_cache
+import tavily_quota
+
+load_dotenv()
+
+# Set PREWARM_ENABLED=1 to run the scheduler inside the web process
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# How many of the most requested investors to keep warm
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "25"))
+
+# Off-peak window in UTC hours, "start-end" (may wrap midnight)
+PREWARM_HOURS = os.getenv("PREWARM_HOURS", "2-7")
+
+# How often the scheduler wakes up to look for stale sections (seconds)
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "1800"))
+
+# Most Tavily calls (estimated) one cycle may spend
+PREWARM_TAVILY_BUDGET = int(os.getenv("PREWARM_TAVILY_BUDGET", "150"))
+
+# How stale each section may get before it is refreshed (seconds),
+# e.g. PREWARM_CADENCES="news=10800,insights=43200"
+DEFAULT_SECTION_CADENCES = {
+    'profile': 7 * 24 * 3600,
+    'portfolio': 3 * 24 * 3600,
+    'news': 6 * 3600,
+    'medium_articles': 24 * 3600,
+    'insights': 24 * 3600,
+}
+
+# Rough Tavily calls needed to refresh each section
+SECTION_TAVILY_COST = {
+    'profile': 4,  # full research: the query planner's three broad searches plus a follow-up
+    'portfolio': 1,
+    'news': 1,
+    'medium_articles': 1,
+    'insights': 1,  # quotes come from the broad news search when there are no tweets
+}
+
+LEASE_NAME = "prewarm_scheduler"
+
+scheduler_thread: Optional[threading.Thread] = None
+scheduler_lock = threading.Lock()
+
+
+def parse_cadences(value: str) -> Dict[str, float]:
+    """
+    Parse a "section=seconds,section=seconds" setting
+    """
+    cadences = {}
+    for pair in (value or "").split(','):
+        section, _, seconds = pair.partition('=')
+        if section.strip() and seconds.strip():
+            cadences[section.strip()] = float(seconds)
+    return cadences
+
+
+SECTION_CADENCES = dict(DEFAULT_SECTION_CADENCES, **parse_cadences(os.getenv("PREWARM_CADENCES", "")))
+
+
+def in_off_peak_hours(now: Optional[datetime] = None) -> bool:
+    """
+    Check whether the current UTC hour is inside PREWARM_HOURS
+    """
+    start, _, end = PREWARM_HOURS.partition('-')
+    start, end = int(start), int(end or start)
+    hour = (now or datetime.now(timezone.utc)).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def stale_sections(payload: Optional[Dict], now: float) -> List[str]:
+    """
+    Sections of a cached payload older than their cadence (all of them if there is no payload)
+    """
+    if not payload:
+        return list(SECTION_CADENCES)
+    updated = payload.get('section_updated_at', {})
+    fetched_at = payload.get('fetched_at', 0)
+    return [section for section, cadence in SECTION_CADENCES.items()
+            if now - updated.get(section, fetched_at) > cadence]
+
+
+def refresh_cost(sections: List[str]) -> int:
+    """
+    Estimated Tavily calls to refresh these sections
+    """
+    if 'profile' in sections:
+        return SECTION_TAVILY_COST['profile']
+    return sum(SECTION_TAVILY_COST.get(section, 1) for section in set(sections) | {'insights'})
+
+
+def refresh_sections(investor_name: str, payload: Optional[Dict], sections: List[str]) -> Dict:
+    """
+    Re-fetch the given sections of an investor's payload with real (non-mock) data.
+    A missing payload or a stale profile means a full research run.
+    """
+    from investor_research import (
+        build_research_payload, lookup_from_profile, portfolio_from_data,
+        generate_investment_insights, search_investor_quotes
+    )
+    from output_parsers import InvestorProfile
+    from agents.portfolio_agent import discover_portfolio
+    from third_parties.news import fetch_investor_news
+    from third_parties.medium import fetch_medium_articles
+    from third_parties.twitter import fetch_recent_tweets
+    from tools import search_planner
+
+    now = time.time()
+    if not payload or 'profile' in sections:
+        payload = build_research_payload(investor_name, pace=False, allow_mock=False)
+        payload['section_updated_at'] = {section: now for section in SECTION_CADENCES}
+        return payload
+
+    payload = dict(payload, section_updated_at=dict(payload.get('section_updated_at', {})))
+    lookup = lookup_from_profile(investor_name, payload['profile'])
+    urls = lookup.get("urls", {})
+
+    # The refreshed sections share the query planner's broad searches, as in a full run
+    with search_planner.pool(investor_name, lookup.get("firm", "")):
+        if 'portfolio' in sections:
+            portfolio_data = discover_portfolio(lookup, use_mock=False)
+            payload['portfolio'] = [company.to_dict() for company in portfolio_from_data(portfolio_data)]
+        if 'news' in sections:
+            payload['news'] = fetch_investor_news(investor_name, limit=5, use_mock=False)
+        if 'medium_articles' in sections:
+            medium_url = urls.get("medium", "")
+            payload['medium_articles'] = fetch_medium_articles(medium_url, mock=False, investor_name=investor_name)
+        # Insights are derived from the other sections, so they are redone on every refresh
+        tweets = fetch_recent_tweets(urls.get("twitter", ""), mock=False, investor_name=investor_name)
+        insights = generate_investment_insights(
+            profile=InvestorProfile(**payload['profile']),
+            portfolio=portfolio_from_data(payload.get('portfolio', [])),
+            tweets=tweets or search_investor_quotes(investor_name),
+            linkedin_posts=[],
+            medium_articles=payload.get('medium_articles', []),
+            news=payload.get('news', [])
+        )
+        payload['insights'] = insights.to_dict()
+
+    for section in set(sections) | {'insights'}:
+        payload['section_updated_at'][section] = now
+    return payload
+
+
+def run_prewarm_cycle(top_n: int = PREWARM_TOP_N, tavily_budget: int = PREWARM_TAVILY_BUDGET) -> Dict:
+    """
+    Refresh stale sections for the top-N investors, most popular first, until
+    the cycle's Tavily budget is spent. Returns a summary of what was done.
+    """
+    now = time.time()
+    spent = 0
+    refreshed = []
+    deferred = []
+    for investor in research_cache.top_investors(top_n):
+        name = investor['name']
+        # Read the raw entry, ignoring the TTL: stale sections are what we're here to fix
+        payload = research_cache.get('research', research_cache.research_key(name), ttl=float('inf'))
+        sections = stale_sections(payload, now)
+        if not sections:
+            continue
+
+        cost = refresh_cost(sections)
+        # A refresh whose searches would be shed would only overwrite good data with fallbacks
+        if spent + cost > tavily_budget or not tavily_quota.has_headroom("prewarm"):
+            deferred.append(name)
+            continue
+
+        print(f"🔥 Pre-warming {name} ({investor['count']} requests): {', '.join(sections)}")
+        try:
+            # Pre-warm searches are the first to be shed when the Tavily quota runs low
+            with metrics.span("prewarm_investor"), tavily_quota.priority("prewarm"):
+                payload = refresh_sections(name, payload, sections)
+            research_cache.store_research(name, payload)
+            metrics.inc("prewarm_refreshes_total", result="ok")
+            refreshed.append(name)
+        except Exception as e:
+            print(f"❌ Pre-warm failed for {name}: {e}")
+            metrics.inc("prewarm_refreshes_total", result="error")
+        spent += cost
+
+    if deferred:
+        print(f"⏳ Tavily budget reached; deferred {len(deferred)} investors to the next cycle")
+    return {'refreshed': refreshed, 'deferred': deferred, 'tavily_spent': spent}
+
+
+def scheduler_loop(interval: float, ignore_hours: bool = False,
+                   top_n: int = PREWARM_TOP_N, tavily_budget: int = PREWARM_TAVILY_BUDGET) -> None:
+    """
+    Wake up every interval seconds and run a cycle during off-peak hours.
+    A lease in the research cache keeps it to one scheduler per machine.
+    """
+    holder = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    while True:
+        try:
+            if (ignore_hours or in_off_peak_hours()) and \
+                    research_cache.acquire_lease(LEASE_NAME, holder, interval * 2):
+                run_prewarm_cycle(top_n=top_n, tavily_budget=tavily_budget)
+        except Exception as e:
+            print(f"Pre-warm scheduler error: {e}")
+        time.sleep(interval)
+
+
+def start_prewarm_scheduler(interval: float = PREWARM_INTERVAL) -> None:
+    """
+    Start the scheduler on a daemon thread (idempotent)
+    """
+    global scheduler_thread
+    with scheduler_lock:
+        if scheduler_thread is not None and scheduler_thread.is_alive():
+            return
+        scheduler_thread = threading.Thread(target=scheduler_loop, args=(interval,), name="prewarm", daemon=True)
+        scheduler_thread.start()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-warm the research cache for popular investors")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--top", type=int, default=PREWARM_TOP_N)
+    parser.add_argument("--budget", type=int, default=PREWARM_TAVILY_BUDGET, help="Tavily calls per cycle")
+    parser.add_argument("--ignore-hours", action="store_true", help="Run outside the off-peak window too")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        if not args.ignore_hours and not in_off_peak_hours():
+            print(f"Outside off-peak hours ({PREWARM_HOURS} UTC); use --ignore-hours to run anyway")
+            return 0
+        summary = run_prewarm_cycle(top_n=args.top, tavily_budget=args.budget)
+        print(f"✅ Refreshed {len(summary['refreshed'])} investors using ~{summary['tavily_spent']} Tavily calls")
+        return 0
+
+    print(f"🔥 Pre-warm scheduler: top {args.top} investors every {PREWARM_INTERVAL:.0f}s during {PREWARM_HOURS} UTC")
+    try:
+        scheduler_loop(PREWARM_INTERVAL, ignore_hours=args.ignore_hours, top_n=args.top, tavily_budget=args.budget)
+    except KeyboardInterrupt:
+        print("\nStopping pre-warm scheduler")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Process-wide concurrency budgets for external providers.
+
+Every Tavily search and LLM call takes a slot from its provider's budget,
+so the number of requests in flight to a provider stays bounded however
+many investors are being researched at once (batch runs, jobs, /research).
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict
+
+import metrics
+
+# Max concurrent calls per provider, e.g. PROVIDER_CONCURRENCY="tavily=4,groq=2,gemini=3"
+DEFAULT_PROVIDER_CONCURRENCY = {
+    'tavily': 4,
+    'groq': 2,
+    'gemini': 3,
+}
+
+
+def parse_budgets(value: str) -> Dict[str, int]:
+    """
+    Parse a "provider=limit,provider=limit" setting
+    """
+    budgets = {}
+    for pair in (value or "").split(','):
+        provider, _, limit = pair.partition('=')
+        if provider.strip() and limit.strip():
+            budgets[provider.strip()] = int(limit)
+    return budgets
+
+
+PROVIDER_CONCURRENCY = dict(DEFAULT_PROVIDER_CONCURRENCY, **parse_budgets(os.getenv("PROVIDER_CONCURRENCY", "")))
+
+budget_lock = threading.Lock()
+semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+
+def get_semaphore(provider: str) -> threading.BoundedSemaphore:
+    """
+    Return the semaphore for a provider, creating it on first use
+    """
+    with budget_lock:
+        semaphore = semaphores.get(provider)
+        if semaphore is None:
+            semaphore = semaphores[provider] = threading.BoundedSemaphore(PROVIDER_CONCURRENCY.get(provider, 4))
+        return semaphore
+
+
+@contextmanager
+def provider_slot(provider: str):
+    """
+    Hold one of the provider's concurrency slots for the duration of a call
+    """
+    semaphore = get_semaphore(provider)
+    if not semaphore.acquire(blocking=False):
+        # Only time the wait when there actually is one
+        with metrics.span("provider_budget_wait", provider=provider):
+            semaphore.acquire()
+    try:
+        yield
+    finally:
+        semaphore.release()
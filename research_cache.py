@@ -0,0 +1,277 @@
+"""
+SQLite-backed cache for search results, LLM responses and finished research.
+
+Entries are grouped by kind ('search', 'llm', 'research') and expire after
+a per-kind TTL. The database is shared by every worker on the machine, so a
+batch run, a background job and a /research request for the same investor
+all reuse each other's Tavily searches and LLM answers.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Any, Callable, Dict, List
+
+import metrics
+import serialization
+
+RESEARCH_CACHE_PATH = os.getenv(
+    "RESEARCH_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "research_cache.db")
+)
+
+# Set RESEARCH_CACHE_ENABLED=0 to always go to the network
+RESEARCH_CACHE_ENABLED = os.getenv("RESEARCH_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# How long each kind of entry is trusted (seconds)
+CACHE_TTLS = {
+    'search': float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600))),
+    'llm': float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    'research': float(os.getenv("RESEARCH_RESULT_TTL", str(24 * 3600))),
+}
+
+# One connection per thread; sqlite3 connections can't be shared across threads
+connections = threading.local()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Open (once per thread) the cache database, creating the table if needed
+    """
+    connection = getattr(connections, 'connection', None)
+    if connection is None or getattr(connections, 'path', None) != RESEARCH_CACHE_PATH:
+        os.makedirs(os.path.dirname(RESEARCH_CACHE_PATH) or '.', exist_ok=True)
+        connection = sqlite3.connect(RESEARCH_CACHE_PATH, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, created_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, key))"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS investor_requests ("
+            " key TEXT PRIMARY KEY, name TEXT NOT NULL, count INTEGER NOT NULL, last_requested REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS provider_usage ("
+            " provider TEXT NOT NULL, period TEXT NOT NULL, calls INTEGER NOT NULL, PRIMARY KEY (provider, period))"
+        )
+        connection.commit()
+        connections.connection = connection
+        connections.path = RESEARCH_CACHE_PATH
+    return connection
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Hash the parts of a request into a fixed-size key
+    """
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def get(kind: str, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+    """
+    Return the cached value, or None if it is missing or older than the TTL
+    """
+    if not RESEARCH_CACHE_ENABLED:
+        return None
+    ttl = CACHE_TTLS.get(kind, 24 * 3600) if ttl is None else ttl
+    try:
+        row = get_connection().execute(
+            "SELECT value, created_at FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+    except Exception as e:
+        print(f"Research cache read error: {e}")
+        row = None
+
+    if not row or time.time() - row[1] > ttl:
+        metrics.record_cache(kind, hit=False)
+        return None
+    metrics.record_cache(kind, hit=True)
+    return serialization.loads(row[0])
+
+
+def put(kind: str, key: str, value: Any) -> None:
+    """
+    Store a JSON-serializable value
+    """
+    if not RESEARCH_CACHE_ENABLED:
+        return
+    try:
+        connection = get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO entries (kind, key, value, created_at) VALUES (?, ?, ?, ?)",
+            (kind, key, serialization.dumps(value), time.time())
+        )
+        connection.commit()
+    except Exception as e:
+        print(f"Research cache write error: {e}")
+
+
+def research_key(investor_name: str) -> str:
+    """
+    Cache key for a finished research payload
+    """
+    return ' '.join(investor_name.lower().split())
+
+
+def get_research(investor_name: str) -> Optional[dict]:
+    """
+    Return the cached /research payload for an investor
+    """
+    return get('research', research_key(investor_name))
+
+
+def store_research(investor_name: str, payload: dict) -> None:
+    """
+    Remember a successful /research payload for an investor.
+    Payloads degraded by a deadline or built from mock data are not stored,
+    so they never replace a complete one.
+    """
+    if payload.get("success") and not payload.get("partial") and not payload.get("mock"):
+        put('research', research_key(investor_name), payload)
+
+
+def record_request(investor_name: str) -> None:
+    """
+    Count a user request for an investor (ranks investors for cache pre-warming)
+    """
+    try:
+        connection = get_connection()
+        connection.execute(
+            "INSERT INTO investor_requests (key, name, count, last_requested) VALUES (?, ?, 1, ?)"
+            " ON CONFLICT(key) DO UPDATE SET count = count + 1, name = excluded.name,"
+            " last_requested = excluded.last_requested",
+            (research_key(investor_name), ' '.join(investor_name.split()), time.time())
+        )
+        connection.commit()
+    except Exception as e:
+        print(f"Research cache write error: {e}")
+
+
+def top_investors(limit: int) -> List[Dict]:
+    """
+    The most requested investors, most popular first
+    """
+    rows = get_connection().execute(
+        "SELECT name, count, last_requested FROM investor_requests ORDER BY count DESC, last_requested DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+    return [{'name': row[0], 'count': row[1], 'last_requested': row[2]} for row in rows]
+
+
+def acquire_lease(name: str, holder: str, ttl: float) -> bool:
+    """
+    Take (or renew) a named lease shared by every process using the cache,
+    so only one of them runs a singleton task such as the pre-warm scheduler
+    """
+    now = time.time()
+    try:
+        connection = get_connection()
+        cursor = connection.execute(
+            "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at"
+            " WHERE leases.holder = excluded.holder OR leases.expires_at < ?",
+            (name, holder, now + ttl, now)
+        )
+        connection.commit()
+        return cursor.rowcount > 0
+    except Exception as e:
+        print(f"Research cache lease error: {e}")
+        return False
+
+
+def get_usage(provider: str, periods: List[str]) -> Dict[str, int]:
+    """
+    Calls made to a provider in each period (e.g. "day:2024-05-01", "month:2024-05")
+    """
+    return read_usage(get_connection(), provider, periods)
+
+
+def read_usage(connection: sqlite3.Connection, provider: str, periods: List[str]) -> Dict[str, int]:
+    """
+    Usage counts for each period, read on the given connection
+    """
+    placeholders = ', '.join('?' for _ in periods)
+    rows = connection.execute(
+        f"SELECT period, calls FROM provider_usage WHERE provider = ? AND period IN ({placeholders})",
+        (provider, *periods)
+    ).fetchall()
+    usage = {period: 0 for period in periods}
+    usage.update({row[0]: row[1] for row in rows})
+    return usage
+
+
+def add_usage(provider: str, periods: List[str], amount: int = 1, at_least: Optional[int] = None) -> None:
+    """
+    Count calls to a provider in each period. With at_least, raise each
+    period's count to at least that value instead (e.g. quota exhausted).
+    """
+    connection = get_connection()
+    for period in periods:
+        if at_least is None:
+            connection.execute(
+                "INSERT INTO provider_usage (provider, period, calls) VALUES (?, ?, ?)"
+                " ON CONFLICT(provider, period) DO UPDATE SET calls = calls + excluded.calls",
+                (provider, period, amount)
+            )
+        else:
+            connection.execute(
+                "INSERT INTO provider_usage (provider, period, calls) VALUES (?, ?, ?)"
+                " ON CONFLICT(provider, period) DO UPDATE SET calls = MAX(calls, excluded.calls)",
+                (provider, period, at_least)
+            )
+    connection.commit()
+
+
+def admit_usage(provider: str, periods: List[str], admit: Callable[[Dict[str, int]], bool]) -> bool:
+    """
+    Count one call in each period if admit(current usage) allows it. The read and
+    the increment run in one write transaction (BEGIN IMMEDIATE), so processes
+    sharing the database can't all admit a call against the same last credit.
+    """
+    connection = get_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        admitted = admit(read_usage(connection, provider, periods))
+        if admitted:
+            for period in periods:
+                connection.execute(
+                    "INSERT INTO provider_usage (provider, period, calls) VALUES (?, ?, 1)"
+                    " ON CONFLICT(provider, period) DO UPDATE SET calls = calls + 1",
+                    (provider, period)
+                )
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return admitted
+
+
+def llm_key(llm, prompt) -> str:
+    """
+    Cache key for a prompt sent to a particular model
+    """
+    model = getattr(llm, 'model_name', None) or getattr(llm, 'model', '')
+    text = prompt.to_string() if hasattr(prompt, 'to_string') else str(prompt)
+    return make_key(metrics.llm_provider(llm), model, getattr(llm, 'temperature', None), text)
+
+
+def get_llm_response(llm, prompt) -> Optional[str]:
+    """
+    Return the cached response text for a prompt sent to this model
+    """
+    return get('llm', llm_key(llm, prompt))
+
+
+def store_llm_response(llm, prompt, content: str) -> None:
+    """
+    Remember the response text for a prompt sent to this model
+    """
+    put('llm', llm_key(llm, prompt), content)
@@ -0,0 +1,201 @@
+"""
+Quota-aware budget for Tavily searches.
+
+Tavily plans come with a monthly credit quota. Once TAVILY_MONTHLY_QUOTA
+(and optionally a TAVILY_DAILY_QUOTA cap) is set, every search that goes
+to the network is counted per UTC day and month in the research cache
+database, so all processes on the machine share one count. Without either
+setting nothing is counted or shed. Each query
+class has a priority tier, and each tier is held back once the remaining
+quota drops below its reserve (DEFAULT_SHED_RESERVES). Quote searches and
+the optional extra portfolio queries are shed first, then news, Medium and
+images, then portfolio and company lookups. Profile URL searches keep
+running until the quota is gone.
+
+A shed search returns {"error": ...} like any other Tavily failure, and
+callers fall back as they already do. When the quota is fully spent the
+error says "usage limit", the same as Tavily's 432 response. So
+throughput degrades one query class at a time instead of every request
+hitting the limit at once. Cache hits never count against the quota.
+"""
+import os
+import contextvars
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+
+import metrics
+import research_cache
+
+# Tavily credits per calendar month (UTC), e.g. your plan's quota; 0 (default) doesn't track the month
+TAVILY_MONTHLY_QUOTA = int(os.getenv("TAVILY_MONTHLY_QUOTA", "0"))
+
+# Credits per UTC day; 0 (default) puts no daily cap on top of the monthly quota
+TAVILY_DAILY_QUOTA = int(os.getenv("TAVILY_DAILY_QUOTA", "0"))
+
+# Priority tier of each query class, 0 = most valuable
+QUERY_PRIORITIES = {
+    'profile': 0,
+    'portfolio': 1,
+    'company': 1,
+    'image': 2,
+    'news': 2,
+    'medium': 2,
+    'general': 2,
+    'quotes': 3,
+    'optional': 3,  # supplementary searches, e.g. the 4th and 5th portfolio queries
+    'prewarm': 4,   # everything the cache pre-warm scheduler runs
+}
+
+# Fraction of the daily/monthly quota held back from each tier: its queries
+# are shed once less than this share is left
+DEFAULT_SHED_RESERVES = {0: 0.0, 1: 0.05, 2: 0.15, 3: 0.3, 4: 0.5}
+
+PROVIDER = "tavily"
+
+# Lowest tier the current request may use (the pre-warm scheduler runs at 'prewarm')
+current_priority = contextvars.ContextVar("tavily_priority", default=None)
+
+
+@contextmanager
+def priority(query_class: str):
+    """
+    Treat every Tavily search in the block as no more valuable than query_class
+    """
+    token = current_priority.set(query_class)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def query_tier(query_class: str, optional: bool = False) -> int:
+    """
+    Priority tier of a search, taking the optional flag and the request's priority into account
+    """
+    tier = QUERY_PRIORITIES.get(query_class, QUERY_PRIORITIES['general'])
+    if optional:
+        tier = max(tier, QUERY_PRIORITIES['optional'])
+    floor = current_priority.get()
+    if floor is not None:
+        tier = max(tier, QUERY_PRIORITIES.get(floor, tier))
+    return tier
+
+
+def tracking_enabled() -> bool:
+    """
+    Whether any quota is configured (with neither set, searches are never counted or shed)
+    """
+    return TAVILY_MONTHLY_QUOTA > 0 or TAVILY_DAILY_QUOTA > 0
+
+
+def usage_periods(now: Optional[datetime] = None) -> List[str]:
+    """
+    The day and month usage counters for a UTC time
+    """
+    now = now or datetime.now(timezone.utc)
+    return [now.strftime("day:%Y-%m-%d"), now.strftime("month:%Y-%m")]
+
+
+def status_from_usage(usage: Dict[str, int], periods: List[str]) -> Dict:
+    """
+    Credits used and left today and this month, and the fraction left: the lower
+    of the configured quotas' (a quota of 0 isn't enforced)
+    """
+    day_period, month_period = periods
+    day_used, month_used = usage[day_period], usage[month_period]
+    day_left = max(0, TAVILY_DAILY_QUOTA - day_used) if TAVILY_DAILY_QUOTA > 0 else None
+    month_left = max(0, TAVILY_MONTHLY_QUOTA - month_used) if TAVILY_MONTHLY_QUOTA > 0 else None
+
+    fractions = []
+    if day_left is not None:
+        fractions.append(day_left / TAVILY_DAILY_QUOTA)
+    if month_left is not None:
+        fractions.append(month_left / TAVILY_MONTHLY_QUOTA)
+    return {
+        'day_used': day_used,
+        'day_quota': TAVILY_DAILY_QUOTA,
+        'day_left': day_left,
+        'month_used': month_used,
+        'month_quota': TAVILY_MONTHLY_QUOTA,
+        'month_left': month_left,
+        'fraction_left': min(fractions) if fractions else 1.0,
+    }
+
+
+def quota_status(now: Optional[datetime] = None) -> Dict:
+    """
+    Credits used and left today and this month, and the fraction left (see status_from_usage)
+    """
+    periods = usage_periods(now)
+    return status_from_usage(research_cache.get_usage(PROVIDER, periods), periods)
+
+
+def has_headroom(query_class: str) -> bool:
+    """
+    Whether searches of this class would currently be admitted (without taking a credit)
+    """
+    if not tracking_enabled():
+        return True
+    try:
+        return quota_status()['fraction_left'] > DEFAULT_SHED_RESERVES.get(query_tier(query_class), 0.0)
+    except Exception as e:
+        print(f"Tavily quota tracking error: {e}")
+        return True
+
+
+def acquire(query_class: str, optional: bool = False) -> Optional[str]:
+    """
+    Take one credit for a search. Returns None if it may run, or the reason it was shed.
+    The check and the increment are one SQLite transaction, so workers sharing
+    the database can't admit more searches together than the quota allows.
+    """
+    if not tracking_enabled():
+        return None
+
+    tier = query_tier(query_class, optional)
+    periods = usage_periods()
+    checked = {}
+
+    def admit(usage: Dict[str, int]) -> bool:
+        checked['status'] = status_from_usage(usage, periods)
+        return checked['status']['fraction_left'] > DEFAULT_SHED_RESERVES.get(tier, 0.0)
+
+    try:
+        admitted = research_cache.admit_usage(PROVIDER, periods, admit)
+    except Exception as e:
+        # Never block searches because the counter is unavailable
+        print(f"Tavily quota tracking error: {e}")
+        return None
+
+    status = checked['status']
+    taken = 1 if admitted else 0
+    for period in ('day', 'month'):
+        if status[f'{period}_left'] is not None:
+            metrics.gauge_set("tavily_quota_remaining", status[f'{period}_left'] - taken, period=period)
+    if admitted:
+        return None
+
+    metrics.inc("tavily_shed_total", query_class=query_class, tier=tier)
+    if status['day_left'] == 0 or status['month_left'] == 0:
+        return (f"Tavily usage limit reached ({status['day_used']}/{status['day_quota'] or '-'} today, "
+                f"{status['month_used']}/{status['month_quota'] or '-'} this month)")
+    return (f"Tavily {query_class} search shed to save quota "
+            f"({status['fraction_left']:.0%} left, tier {tier} needs more than {DEFAULT_SHED_RESERVES[tier]:.0%})")
+
+
+def record_exhausted() -> None:
+    """
+    Tavily answered 432 / "usage limit": the real quota is spent, whatever our count says
+    """
+    if not tracking_enabled():
+        return
+    print("⚠️ Tavily reports its usage limit reached; shedding searches until the quota resets")
+    day_period, month_period = usage_periods()
+    try:
+        if TAVILY_MONTHLY_QUOTA > 0:
+            research_cache.add_usage(PROVIDER, [month_period], at_least=TAVILY_MONTHLY_QUOTA)
+        if TAVILY_DAILY_QUOTA > 0:
+            research_cache.add_usage(PROVIDER, [day_period], at_least=TAVILY_DAILY_QUOTA)
+    except Exception as e:
+        print(f"Tavily quota tracking error: {e}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Offline tests for cooperative request cancellation
+"""
+import threading
+
+import pytest
+
+import cancellation
+import research_cache
+import tavily_quota
+from tools import search_tools
+
+
+@pytest.fixture(autouse=True)
+def cache_db(tmp_path, monkeypatch):
+    """Give each test its own empty research cache"""
+    monkeypatch.setattr(research_cache, "RESEARCH_CACHE_PATH", str(tmp_path / "research_cache.db"))
+
+
+def test_cancelled_token_stops_tavily_search(monkeypatch):
+    """A search under a cancelled token raises before it takes quota or calls Tavily"""
+    acquired = []
+    monkeypatch.setattr(tavily_quota, "acquire", lambda *args: acquired.append(args))
+
+    token = cancellation.new_token()
+    cancellation.cancel(token, "client_disconnected")
+    with cancellation.scope(token):
+        with pytest.raises(cancellation.Cancelled) as raised:
+            search_tools.tavily_search('"Marc Andreessen" latest news', query_class="news")
+
+    assert str(raised.value) == "client_disconnected"
+    assert acquired == []
+
+
+def test_cancelling_parent_cancels_children():
+    """Stage tokens follow their request's token, including ones created after it was cancelled"""
+    parent = cancellation.new_token()
+    child = cancellation.new_token(parent)
+    cancellation.cancel(parent, "superseded")
+    late_child = cancellation.new_token(parent)
+
+    assert child["event"].is_set() and child["reason"] == "superseded"
+    assert late_child["event"].is_set() and late_child["reason"] == "superseded"
+
+
+def test_sleep_wakes_up_when_cancelled():
+    """cancellation.sleep() returns early and raises once another thread cancels the token"""
+    token = cancellation.new_token()
+    threading.Timer(0.05, cancellation.cancel, (token, "deadline")).start()
+    with cancellation.scope(token):
+        with pytest.raises(cancellation.Cancelled):
+            cancellation.sleep(10)
+
+
+def test_new_search_from_same_client_supersedes_the_old_one():
+    """A client's second search cancels the one it still had running"""
+    first = cancellation.new_token()
+    second = cancellation.new_token()
+    cancellation.register_client("tab-1", first)
+    cancellation.register_client("tab-1", second)
+
+    assert first["reason"] == "superseded"
+    assert not second["event"].is_set()
+    assert cancellation.cancel_client("tab-1")
+    assert second["reason"] == "client_disconnected"
+    assert not cancellation.cancel_client("tab-1")
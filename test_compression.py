@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Offline tests for response ETags, 304s and gzip/Brotli negotiation
+"""
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, jsonify, request
+
+import compression
+
+BODY = {"investors": [{"name": f"Investor {i}", "firm": "Example Ventures"} for i in range(50)]}
+
+
+@pytest.fixture
+def client():
+    """A small app using the same after_request hook as app.py"""
+    app = Flask(__name__)
+    prepared = compression.precompress(json.dumps(BODY).encode())
+
+    @app.route("/data")
+    def data():
+        return jsonify(BODY)
+
+    @app.route("/research", methods=["POST"])
+    def research():
+        return jsonify(BODY)
+
+    @app.route("/fixed")
+    def fixed():
+        return compression.precompressed_response(request, prepared)
+
+    @app.route("/stream")
+    def stream():
+        return Response((json.dumps(BODY) for _ in range(2)), mimetype="application/json")
+
+    app.after_request(lambda response: compression.finalize_response(request, response))
+    return app.test_client()
+
+
+def test_gzip_when_brotli_not_accepted(client):
+    """A client that only accepts gzip gets a gzip body that decodes to the original"""
+    response = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert json.loads(gzip.decompress(response.data)) == BODY
+
+
+def test_brotli_preferred_when_accepted(client):
+    """Brotli wins over gzip when the client accepts both"""
+    if compression.brotli is None:
+        pytest.skip("brotli is not installed")
+    response = client.get("/data", headers={"Accept-Encoding": "gzip, deflate, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert json.loads(compression.brotli.decompress(response.data)) == BODY
+
+
+def test_identity_when_encoding_refused(client):
+    """q=0 turns an encoding off; with none left the body is sent as-is"""
+    response = client.get("/data", headers={"Accept-Encoding": "gzip;q=0, br;q=0"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json() == BODY
+
+
+def test_matching_etag_gets_empty_304(client):
+    """Repeating a request with the ETag it returned gets a 304 without a body"""
+    first = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    assert etag.endswith('-gzip"')
+
+    again = client.get("/data", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+    # The identity representation has its own tag, so the gzip one doesn't match it
+    identity = client.get("/data", headers={"If-None-Match": etag})
+    assert identity.status_code == 200
+
+
+def test_research_lookup_answers_conditional_post(client):
+    """/research is a lookup, so a POST with a matching If-None-Match gets a 304 too"""
+    etag = client.post("/research").headers["ETag"]
+    assert client.post("/research", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_precompressed_response(client):
+    """A precompress()ed body is served in the accepted encoding and honours If-None-Match"""
+    response = client.get("/fixed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data)) == BODY
+
+    again = client.get("/fixed", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_streamed_responses_pass_through(client):
+    """Streamed bodies are neither tagged nor compressed"""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert "ETag" not in response.headers
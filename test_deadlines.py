@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Offline tests for per-request deadline budgets
+"""
+import time
+import threading
+
+import cancellation
+import deadlines
+
+
+def test_run_parallel_without_budget_runs_inline():
+    """Without a budget every task runs on the calling thread and nothing is partial"""
+    caller = threading.current_thread()
+    threads = {}
+
+    def task(name):
+        threads[name] = threading.current_thread()
+        return name.upper()
+
+    results = deadlines.run_parallel(
+        "content",
+        {"news": lambda: task("news"), "tweets": lambda: task("tweets")},
+        {"news": lambda: "fallback", "tweets": lambda: "fallback"},
+    )
+    assert results == {"news": "NEWS", "tweets": "TWEETS"}
+    assert all(thread is caller for thread in threads.values())
+
+
+def test_run_parallel_with_budget_falls_back_for_slow_tasks():
+    """Under a budget a task that overruns the stage's share falls back, is marked
+    partial and has its cancellation token cancelled"""
+    stopped = threading.Event()
+
+    def slow():
+        try:
+            cancellation.sleep(10)
+        except cancellation.Cancelled:
+            stopped.set()
+            raise
+        return "too late"
+
+    with deadlines.budget(1.0) as active:
+        results = deadlines.run_parallel(
+            "content",
+            {"news": lambda: "fresh news", "medium_articles": slow},
+            {"news": lambda: "cached news", "medium_articles": lambda: []},
+        )
+
+    assert results == {"news": "fresh news", "medium_articles": []}
+    assert active["partial"] == {"medium_articles": "timeout"}
+    assert stopped.wait(2)
+
+
+def test_run_parallel_skips_tasks_when_budget_is_spent():
+    """A stage that starts with no time left goes straight to the fallbacks"""
+    ran = []
+    with deadlines.budget(0.001) as active:
+        time.sleep(0.01)
+        results = deadlines.run_parallel(
+            "content",
+            {"news": lambda: ran.append("news")},
+            {"news": lambda: "cached news"},
+        )
+
+    assert results == {"news": "cached news"}
+    assert ran == []
+    assert active["partial"] == {"news": "skipped"}
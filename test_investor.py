@@ -18,7 +18,8 @@ def test_investor_research():
         print("-" * 30)
         
         try:
-            profile, portfolio, insights = research_investor(name)
+            result = research_investor(name)
+            profile, portfolio, insights = result.profile, result.portfolio, result.insights
             
             print(f"✅ Profile found:")
             print(f"  - Name: {profile.name}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the research job queue: claiming, retries and stale jobs
+"""
+import time
+import threading
+
+import pytest
+
+import jobs
+
+
+@pytest.fixture(autouse=True)
+def jobs_db(tmp_path, monkeypatch):
+    """Give each test its own empty jobs database"""
+    monkeypatch.setattr(jobs, "JOBS_DB_PATH", str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "connections", threading.local())
+
+
+def test_claim_runs_oldest_job_once():
+    """Jobs are claimed oldest first, and each one only once"""
+    first = jobs.submit_job("Marc Andreessen")
+    second = jobs.submit_job("Mark Cuban")
+    assert first["status"] == "queued"
+
+    claimed = jobs.claim_next_job()
+    assert claimed["job_id"] == first["job_id"]
+    assert claimed["status"] == "running"
+    assert claimed["attempts"] == 1
+
+    assert jobs.claim_next_job()["job_id"] == second["job_id"]
+    assert jobs.claim_next_job() is None
+
+
+def test_failed_job_retries_with_backoff_then_fails():
+    """A failed attempt is queued again after a delay, until max_attempts is used up"""
+    job = jobs.submit_job("Peter Thiel", max_attempts=2)
+
+    claimed = jobs.claim_next_job()
+    jobs.retry_job(claimed, "Tavily timed out")
+    queued = jobs.get_job(job["job_id"])
+    assert queued["status"] == "queued"
+    assert queued["error"] == "Tavily timed out"
+    # Not due until the backoff delay has passed
+    assert jobs.claim_next_job() is None
+
+    jobs.get_connection().execute("UPDATE jobs SET run_after = ? WHERE id = ?", (time.time() - 1, job["job_id"]))
+    claimed = jobs.claim_next_job()
+    assert claimed["attempts"] == 2
+    assert claimed["error"] is None
+
+    jobs.retry_job(claimed, "Tavily timed out again")
+    failed = jobs.get_job(job["job_id"])
+    assert failed["status"] == "failed"
+    assert failed["finished_at"] is not None
+
+
+def test_stale_running_job_is_requeued():
+    """A running job whose worker stopped reporting progress is claimed again"""
+    job = jobs.submit_job("Cathie Wood")
+    jobs.claim_next_job()
+    assert jobs.claim_next_job() is None
+
+    stale = time.time() - jobs.JOB_STALE_AFTER - 1
+    jobs.get_connection().execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (stale, job["job_id"]))
+    reclaimed = jobs.claim_next_job()
+    assert reclaimed["job_id"] == job["job_id"]
+    assert reclaimed["attempts"] == 2
+
+
+def test_cancel_queued_job():
+    """Cancelling a queued job finishes it without it ever being claimed"""
+    job = jobs.submit_job("Paul Tudor Jones")
+    cancelled = jobs.cancel_job(job["job_id"])
+    assert cancelled["status"] == "cancelled"
+    assert jobs.claim_next_job() is None
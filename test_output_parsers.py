@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the research records and the /research payload schema
+"""
+import time
+
+import pydantic
+import pytest
+
+import serialization
+from investor_research import portfolio_from_data
+from output_parsers import InvestorProfile, InvestmentInsights, ResearchPayload
+
+
+def build_payload(portfolio_data):
+    """A payload shaped like build_research_payload()'s, from raw company dicts"""
+    profile = InvestorProfile(
+        name="Jane Doe", firm="Example Ventures", title="Partner", bio="",
+        profile_urls={"linkedin": "https://www.linkedin.com/in/janedoe"}, profile_image=""
+    )
+    insights = InvestmentInsights(
+        investment_themes=["AI"], sector_focus=["SaaS"], stage_preference="Seed", recent_deals=[],
+        investment_thesis="", notable_quotes=[], icebreakers=[]
+    )
+    return {
+        "success": True,
+        "profile": profile.to_dict(),
+        "portfolio": [company.to_dict() for company in portfolio_from_data(portfolio_data)],
+        "insights": insights.to_dict(),
+        "medium_articles": [],
+        "news": [],
+        "fetched_at": time.time(),
+        "partial": False,
+    }
+
+
+def test_payload_matches_schema():
+    """Untidy company data from the LLM is normalized into a payload that validates"""
+    payload = build_payload([
+        {"name": "Acme", "sector": None, "date": "2021", "investment_value": "undisclosed"},
+        {"name": "Globex", "stage": "Series A", "investment_value": 5000000},
+    ])
+    ResearchPayload.model_validate(payload)
+    assert payload["portfolio"][0]["investment_value"] == 0.0
+    assert payload["portfolio"][0]["investment_date"] == "2021"
+    assert payload["portfolio"][1]["stage"] == "Series A"
+
+
+def test_schema_rejects_malformed_payload():
+    """A profile field of the wrong type fails validation"""
+    payload = build_payload([])
+    payload["profile"]["name"] = None
+    with pytest.raises(pydantic.ValidationError):
+        ResearchPayload.model_validate(payload)
+
+
+def test_records_serialize_like_their_dicts():
+    """Records serialize the same whether or not they were converted to dicts first"""
+    profile = InvestorProfile(
+        name="Jane Doe", firm="", title="", bio="", profile_urls={}, profile_image=""
+    )
+    assert serialization.loads(serialization.dumps(profile)) == profile.to_dict()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the query planner's shared broad searches
+"""
+import time
+import threading
+import contextvars
+
+import pytest
+
+import investor_research
+import tools.search_tools
+import third_parties.news
+from tools import search_planner
+
+NEWS_RESULTS = {
+    'results': [
+        {'url': f'https://news.example.com/jane-doe-{i}', 'title': f'Jane Doe backs startup {i}',
+         'content': f'"We are early in this cycle," said Jane Doe, discussing deal {i}.'}
+        for i in range(4)
+    ],
+    'images': [],
+}
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Replace Tavily with a slow fake that records every query it is sent"""
+    sent = []
+
+    def fake_tavily_search(query, query_class="general", optional=False, max_results=None):
+        sent.append((query_class, query))
+        time.sleep(0.1)
+        return NEWS_RESULTS
+
+    monkeypatch.setattr(search_planner, "SEARCH_PLANNER_ENABLED", True)
+    monkeypatch.setattr(tools.search_tools, "tavily_search", fake_tavily_search)
+    monkeypatch.setattr(third_parties.news, "tavily_search", fake_tavily_search)
+    return sent
+
+
+def run_in_threads(*funcs):
+    """Run each function on its own thread with the caller's context (as the stage threads do)"""
+    results = [None] * len(funcs)
+
+    def run(index, func):
+        results[index] = func()
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(run, i, func))
+               for i, func in enumerate(funcs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_two_consumers_share_one_broad_search(searches):
+    """News and quote lookups running at once send a single broad news search between them"""
+    with search_planner.pool("Jane Doe"):
+        news, quotes = run_in_threads(
+            lambda: third_parties.news.fetch_investor_news("Jane Doe", limit=3, use_mock=False),
+            lambda: investor_research.search_investor_quotes("Jane Doe"),
+        )
+
+    assert [query_class for query_class, _ in searches] == ['news']
+    assert len(news) == 3
+    assert len(quotes) == 4
+
+
+def test_broad_search_runs_once_per_pool(searches):
+    """Later calls reuse the first result, and a new pool searches again"""
+    with search_planner.pool("Jane Doe"):
+        first = search_planner.broad_search('news')
+        assert search_planner.broad_search('news') is first
+    with search_planner.pool("Jane Doe"):
+        search_planner.broad_search('news')
+
+    assert len(searches) == 2
+
+
+def test_no_pool_means_no_broad_search(searches):
+    """Outside a pool consumers get None and search on their own"""
+    assert search_planner.broad_search('news') is None
+    assert search_planner.pooled_results() == []
+    assert searches == []
+
+
+def test_pooled_results_are_deduplicated(searches):
+    """Results returned by more than one broad search appear once"""
+    with search_planner.pool("Jane Doe", firm="Example Ventures"):
+        search_planner.broad_search('news')
+        search_planner.broad_search('portfolio')
+        assert len(search_planner.pooled_results()) == len(NEWS_RESULTS['results'])
+    assert 'Example Ventures' in searches[1][1]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the Tavily quota budget and per-tier shedding
+"""
+import pytest
+
+import research_cache
+import tavily_quota
+
+
+@pytest.fixture(autouse=True)
+def quota_db(tmp_path, monkeypatch):
+    """Each test gets an empty usage counter and a 100-credit monthly quota with no daily cap"""
+    monkeypatch.setattr(research_cache, "RESEARCH_CACHE_PATH", str(tmp_path / "research_cache.db"))
+    monkeypatch.setattr(tavily_quota, "TAVILY_MONTHLY_QUOTA", 100)
+    monkeypatch.setattr(tavily_quota, "TAVILY_DAILY_QUOTA", 0)
+
+
+def use_credits(count):
+    """Record count searches as already made today and this month"""
+    research_cache.add_usage(tavily_quota.PROVIDER, tavily_quota.usage_periods(), amount=count)
+
+
+def test_nothing_is_counted_without_a_quota(monkeypatch):
+    """With no quota configured every search is admitted and none is counted"""
+    monkeypatch.setattr(tavily_quota, "TAVILY_MONTHLY_QUOTA", 0)
+    assert tavily_quota.acquire("quotes") is None
+    assert tavily_quota.quota_status()['month_used'] == 0
+
+
+def test_low_priority_tiers_are_shed_first():
+    """With 20% of the quota left only quote, optional and pre-warm searches are shed"""
+    use_credits(80)
+
+    assert "quotes search shed" in tavily_quota.acquire("quotes")
+    assert tavily_quota.acquire("portfolio", optional=True) is not None
+    assert tavily_quota.acquire("prewarm") is not None
+    assert tavily_quota.quota_status()['month_used'] == 80
+
+    assert tavily_quota.acquire("profile") is None
+    assert tavily_quota.acquire("portfolio") is None
+    assert tavily_quota.acquire("news") is None
+    assert tavily_quota.quota_status()['month_used'] == 83
+
+
+def test_request_priority_lowers_every_search():
+    """Under priority('prewarm') even profile searches are held back"""
+    use_credits(60)
+    with tavily_quota.priority("prewarm"):
+        assert tavily_quota.acquire("profile") is not None
+    assert tavily_quota.acquire("profile") is None
+
+
+def test_spent_quota_sheds_every_tier():
+    """Once the quota is used up profile searches stop too, with a usage limit error"""
+    use_credits(100)
+    reason = tavily_quota.acquire("profile")
+    assert "usage limit" in reason
+
+
+def test_daily_cap_only_when_configured(monkeypatch):
+    """Daily usage is only enforced once TAVILY_DAILY_QUOTA is set"""
+    use_credits(10)
+    assert tavily_quota.quota_status()['day_left'] is None
+    assert tavily_quota.acquire("profile") is None
+
+    monkeypatch.setattr(tavily_quota, "TAVILY_DAILY_QUOTA", 10)
+    assert "usage limit" in tavily_quota.acquire("profile")
+
+
+def test_tavily_usage_limit_marks_quota_spent():
+    """A 432 from Tavily raises the count to the quota whatever it said before"""
+    use_credits(5)
+    tavily_quota.record_exhausted()
+    assert tavily_quota.quota_status()['month_left'] == 0
+    assert not tavily_quota.has_headroom("profile")
@@ -2,15 +2,24 @@
 Cloudinary setup and photo management for investor headshots
 """
 import os
+import sys
+import json
+import argparse
+import threading
 import requests
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.exceptions
 from dotenv import load_dotenv
 import time
 from urllib.parse import urlparse
 
+from third_parties import image_cache
+import metrics
+
 load_dotenv()
 
 # Configure Cloudinary
@@ -21,6 +30,30 @@ cloudinary.config(
 )
 
 
+# Bulk upload settings
+BULK_UPLOAD_WORKERS = int(os.getenv("CLOUDINARY_BULK_WORKERS", "8"))
+BULK_UPLOAD_RETRIES = int(os.getenv("CLOUDINARY_BULK_RETRIES", "3"))
+BULK_UPLOAD_MANIFEST_PATH = os.getenv(
+    "CLOUDINARY_MANIFEST_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "cloudinary_manifest.json")
+)
+
+# How often (in completed investors) the manifest is flushed during a bulk run
+BULK_MANIFEST_FLUSH_EVERY = 25
+
+# Same transform for every investor headshot
+INVESTOR_PHOTO_OPTIONS = {
+    'folder': "investors",
+    'overwrite': True,
+    'quality': "auto",
+    'fetch_format': "auto",
+    'width': 400,
+    'height': 400,
+    'crop': "fill",
+    'gravity': "face"  # Focus on face when cropping
+}
+
+
 def setup_cloudinary() -> bool:
     """
     Verify Cloudinary configuration is working
@@ -97,18 +130,12 @@ def download_and_upload_photo(investor_name: str, photo_urls: List[str]) -> Opti
                 continue
                 
             # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
-                url,
-                public_id=f"investors/{sanitized_name}",
-                folder="investors",
-                overwrite=True,
-                quality="auto",
-                fetch_format="auto",
-                width=400,
-                height=400,
-                crop="fill",
-                gravity="face"  # Focus on face when cropping
-            )
+            with metrics.external_call("cloudinary", "upload"):
+                result = cloudinary.uploader.upload(
+                    url,
+                    public_id=f"investors/{sanitized_name}",
+                    **INVESTOR_PHOTO_OPTIONS
+                )
             
             cloudinary_url = result['secure_url']
             print(f"   ✅ Uploaded successfully: {cloudinary_url}")
@@ -116,6 +143,7 @@ def download_and_upload_photo(investor_name: str, photo_urls: List[str]) -> Opti
             # Test the uploaded URL
             test_response = requests.head(cloudinary_url, timeout=5)
             if test_response.status_code == 200:
+                image_cache.store_image(investor_name, cloudinary_url, "cloudinary", kind="cloudinary")
                 return cloudinary_url
             else:
                 print(f"   ❌ Upload verification failed")
@@ -128,43 +156,196 @@ def download_and_upload_photo(investor_name: str, photo_urls: List[str]) -> Opti
     return None
 
 
-def upload_all_investor_photos() -> Dict[str, str]:
+def is_transient_upload_error(error: Exception) -> bool:
     """
-    Upload all investor photos to Cloudinary
-    Returns a mapping of investor names to Cloudinary URLs
+    Whether an upload failure may succeed on retry: rate limiting, Cloudinary 5xx
+    or network errors (the SDK reports those as GeneralError), and timeouts.
+    Bad requests (e.g. a source URL that can't be fetched), missing resources
+    and credential errors fail the same way every time.
     """
-    if not setup_cloudinary():
+    if isinstance(error, (cloudinary.exceptions.RateLimited, cloudinary.exceptions.GeneralError)):
+        return True
+    if isinstance(error, cloudinary.exceptions.Error):
+        return False
+    return isinstance(error, (TimeoutError, ConnectionError, requests.exceptions.RequestException))
+
+
+def upload_remote_photo(investor_name: str, photo_urls: List[str],
+                        retries: int = BULK_UPLOAD_RETRIES) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Upload a photo by remote URL so Cloudinary fetches it directly.
+    Transient failures are retried with exponential backoff; any other failure
+    moves on to the next source URL at once.
+    Returns (cloudinary_url, source_url), or (None, None) if every URL failed.
+    """
+    sanitized_name = investor_name.lower().replace(' ', '_').replace('-', '_')
+    
+    for url in photo_urls:
+        for attempt in range(retries):
+            try:
+                with metrics.external_call("cloudinary", "upload"):
+                    result = cloudinary.uploader.upload(
+                        url,
+                        public_id=f"investors/{sanitized_name}",
+                        **INVESTOR_PHOTO_OPTIONS
+                    )
+                return result['secure_url'], url
+            except Exception as e:
+                if attempt + 1 < retries and is_transient_upload_error(e):
+                    delay = 2 ** attempt
+                    print(f"   ⚠️ {investor_name}: {e} (retrying in {delay}s)")
+                    time.sleep(delay)
+                else:
+                    print(f"   ❌ {investor_name}: {url[:60]}... failed: {e}")
+                    # Bad credentials fail for every source URL too
+                    if isinstance(e, cloudinary.exceptions.AuthorizationRequired):
+                        return None, None
+                    break
+    
+    return None, None
+
+
+def load_photo_catalog(path: str) -> Dict[str, List[str]]:
+    """
+    Load an investor photo catalog from JSON.
+    Accepts {"investor_key": ["url", ...]} or {"investor_key": "url"}.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {key: [urls] if isinstance(urls, str) else list(urls) for key, urls in data.items()}
+
+
+def load_upload_manifest(path: str = BULK_UPLOAD_MANIFEST_PATH) -> Dict[str, Dict]:
+    """
+    Load the manifest of investors already uploaded by earlier bulk runs
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
         return {}
+    except Exception as e:
+        print(f"Manifest read error: {e}")
+        return {}
+
+
+def save_upload_manifest(manifest: Dict[str, Dict], path: str = BULK_UPLOAD_MANIFEST_PATH) -> None:
+    """
+    Write the manifest atomically so an interrupted run can resume
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Manifest write error: {e}")
+
+
+def is_upload_current(entry: Optional[Dict], photo_urls: List[str]) -> bool:
+    """
+    An investor is up to date if its asset was uploaded from a URL still in the catalog
+    """
+    return bool(entry and entry.get('cloudinary_url') and entry.get('source_url') in photo_urls)
+
+
+def bulk_upload_investor_photos(catalog: Optional[Dict[str, List[str]]] = None,
+                                workers: int = BULK_UPLOAD_WORKERS,
+                                retries: int = BULK_UPLOAD_RETRIES,
+                                manifest_path: str = BULK_UPLOAD_MANIFEST_PATH,
+                                force: bool = False) -> Dict[str, str]:
+    """
+    Upload a catalog of investor photos with a pool of workers.
     
-    photos = get_high_quality_investor_photos()
+    Investors whose manifest entry is still current are skipped (unless force),
+    so re-running over a large catalog only uploads what changed.
+    Returns a mapping of investor keys to Cloudinary URLs.
+    """
+    if catalog is None:
+        catalog = get_high_quality_investor_photos()
+    
+    manifest = load_upload_manifest(manifest_path)
+    manifest_lock = threading.Lock()
     cloudinary_urls = {}
+    pending = {}
+    
+    for investor_key, photo_urls in catalog.items():
+        entry = manifest.get(investor_key)
+        if not force and is_upload_current(entry, photo_urls):
+            cloudinary_urls[investor_key] = entry['cloudinary_url']
+        elif photo_urls:
+            pending[investor_key] = photo_urls
     
-    print(f"\n🚀 Starting photo upload for {len(photos)} investors...")
+    skipped = len(cloudinary_urls)
+    print(f"\n🚀 Bulk upload: {len(pending)} to upload, {skipped} already current, {workers} workers")
     print("=" * 60)
     
-    for investor_key, photo_urls in photos.items():
-        # Convert key to display name
-        display_name = investor_key.replace('_', ' ').title()
-        
-        print(f"\n👤 Processing: {display_name}")
-        print("-" * 40)
-        
-        cloudinary_url = download_and_upload_photo(display_name, photo_urls)
-        
-        if cloudinary_url:
-            cloudinary_urls[investor_key] = cloudinary_url
-            # Also store with display name format
-            cloudinary_urls[display_name.lower()] = cloudinary_url
-            print(f"✅ Success: {display_name}")
-        else:
-            print(f"❌ Failed: {display_name}")
+    uploaded = 0
+    failed = 0
+    resolved = {}
+    start = time.time()
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="cloudinary-bulk") as executor:
+        futures = {
+            executor.submit(upload_remote_photo, investor_key.replace('_', ' ').title(), photo_urls, retries): investor_key
+            for investor_key, photo_urls in pending.items()
+        }
         
-        # Small delay to be respectful
-        time.sleep(1)
+        for done, future in enumerate(as_completed(futures), start=1):
+            investor_key = futures[future]
+            try:
+                cloudinary_url, source_url = future.result()
+            except Exception as e:
+                print(f"   ❌ {investor_key}: {e}")
+                cloudinary_url, source_url = None, None
+            
+            if cloudinary_url:
+                uploaded += 1
+                cloudinary_urls[investor_key] = cloudinary_url
+                resolved[investor_key.replace('_', ' ')] = cloudinary_url
+                with manifest_lock:
+                    manifest[investor_key] = {
+                        'cloudinary_url': cloudinary_url,
+                        'source_url': source_url,
+                        'uploaded_at': time.time()
+                    }
+            else:
+                failed += 1
+            
+            if done % BULK_MANIFEST_FLUSH_EVERY == 0:
+                with manifest_lock:
+                    save_upload_manifest(manifest, manifest_path)
+                elapsed = time.time() - start
+                print(f"   ⏱️ {done}/{len(pending)} done ({done / elapsed:.1f} investors/s)")
+    
+    save_upload_manifest(manifest, manifest_path)
+    image_cache.store_images(resolved, "cloudinary", kind="cloudinary")
+    
+    elapsed = time.time() - start
+    rate = len(pending) / elapsed if elapsed > 0 else 0.0
+    print(f"\n📊 Bulk Upload Summary:")
+    print(f"   Uploaded: {uploaded}")
+    print(f"   Skipped (current): {skipped}")
+    print(f"   Failed: {failed}")
+    print(f"   Time: {elapsed:.1f}s ({rate:.1f} investors/s)")
+    
+    return cloudinary_urls
+
+
+def upload_all_investor_photos() -> Dict[str, str]:
+    """
+    Upload all investor photos to Cloudinary
+    Returns a mapping of investor names to Cloudinary URLs
+    """
+    if not setup_cloudinary():
+        return {}
     
-    print(f"\n📊 Upload Summary:")
-    print(f"   Success: {len(cloudinary_urls)}")
-    print(f"   Failed: {len(photos) - len(cloudinary_urls)}")
+    cloudinary_urls = {}
+    for investor_key, cloudinary_url in bulk_upload_investor_photos().items():
+        cloudinary_urls[investor_key] = cloudinary_url
+        # Also store with display name format
+        cloudinary_urls[investor_key.replace('_', ' ')] = cloudinary_url
     
     return cloudinary_urls
 
@@ -175,15 +356,21 @@ def get_cloudinary_url(investor_name: str) -> Optional[str]:
     """
     sanitized_name = investor_name.lower().replace(' ', '_').replace('-', '_')
     
+    # Skip the Admin API round trip when we already know the answer
+    cached = image_cache.get_cached_image(investor_name, kind="cloudinary")
+    if cached:
+        return cached['url']
+    
     try:
         # Try to get the image from Cloudinary (check both possible paths)
         try:
             result = cloudinary.api.resource(f"investors/investors/{sanitized_name}")
-            return result['secure_url']
         except:
             result = cloudinary.api.resource(f"investors/{sanitized_name}")
-            return result['secure_url']
+        image_cache.store_image(investor_name, result['secure_url'], "cloudinary", kind="cloudinary")
+        return result['secure_url']
     except:
+        image_cache.store_miss(investor_name, kind="cloudinary")
         return None
 
 
@@ -213,7 +400,31 @@ def list_uploaded_photos() -> List[Dict]:
         return []
 
 
-if __name__ == "__main__":
+def bulk_upload_command(argv: List[str]) -> None:
+    """
+    Command line entry point: python -m third_parties.cloudinary_setup bulk [catalog.json]
+    """
+    parser = argparse.ArgumentParser(prog="cloudinary_setup.py bulk",
+                                     description="Bulk upload investor photos to Cloudinary")
+    parser.add_argument("catalog", nargs="?", help="JSON file mapping investor keys to photo URLs")
+    parser.add_argument("--workers", type=int, default=BULK_UPLOAD_WORKERS)
+    parser.add_argument("--retries", type=int, default=BULK_UPLOAD_RETRIES)
+    parser.add_argument("--manifest", default=BULK_UPLOAD_MANIFEST_PATH)
+    parser.add_argument("--force", action="store_true", help="Re-upload investors that are already current")
+    args = parser.parse_args(argv)
+    
+    if not setup_cloudinary():
+        return
+    
+    catalog = load_photo_catalog(args.catalog) if args.catalog else None
+    bulk_upload_investor_photos(catalog, workers=args.workers, retries=args.retries,
+                                manifest_path=args.manifest, force=args.force)
+
+
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "bulk":
+    bulk_upload_command(sys.argv[2:])
+
+elif __name__ == "__main__":
     print("🖼️  Cloudinary Investor Photo Setup")
     print("=" * 50)
     
@@ -4,20 +4,83 @@ Company website and stock information enhancement
 import requests
 import re
 from typing import Optional, Dict, Tuple
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
 from dotenv import load_dotenv
 import time
+import metrics
+import cancellation
 
 load_dotenv()
 
+# Company registry: websites and tickers of well-known companies, used when searches fail
+COMPANY_WEBSITES = {
+    'paypal': 'https://www.paypal.com',
+    'palantir': 'https://www.palantir.com',
+    'meta': 'https://www.meta.com',
+    'facebook': 'https://www.facebook.com',
+    'spacex': 'https://www.spacex.com',
+    'stripe': 'https://stripe.com',
+    'twitter': 'https://twitter.com',
+    'github': 'https://github.com',
+    'pinterest': 'https://www.pinterest.com',
+    'coinbase': 'https://www.coinbase.com',
+    'tesla': 'https://www.tesla.com',
+    'netflix': 'https://www.netflix.com',
+    'uber': 'https://www.uber.com',
+    'airbnb': 'https://www.airbnb.com',
+    'linkedin': 'https://www.linkedin.com',
+    'microsoft': 'https://www.microsoft.com',
+    'google': 'https://www.google.com',
+    'apple': 'https://www.apple.com',
+    'amazon': 'https://www.amazon.com'
+}
+
+COMPANY_TICKERS = {
+    'paypal': 'PYPL',
+    'palantir': 'PLTR',
+    'meta': 'META',
+    'facebook': 'META',
+    'stripe': None,  # Private
+    'twitter': 'TWTR',  # Delisted but still reference
+    'github': 'MSFT',  # Owned by Microsoft
+    'pinterest': 'PINS',
+    'coinbase': 'COIN',
+    'tesla': 'TSLA',
+    'netflix': 'NFLX',
+    'uber': 'UBER',
+    'airbnb': 'ABNB',
+    'linkedin': 'MSFT',  # Owned by Microsoft
+    'microsoft': 'MSFT',
+    'google': 'GOOGL',
+    'apple': 'AAPL',
+    'amazon': 'AMZN'
+}
+
+# Ticker patterns, most reliable first (compiled once at import)
+TICKER_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'\(([A-Z]{1,5})\)',  # (AAPL) - most reliable
+    r'NYSE:\s*([A-Z]{1,5})',  # NYSE: AAPL
+    r'NASDAQ:\s*([A-Z]{1,5})',  # NASDAQ: AAPL
+    r'Ticker:\s*([A-Z]{1,5})',  # Ticker: AAPL
+    r'Symbol:\s*([A-Z]{1,5})',  # Symbol: AAPL
+    r'quote/([A-Z]{1,5})',  # quote/AAPL (from Yahoo Finance URLs)
+    r'trades\s+as\s+([A-Z]{1,5})',  # trades as AAPL
+    r'ticker\s+symbol\s+([A-Z]{1,5})',  # ticker symbol AAPL
+    r'stock\s+symbol\s+([A-Z]{1,5})',  # stock symbol AAPL
+]]
+
+# Uppercase words the ticker patterns pick up that aren't tickers
+NOT_TICKERS = frozenset([
+    'THE', 'AND', 'FOR', 'ARE', 'WITH', 'ALSO', 'THIS', 'THAT', 'FROM', 'WILL', 'CAN', 'HAS', 'BUT', 'NOT', 'ALL',
+    'ANY', 'ITS', 'WAS', 'HER', 'HIS', 'OUR', 'YOU', 'SHE', 'HIM', 'NYSE', 'NASDAQ', 'SEARC', 'XFLT',
+])
+
 
 def get_company_website(company_name: str) -> Optional[str]:
     """
     Find company website using simple internet search - use first search result
     """
     try:
-        search = TavilySearch()
-        
         # Clean company name for better search
         clean_name = company_name.replace(' Inc.', '').replace(' LLC', '').replace(' Corp.', '').replace(' Ltd.', '')
         
@@ -40,7 +103,7 @@ def get_company_website(company_name: str) -> Optional[str]:
         
         for query in queries:
             print(f"🔍 Searching: {query}")
-            results = search.run(query)
+            results = tavily_search(query, query_class="company")
             
             if isinstance(results, dict) and 'results' in results:
                 # Check first few results for actual company website
@@ -76,8 +139,7 @@ def get_company_website(company_name: str) -> Optional[str]:
                             return url
                 
             # Small delay between searches
-            import time
-            time.sleep(0.5)
+            cancellation.sleep(0.5)
         
         print(f"ℹ️ No website found for {company_name}")
         return get_fallback_website(company_name)
@@ -95,30 +157,8 @@ def get_fallback_website(company_name: str) -> Optional[str]:
     """
     Fallback website URLs for well-known companies when API limits are hit
     """
-    fallbacks = {
-        'paypal': 'https://www.paypal.com',
-        'palantir': 'https://www.palantir.com',
-        'meta': 'https://www.meta.com',
-        'facebook': 'https://www.facebook.com',
-        'spacex': 'https://www.spacex.com',
-        'stripe': 'https://stripe.com',
-        'twitter': 'https://twitter.com',
-        'github': 'https://github.com',
-        'pinterest': 'https://www.pinterest.com',
-        'coinbase': 'https://www.coinbase.com',
-        'tesla': 'https://www.tesla.com',
-        'netflix': 'https://www.netflix.com',
-        'uber': 'https://www.uber.com',
-        'airbnb': 'https://www.airbnb.com',
-        'linkedin': 'https://www.linkedin.com',
-        'microsoft': 'https://www.microsoft.com',
-        'google': 'https://www.google.com',
-        'apple': 'https://www.apple.com',
-        'amazon': 'https://www.amazon.com'
-    }
-    
     name_lower = company_name.lower().strip()
-    for key, url in fallbacks.items():
+    for key, url in COMPANY_WEBSITES.items():
         if key in name_lower:
             print(f"✅ Using fallback website for {company_name}: {url}")
             return url
@@ -134,8 +174,6 @@ def get_stock_info(company_name: str) -> Tuple[Optional[str], Optional[str]]:
     Returns (ticker_symbol, yahoo_finance_url)
     """
     try:
-        search = TavilySearch()
-        
         # Search specifically for stock ticker information
         queries = [
             f'"{company_name}" NYSE NASDAQ stock ticker',
@@ -144,7 +182,7 @@ def get_stock_info(company_name: str) -> Tuple[Optional[str], Optional[str]]:
         
         for query in queries:
             print(f"🔍 Searching stock info: {query}")
-            results = search.run(query)
+            results = tavily_search(query, query_class="company")
             
             if isinstance(results, dict) and 'results' in results:
                 for result in results['results'][:5]:
@@ -161,8 +199,7 @@ def get_stock_info(company_name: str) -> Tuple[Optional[str], Optional[str]]:
                         return ticker, yahoo_url
             
             # Small delay between queries
-            import time
-            time.sleep(0.5)
+            cancellation.sleep(0.5)
         
         print(f"ℹ️ No stock info found for {company_name}")
         return get_fallback_stock_info(company_name)
@@ -180,29 +217,8 @@ def get_fallback_stock_info(company_name: str) -> Tuple[Optional[str], Optional[
     """
     Fallback stock tickers for well-known public companies when API limits are hit
     """
-    stock_fallbacks = {
-        'paypal': 'PYPL',
-        'palantir': 'PLTR',
-        'meta': 'META',
-        'facebook': 'META',
-        'stripe': None,  # Private
-        'twitter': 'TWTR',  # Delisted but still reference
-        'github': 'MSFT',  # Owned by Microsoft
-        'pinterest': 'PINS',
-        'coinbase': 'COIN',
-        'tesla': 'TSLA',
-        'netflix': 'NFLX',
-        'uber': 'UBER',
-        'airbnb': 'ABNB',
-        'linkedin': 'MSFT',  # Owned by Microsoft
-        'microsoft': 'MSFT',
-        'google': 'GOOGL',
-        'apple': 'AAPL',
-        'amazon': 'AMZN'
-    }
-    
     name_lower = company_name.lower().strip()
-    for key, ticker in stock_fallbacks.items():
+    for key, ticker in COMPANY_TICKERS.items():
         if key in name_lower:
             if ticker:
                 yahoo_url = f"https://finance.yahoo.com/quote/{ticker}"
@@ -219,28 +235,15 @@ def extract_ticker_from_content(content: str, company_name: str) -> Optional[str
     """
     Extract stock ticker symbol from text content
     """
-    # Look for ticker patterns - prioritize more reliable patterns
-    ticker_patterns = [
-        r'\(([A-Z]{1,5})\)',  # (AAPL) - most reliable
-        r'NYSE:\s*([A-Z]{1,5})',  # NYSE: AAPL
-        r'NASDAQ:\s*([A-Z]{1,5})',  # NASDAQ: AAPL  
-        r'Ticker:\s*([A-Z]{1,5})',  # Ticker: AAPL
-        r'Symbol:\s*([A-Z]{1,5})',  # Symbol: AAPL
-        r'quote/([A-Z]{1,5})',  # quote/AAPL (from Yahoo Finance URLs)
-        r'trades\s+as\s+([A-Z]{1,5})',  # trades as AAPL
-        r'ticker\s+symbol\s+([A-Z]{1,5})',  # ticker symbol AAPL
-        r'stock\s+symbol\s+([A-Z]{1,5})',  # stock symbol AAPL
-    ]
-    
     found_tickers = []
     
-    for pattern in ticker_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
+    for pattern in TICKER_PATTERNS:
+        matches = pattern.findall(content)
         for match in matches:
             ticker = match.upper()
             # Validate ticker (reasonable length, not common words, not exchange names)
             if (2 <= len(ticker) <= 5 and 
-                ticker not in ['THE', 'AND', 'FOR', 'ARE', 'WITH', 'ALSO', 'THIS', 'THAT', 'FROM', 'WILL', 'CAN', 'HAS', 'BUT', 'NOT', 'ALL', 'ANY', 'ITS', 'WAS', 'HER', 'HIS', 'OUR', 'YOU', 'SHE', 'HIM', 'NYSE', 'NASDAQ', 'SEARC', 'XFLT'] and
+                ticker not in NOT_TICKERS and
                 not ticker.startswith('HTTP')):
                 found_tickers.append(ticker)
     
@@ -279,7 +282,7 @@ def enhance_company_with_links(company_name: str) -> Dict[str, str]:
     website = get_company_website(company_name)
     
     # Small delay to be respectful to APIs
-    time.sleep(0.5)
+    cancellation.sleep(0.5)
     
     # Get stock info
     stock_symbol, yahoo_url = get_stock_info(company_name)
@@ -299,6 +302,7 @@ def enhance_company_with_links(company_name: str) -> Dict[str, str]:
     return result
 
 
+@metrics.timed()
 def enhance_portfolio_companies(companies: list) -> list:
     """
     Enhance a list of portfolio companies with website and stock links
@@ -320,13 +324,11 @@ def enhance_portfolio_companies(companies: list) -> list:
         # Get enhanced links
         links = enhance_company_with_links(company_name)
         
-        # Add to company data
-        enhanced_company = company.copy()
-        enhanced_company.update(links)
-        enhanced_companies.append(enhanced_company)
+        # Add to company data (a new dict: mock portfolios are shared and must not change)
+        enhanced_companies.append(dict(company, **links))
         
         # Rate limiting
-        time.sleep(1)
+        cancellation.sleep(1)
     
     print(f"\n🎉 Enhanced {len(enhanced_companies)} companies!")
     return enhanced_companies
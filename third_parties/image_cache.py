@@ -0,0 +1,325 @@
+"""
+Persistent investor name -> image URL cache with negative caching.
+
+Remembers which image we resolved for an investor (and when we last checked
+it), plus "nothing found" results such as an investor with no Wikipedia
+image, so repeat profile views skip every image network call. Stale entries
+are still served and get re-verified on a background thread.
+
+Lookups and stores only touch the in-memory entries. Changes are written
+to disk by a background thread at most every IMAGE_CACHE_FLUSH_INTERVAL
+seconds (and at exit), so the hedged image threads never wait on file I/O.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+from typing import Optional, Dict, Callable
+
+import metrics
+
+# Where the cache lives on disk (shared by all workers on the same machine)
+IMAGE_CACHE_PATH = os.getenv(
+    "IMAGE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "image_cache.json")
+)
+
+# How long a verified image URL is trusted before it is re-verified (seconds)
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", str(7 * 24 * 3600)))
+
+# How long a negative entry ("no image found") is trusted (seconds)
+IMAGE_CACHE_NEGATIVE_TTL = float(os.getenv("IMAGE_CACHE_NEGATIVE_TTL", str(24 * 3600)))
+
+# How often the background thread sweeps for stale entries (seconds)
+IMAGE_CACHE_REVERIFY_INTERVAL = float(os.getenv("IMAGE_CACHE_REVERIFY_INTERVAL", "600"))
+
+# How long changes are batched before the cache file is rewritten (seconds)
+IMAGE_CACHE_FLUSH_INTERVAL = float(os.getenv("IMAGE_CACHE_FLUSH_INTERVAL", "5"))
+
+cache_lock = threading.RLock()
+cache_entries: Optional[Dict[str, Dict]] = None
+
+# Set when the in-memory entries have changes that aren't on disk yet
+cache_dirty = threading.Event()
+flush_lock = threading.Lock()
+flush_thread: Optional[threading.Thread] = None
+
+reverify_queue = set()
+reverify_wakeup = threading.Event()
+reverify_thread: Optional[threading.Thread] = None
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an investor name for use as a cache key
+    """
+    return ' '.join(name.lower().split())
+
+
+def cache_key(name: str, kind: str) -> str:
+    """
+    Build the cache key for a lookup kind ('image', 'cloudinary', 'wikipedia', ...)
+    """
+    return f"{kind}:{normalize_name(name)}"
+
+
+def load_entries() -> Dict[str, Dict]:
+    """
+    Load the cache file once per process
+    """
+    global cache_entries
+    with cache_lock:
+        if cache_entries is None:
+            cache_entries = read_cache_file()
+        return cache_entries
+
+
+def read_cache_file() -> Dict[str, Dict]:
+    """
+    Read entries from disk, returning an empty cache if the file is missing or corrupt
+    """
+    try:
+        with open(IMAGE_CACHE_PATH, 'r') as f:
+            data = json.load(f)
+        return data.get('entries', {}) if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Image cache read error: {e}")
+        return {}
+
+
+def write_entries(entries: Dict[str, Dict]) -> None:
+    """
+    Write the cache to disk atomically, keeping newer entries written by other workers
+    """
+    try:
+        merged = read_cache_file()
+        for key, entry in entries.items():
+            existing = merged.get(key)
+            if not existing or existing.get('verified_at', 0) <= entry.get('verified_at', 0):
+                merged[key] = entry
+        for key in [key for key, entry in merged.items() if entry.get('deleted')]:
+            merged.pop(key)
+
+        os.makedirs(os.path.dirname(IMAGE_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{IMAGE_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': 1, 'entries': merged}, f)
+        os.replace(tmp_path, IMAGE_CACHE_PATH)
+    except Exception as e:
+        print(f"Image cache write error: {e}")
+
+
+def flush() -> None:
+    """
+    Write pending changes to disk now (the flush thread and exit do this on their own)
+    """
+    with flush_lock:
+        with cache_lock:
+            if not cache_dirty.is_set() or cache_entries is None:
+                return
+            cache_dirty.clear()
+            snapshot = dict(cache_entries)
+        write_entries(snapshot)
+
+
+def flush_loop() -> None:
+    """
+    Write batched changes to disk once they have waited IMAGE_CACHE_FLUSH_INTERVAL
+    """
+    while True:
+        cache_dirty.wait()
+        time.sleep(IMAGE_CACHE_FLUSH_INTERVAL)
+        flush()
+
+
+def mark_dirty() -> None:
+    """
+    Note that the entries changed, starting the flush thread if this process has none
+    (threads don't survive a fork, so each worker starts its own)
+    """
+    global flush_thread
+    with cache_lock:
+        cache_dirty.set()
+        if flush_thread is None or not flush_thread.is_alive():
+            flush_thread = threading.Thread(target=flush_loop, name="image-cache-flush", daemon=True)
+            flush_thread.start()
+
+
+atexit.register(flush)
+
+
+def is_expired(entry: Dict) -> bool:
+    """
+    Negative and fallback entries expire; positive ones are only re-verified
+    """
+    return entry.get('url') is None or entry.get('source') == 'fallback'
+
+
+def is_stale(entry: Dict) -> bool:
+    """
+    Check whether an entry is past its trust window
+    """
+    ttl = IMAGE_CACHE_NEGATIVE_TTL if is_expired(entry) else IMAGE_CACHE_TTL
+    return time.time() - entry.get('verified_at', 0) > ttl
+
+
+def get_cached_image(name: str, kind: str = "image") -> Optional[Dict]:
+    """
+    Return the cached entry for a name, or None if we have to look it up.
+
+    Entries look like {"url": str | None, "source": str, "verified_at": float}.
+    A url of None is a negative entry. Expired negative entries are dropped;
+    stale positive entries are returned and queued for re-verification.
+    """
+    entry = load_entries().get(cache_key(name, kind))
+    if not entry or entry.get('deleted') or (is_stale(entry) and is_expired(entry)):
+        metrics.record_cache(f"image_{kind}", hit=False)
+        return None
+
+    if is_stale(entry):
+        schedule_reverification(name, kind)
+    metrics.record_cache(f"image_{kind}", hit=True)
+    return entry
+
+
+def store_image(name: str, url: str, source: str, kind: str = "image") -> None:
+    """
+    Remember a resolved image URL
+    """
+    with cache_lock:
+        load_entries()[cache_key(name, kind)] = {
+            'url': url,
+            'source': source,
+            'verified_at': time.time()
+        }
+        mark_dirty()
+
+
+def replace_image(name: str, url: str, source: str, replaceable_sources, kind: str = "image") -> bool:
+    """
+    Store an image URL unless the entry holds one from a source not listed in
+    replaceable_sources (for example a higher-priority strategy's winner).
+    Returns whether the entry was written.
+    """
+    with cache_lock:
+        entries = load_entries()
+        current = entries.get(cache_key(name, kind))
+        if current and not current.get('deleted') and current.get('source') not in replaceable_sources:
+            return False
+        entries[cache_key(name, kind)] = {'url': url, 'source': source, 'verified_at': time.time()}
+        mark_dirty()
+        return True
+
+
+def store_images(urls: Dict[str, str], source: str, kind: str = "image") -> None:
+    """
+    Remember many resolved image URLs at once (used by bulk uploads)
+    """
+    if not urls:
+        return
+    with cache_lock:
+        entries = load_entries()
+        now = time.time()
+        for name, url in urls.items():
+            entries[cache_key(name, kind)] = {'url': url, 'source': source, 'verified_at': now}
+        mark_dirty()
+
+
+def store_miss(name: str, kind: str) -> None:
+    """
+    Remember that a lookup found nothing (for example no Wikipedia image)
+    """
+    with cache_lock:
+        load_entries()[cache_key(name, kind)] = {
+            'url': None,
+            'source': 'miss',
+            'verified_at': time.time()
+        }
+        mark_dirty()
+
+
+def invalidate(name: str, kind: str = "image") -> None:
+    """
+    Forget an entry so the next lookup goes to the network again
+    """
+    with cache_lock:
+        entries = load_entries()
+        key = cache_key(name, kind)
+        if key in entries:
+            entries[key] = {'deleted': True, 'verified_at': time.time()}
+            mark_dirty()
+
+
+def schedule_reverification(name: str, kind: str = "image") -> None:
+    """
+    Queue a stale entry for the background re-verification thread
+    """
+    with cache_lock:
+        reverify_queue.add(cache_key(name, kind))
+    reverify_wakeup.set()
+
+
+def start_background_reverification(verify: Callable[[str], bool]) -> None:
+    """
+    Start the daemon thread that re-checks stale image URLs (idempotent).
+
+    verify is called with a cached URL and should return False once the
+    image is gone, in which case the entry is dropped.
+    """
+    global reverify_thread
+    with cache_lock:
+        if reverify_thread is not None and reverify_thread.is_alive():
+            return
+        reverify_thread = threading.Thread(
+            target=reverification_loop, args=(verify,), name="image-cache-reverify", daemon=True
+        )
+        reverify_thread.start()
+
+
+def reverification_loop(verify: Callable[[str], bool]) -> None:
+    """
+    Re-verify queued entries as they arrive and sweep for stale ones periodically
+    """
+    while True:
+        reverify_wakeup.wait(IMAGE_CACHE_REVERIFY_INTERVAL)
+        reverify_wakeup.clear()
+
+        with cache_lock:
+            entries = load_entries()
+            keys = set(reverify_queue)
+            reverify_queue.clear()
+            keys.update(key for key, entry in entries.items()
+                        if not entry.get('deleted') and is_stale(entry))
+
+        changed = False
+        for key in keys:
+            entry = entries.get(key)
+            if not entry or entry.get('deleted'):
+                continue
+
+            if is_expired(entry):
+                # Negative and fallback entries are simply forgotten
+                with cache_lock:
+                    entries[key] = {'deleted': True, 'verified_at': time.time()}
+                changed = True
+                continue
+
+            try:
+                still_valid = verify(entry['url'])
+            except Exception as e:
+                print(f"Image cache re-verification error: {e}")
+                continue
+
+            with cache_lock:
+                if still_valid:
+                    entries[key] = dict(entry, verified_at=time.time())
+                else:
+                    print(f"🗑️ Cached image no longer valid: {entry['url']}")
+                    entries[key] = {'deleted': True, 'verified_at': time.time()}
+            changed = True
+
+        if changed:
+            mark_dirty()
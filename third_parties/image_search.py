@@ -2,84 +2,252 @@
 Image search and management for investor photos
 """
 import os
+import time
 import requests
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Tuple, Callable
 from dotenv import load_dotenv
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
+from tools import search_planner
+import metrics
+import tracing
+import cancellation
+
+from third_parties import image_cache
 
 load_dotenv()
 
-# Import Cloudinary functionality
-try:
-    import sys
-    import os
-    sys.path.append(os.path.dirname(__file__))
-    from cloudinary_setup import get_cloudinary_url, setup_cloudinary
-    from wikipedia_images import get_dynamic_investor_image
-    CLOUDINARY_AVAILABLE = True
-    DYNAMIC_SEARCH_AVAILABLE = True
-except ImportError as e:
-    print(f"Cloudinary import failed: {e}")
-    CLOUDINARY_AVAILABLE = False
-    DYNAMIC_SEARCH_AVAILABLE = False
+# Overall time budget for one image lookup across all strategies (seconds)
+IMAGE_SEARCH_DEADLINE = float(os.getenv("IMAGE_SEARCH_DEADLINE", "8"))
+
+# The Wikipedia -> Cloudinary strategy waits this long for an existing Cloudinary
+# image before starting (seconds), so it doesn't search and upload needlessly
+DYNAMIC_IMAGE_HEDGE_DELAY = float(os.getenv("DYNAMIC_IMAGE_HEDGE_DELAY", "0.5"))
+
+# Tavily costs API quota, so it only starts once the free strategies have
+# failed or have been running longer than this (seconds)
+TAVILY_IMAGE_HEDGE_DELAY = float(os.getenv("TAVILY_IMAGE_HEDGE_DELAY", "1.5"))
+
+# Shared pool for racing image strategies. Losing strategies are left to
+# finish in the background rather than blocking the request.
+image_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="image-search")
 
+# Cloudinary functionality. The SDK is slow to import, so the Cloudinary-backed
+# strategies import it when they first run; here we only check it is installed.
+import importlib.util
+CLOUDINARY_AVAILABLE = importlib.util.find_spec("cloudinary") is not None
+DYNAMIC_SEARCH_AVAILABLE = CLOUDINARY_AVAILABLE
+if not CLOUDINARY_AVAILABLE:
+    print("Cloudinary is not installed; skipping Cloudinary image strategies")
 
-def search_investor_image(investor_name: str, firm: str = "") -> Optional[str]:
+
+def search_investor_image(investor_name: str, firm: str = "", deadline: float = IMAGE_SEARCH_DEADLINE) -> str:
     """
-    Search for investor images using multiple strategies with dynamic Wikipedia integration
+    Search for investor images using multiple strategies with dynamic Wikipedia integration.
+    
+    Strategies are raced instead of tried one after another: the free ones
+    start together (Wikipedia shortly after, unless no Cloudinary upload
+    exists), Tavily joins as a hedge, and the highest-priority
+    strategy that returns a verified URL wins. A lower-priority result is
+    only used once every strategy above it has failed, or when the deadline
+    passes. Falls back to a generated avatar.
     """
+    # Started before the lookup: cache hits are what queue entries for re-verification
+    image_cache.start_background_reverification(verify_image_url)
+
+    # Serve the image we resolved last time without any network calls
+    cached = image_cache.get_cached_image(investor_name)
+    if cached:
+        print(f"✅ Using cached {cached['source']} image: {cached['url']}")
+        return cached['url']
+
+    strategies = get_image_strategies()
+    futures = [None] * len(strategies)
+    started_at = time.monotonic()
+    
+    while True:
+        elapsed = time.monotonic() - started_at
+        
+        # Launch any strategy whose hedge delay has passed, or whose
+        # higher-priority strategies have all already failed
+        for i, (name, strategy, start_delay) in enumerate(strategies):
+            if futures[i] is None and (
+                elapsed >= start_delay or
+                all(f is not None and f.done() and not f.result() for f in futures[:i])
+            ):
+                futures[i] = image_search_executor.submit(
+                    tracing.bind(run_image_strategy), name, strategy, investor_name, firm
+                )
+        
+        # Walk strategies in priority order; stop at the first one still pending
+        for i, future in enumerate(futures):
+            if future is None or not future.done():
+                break
+            image_url = future.result()
+            if image_url:
+                print(f"✅ Image strategy '{strategies[i][0]}' won after {time.monotonic() - started_at:.2f}s: {image_url}")
+                image_cache.store_image(investor_name, image_url, strategies[i][0])
+                return image_url
+        else:
+            # Every strategy finished without a usable image - remember the
+            # avatar for a while instead of repeating all of the lookups
+            fallback_url = get_fallback_image(investor_name)
+            image_cache.store_image(investor_name, fallback_url, "fallback")
+            return fallback_url
+        
+        remaining = deadline - elapsed
+        if remaining <= 0:
+            print(f"⏱️ Image search deadline of {deadline:.1f}s reached for {investor_name}")
+            break
+        
+        # Sleep until a strategy finishes or the next hedge is due
+        next_launch = min(
+            (start_delay - elapsed for (_, _, start_delay), f in zip(strategies, futures)
+             if f is None and start_delay > elapsed),
+            default=remaining
+        )
+        pending = [f for f in futures if f is not None and not f.done()]
+        wait(pending, timeout=min(remaining, next_launch), return_when=FIRST_COMPLETED)
+    
+    # Deadline passed: take the best result that did come back in time
+    winner = None
+    for i, future in enumerate(futures):
+        if future is not None and future.done() and future.result():
+            winner = i
+            print(f"✅ Using '{strategies[i][0]}' image found before the deadline")
+            image_cache.store_image(investor_name, future.result(), strategies[i][0])
+            break
+    
+    # Higher-priority strategies still running update the cache for next time
+    for i, future in enumerate(futures[:winner]):
+        if future is not None and not future.done():
+            future.add_done_callback(
+                lambda f, source=strategies[i][0]: store_late_result(investor_name, f, source)
+            )
+    
+    if winner is not None:
+        return futures[winner].result()
+    
+    # Generate professional avatar as fallback
+    return get_fallback_image(investor_name)
+
+
+def store_late_result(investor_name: str, future, source: str) -> None:
+    """
+    Cache the image a strategy found after the request had moved on
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    image_url = future.result()
+    if image_url:
+        image_cache.store_image(investor_name, image_url, source)
+
+
+def get_image_strategies() -> List[Tuple[str, Callable[[str, str], Optional[str]], float]]:
+    """
+    Image strategies in priority order as (name, function, start delay in seconds)
+    """
+    strategies = []
     
     # Strategy 1: Try existing Cloudinary images first (fastest)
     if CLOUDINARY_AVAILABLE:
-        try:
-            cloudinary_url = get_cloudinary_url(investor_name)
-            if cloudinary_url and verify_image_url(cloudinary_url):
-                print(f"✅ Found existing Cloudinary image: {cloudinary_url}")
-                return cloudinary_url
-        except Exception as e:
-            print(f"Cloudinary search error: {e}")
-    
-    # Strategy 2: Dynamic Wikipedia -> Cloudinary workflow (NEW!)
+        strategies.append(("cloudinary", find_cloudinary_image, 0.0))
+    
+    # Strategy 2: Dynamic Wikipedia -> Cloudinary workflow
     if DYNAMIC_SEARCH_AVAILABLE:
-        try:
-            dynamic_url = get_dynamic_investor_image(investor_name)
-            if dynamic_url and verify_image_url(dynamic_url):
-                print(f"🎉 Found/created dynamic image: {dynamic_url}")
-                return dynamic_url
-        except Exception as e:
-            print(f"Dynamic search error: {e}")
+        # Started behind "cloudinary" so an existing upload can win first
+        strategies.append(("dynamic", find_dynamic_image, DYNAMIC_IMAGE_HEDGE_DELAY))
     
     # Strategy 3: Try curated/known good URLs
-    curated_images = get_curated_images()
-    if investor_name.lower() in curated_images:
-        urls = curated_images[investor_name.lower()]
-        if isinstance(urls, str):
-            urls = [urls]
-        
-        # Try each URL until one works
-        for image_url in urls:
-            if verify_image_url(image_url):
-                print(f"Found working curated image: {image_url}")
-                return image_url
+    strategies.append(("curated", find_curated_image, 0.0))
+    
+    # Strategy 4: Use Tavily to search for images (uses API quota)
+    strategies.append(("tavily", find_tavily_image, TAVILY_IMAGE_HEDGE_DELAY))
     
-    # Strategy 4: Use Tavily to search for images
+    return strategies
+
+
+def run_image_strategy(name: str, strategy: Callable[[str, str], Optional[str]], investor_name: str, firm: str) -> Optional[str]:
+    """
+    Run one image strategy, turning errors into a miss
+    """
     try:
-        search = TavilySearch()
-        query = f'"{investor_name}" {firm} professional headshot photo'
-        results = search.run(query, include_images=True)
-        
-        if isinstance(results, dict) and 'images' in results:
-            for image in results['images'][:3]:  # Try first 3 images
-                image_url = image.get('url', '')
-                if image_url and verify_image_url(image_url):
-                    print(f"Found image via Tavily: {image_url}")
-                    return image_url
-                    
+        return strategy(investor_name, firm)
+    except cancellation.Cancelled:
+        # The request was abandoned; the lookup is simply a miss
+        return None
     except Exception as e:
-        print(f"Tavily image search error: {e}")
+        print(f"{name.title()} image search error: {e}")
+        return None
+
+
+def find_cloudinary_image(investor_name: str, firm: str = "") -> Optional[str]:
+    """
+    Look up a previously uploaded Cloudinary photo
+    """
+    from third_parties.cloudinary_setup import get_cloudinary_url
+    cloudinary_url = get_cloudinary_url(investor_name)
+    if cloudinary_url and verify_image_url(cloudinary_url):
+        print(f"✅ Found existing Cloudinary image: {cloudinary_url}")
+        return cloudinary_url
+    return None
+
+
+def find_dynamic_image(investor_name: str, firm: str = "") -> Optional[str]:
+    """
+    Find a Wikipedia photo and mirror it to Cloudinary
+    """
+    from third_parties.wikipedia_images import get_dynamic_investor_image
+    dynamic_url = get_dynamic_investor_image(investor_name)
+    if dynamic_url and verify_image_url(dynamic_url):
+        print(f"🎉 Found/created dynamic image: {dynamic_url}")
+        return dynamic_url
+    return None
+
+
+def find_curated_image(investor_name: str, firm: str = "") -> Optional[str]:
+    """
+    Try curated/known good URLs for well-known investors
+    """
+    curated_images = get_curated_images()
+    if investor_name.lower() not in curated_images:
+        return None
+    
+    urls = curated_images[investor_name.lower()]
+    if isinstance(urls, str):
+        urls = [urls]
     
-    # Strategy 5: Generate professional avatar as fallback
-    return f"https://ui-avatars.com/api/?name={investor_name.replace(' ', '+')}&size=300&background=4A90E2&color=fff&bold=true&format=png"
+    # Try each URL until one works
+    for image_url in urls:
+        if verify_image_url(image_url):
+            print(f"Found working curated image: {image_url}")
+            return image_url
+    return None
+
+
+def find_tavily_image(investor_name: str, firm: str = "") -> Optional[str]:
+    """
+    Use Tavily image search for a professional headshot
+    """
+    # The query planner's broad profile search asks for images too. The profile
+    # lookup has usually run it already, in which case this costs nothing extra.
+    search_planner.broad_search('profile')
+    for image_url in search_planner.pooled_images()[:3]:
+        if verify_image_url(image_url):
+            print(f"Found image in shared Tavily results: {image_url}")
+            return image_url
+    search_planner.record_follow_up("image")
+    
+    query = f'"{investor_name}" {firm} professional headshot photo'
+    results = tavily_search({"query": query, "include_images": True}, query_class="image")
+    
+    if isinstance(results, dict) and 'images' in results:
+        for image in results['images'][:3]:  # Try first 3 images
+            image_url = image.get('url', '') if isinstance(image, dict) else image
+            if image_url and verify_image_url(image_url):
+                print(f"Found image via Tavily: {image_url}")
+                return image_url
+    return None
 
 
 def get_curated_images() -> dict:
@@ -130,8 +298,10 @@ def verify_image_url(url: str, timeout: int = 5) -> bool:
     """
     Verify that an image URL is accessible and returns an actual image
     """
+    cancellation.check()
     try:
-        response = requests.head(url, timeout=timeout)
+        with metrics.external_call("image_host", "verify"):
+            response = requests.head(url, timeout=timeout)
         return (response.status_code == 200 and 
                 'image' in response.headers.get('content-type', '').lower())
     except:
@@ -2,10 +2,13 @@ import os
 import requests
 from typing import List, Dict
 from dotenv import load_dotenv
+import metrics
+import mock_data
 
 load_dotenv()
 
 
+@metrics.timed()
 def fetch_medium_articles(medium_url: str, mock: bool = False, investor_name: str = "") -> List[Dict]:
     """
     Fetch Medium articles ABOUT an investor (not BY them).
@@ -13,29 +16,7 @@ def fetch_medium_articles(medium_url: str, mock: bool = False, investor_name: st
     """
     if mock:
         # Return mock Medium articles for testing
-        return [
-            {
-                "title": "The End of Software as We Know It",
-                "excerpt": "AI is not just another tool in the software development toolkit. It represents a fundamental shift in how we create, deploy, and maintain software systems...",
-                "date": "2024-01-12",
-                "read_time": "8 min",
-                "claps": 3421
-            },
-            {
-                "title": "Why We're Investing in Climate Tech Now",
-                "excerpt": "The convergence of AI, IoT, and renewable energy has created an unprecedented opportunity for innovation in climate technology...",
-                "date": "2023-12-28",
-                "read_time": "6 min",
-                "claps": 2156
-            },
-            {
-                "title": "The Next Platform Shift: Thoughts on Spatial Computing",
-                "excerpt": "As we move beyond screens into spatial computing, we're seeing the early signs of a platform shift as significant as the transition from desktop to mobile...",
-                "date": "2023-12-15",
-                "read_time": "10 min",
-                "claps": 1892
-            }
-        ]
+        return mock_data.get("medium_articles", investor_name)
     
     # Real implementation - search for articles ABOUT the investor
     try:
@@ -1,9 +1,11 @@
 """
 Fetch Medium articles ABOUT an investor (not BY them)
 """
+import os
 import requests
 from typing import List, Dict, Optional
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
+from tools import search_planner
 from dotenv import load_dotenv
 import re
 from bs4 import BeautifulSoup
@@ -11,9 +13,38 @@ from urllib.parse import urlparse
 import json
 import time
 from datetime import datetime, timedelta
+import metrics
+import cancellation
 
 load_dotenv()
 
+# Medium site root (overridable for the load-test stand-ins)
+MEDIUM_BASE_URL = os.getenv("MEDIUM_BASE_URL", "https://medium.com")
+
+# Patterns compiled once at import (shared by forked web workers)
+RELATIVE_DATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'(\d+\s+days?\s+ago)',
+    r'(\d+\s+weeks?\s+ago)',
+    r'(\d+\s+months?\s+ago)',
+    r'(\d+\s+years?\s+ago)',
+    r'(a\s+day\s+ago)',
+    r'(a\s+week\s+ago)',
+    r'(a\s+month\s+ago)',
+    r'(a\s+year\s+ago)',
+)]
+ARTICLE_URL_PATTERNS = [re.compile(pattern) for pattern in (
+    r'https://medium\.com/@[^/\s]+/[^/\s]+-[a-f0-9]+',  # @author/title-id
+    r'https://[^/\s]+\.medium\.com/[^/\s]+-[a-f0-9]+',  # publication.medium.com/title-id
+    r'https://medium\.com/[^/\s]+/[^/\s]+-[a-f0-9]+',   # medium.com/publication/title-id
+    r'https://medium\.com/p/[a-f0-9\-]+',                # medium.com/p/id
+)]
+MONTH_DATE_PATTERN = re.compile(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2}, \d{4}', re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+SLASH_DATE_PATTERN = re.compile(r'\d{4}/\d{2}/\d{2}')
+AGO_PATTERN = re.compile(r'(\d+)\s+(day|week|month|year)s?\s+ago', re.IGNORECASE)
+PUBLISHED_PATTERN = re.compile(r'Published\s+(on|in)\s+([A-Za-z]+ \d{1,2}, \d{4})', re.IGNORECASE)
+SHORT_MONTH_DATE_PATTERN = re.compile(r'([A-Za-z]{3})\s+(\d{1,2}),\s+(\d{4})')
+
 
 def parse_relative_date(date_text: str) -> Optional[str]:
     """
@@ -84,10 +115,14 @@ def fetch_article_metadata(url: str) -> tuple[Optional[str], Optional[str], Opti
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
         
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        cancellation.check()
+        with metrics.external_call("medium", "article") as call:
+            response = requests.get(url, headers=headers, timeout=10)
+            call['bytes'] = len(response.content)
+            response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with metrics.span("parse_medium_article"):
+            soup = BeautifulSoup(response.content, 'html.parser')
         
         # Extract publication date
         date = None
@@ -135,19 +170,8 @@ def fetch_article_metadata(url: str) -> tuple[Optional[str], Optional[str], Opti
             page_text = soup.get_text()
             
             # Look for patterns like "3 days ago", "2 weeks ago", etc.
-            relative_date_patterns = [
-                r'(\d+\s+days?\s+ago)',
-                r'(\d+\s+weeks?\s+ago)', 
-                r'(\d+\s+months?\s+ago)',
-                r'(\d+\s+years?\s+ago)',
-                r'(a\s+day\s+ago)',
-                r'(a\s+week\s+ago)',
-                r'(a\s+month\s+ago)',
-                r'(a\s+year\s+ago)'
-            ]
-            
-            for pattern in relative_date_patterns:
-                matches = re.findall(pattern, page_text, re.IGNORECASE)
+            for pattern in RELATIVE_DATE_PATTERNS:
+                matches = pattern.findall(page_text)
                 if matches:
                     # Take the first match and try to parse it
                     potential_date = matches[0]
@@ -269,10 +293,14 @@ def scrape_medium_search_page(search_url: str, limit: int = 5) -> List[Dict]:
         session = requests.Session()
         session.headers.update(headers)
         
-        response = session.get(search_url, timeout=15)
-        response.raise_for_status()
+        cancellation.check()
+        with metrics.external_call("medium", "search_page") as call:
+            response = session.get(search_url, timeout=15)
+            call['bytes'] = len(response.content)
+            response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        with metrics.span("parse_medium_search"):
+            soup = BeautifulSoup(response.content, 'html.parser')
         articles = []
         
         # Strategy 1: Look for JSON-LD structured data
@@ -356,16 +384,9 @@ def scrape_medium_search_page(search_url: str, limit: int = 5) -> List[Dict]:
             all_text = soup.get_text()
             
             # Extract URLs that look like Medium articles
-            url_patterns = [
-                r'https://medium\.com/@[^/\s]+/[^/\s]+-[a-f0-9]+',  # @author/title-id
-                r'https://[^/\s]+\.medium\.com/[^/\s]+-[a-f0-9]+',  # publication.medium.com/title-id
-                r'https://medium\.com/[^/\s]+/[^/\s]+-[a-f0-9]+',   # medium.com/publication/title-id
-                r'https://medium\.com/p/[a-f0-9\-]+'                # medium.com/p/id
-            ]
-            
             found_urls = set()
-            for pattern in url_patterns:
-                matches = re.findall(pattern, all_text)
+            for pattern in ARTICLE_URL_PATTERNS:
+                matches = pattern.findall(all_text)
                 for match in matches:
                     if len(found_urls) < limit * 2:  # Get more to filter
                         found_urls.add(match)
@@ -419,6 +440,17 @@ def scrape_medium_search_page(search_url: str, limit: int = 5) -> List[Dict]:
         return []
 
 
+def is_pooled_medium_article(result: Dict, investor_name: str) -> bool:
+    """
+    Whether a shared search result is a Medium article about the investor
+    """
+    url = result.get('url', '')
+    if 'medium.com' not in url or '/tag/' in url or '/search' in url:
+        return False
+    text = f"{result.get('title', '')} {result.get('content', '')[:200]}".lower()
+    return investor_name.lower() in text
+
+
 def fetch_medium_articles_about(investor_name: str, limit: int = 5) -> List[Dict]:
     """
     Fetch Medium articles written ABOUT an investor - try to get exact same results as Medium search URL
@@ -426,42 +458,45 @@ def fetch_medium_articles_about(investor_name: str, limit: int = 5) -> List[Dict
     """
     try:
         # First, try to scrape the actual Medium search page that users see
-        medium_search_url = f"https://medium.com/search?q={investor_name.replace(' ', '%20')}"
+        medium_search_url = f"{MEDIUM_BASE_URL}/search?q={investor_name.replace(' ', '%20')}"
         print(f"🔍 Attempting to scrape Medium search page: {medium_search_url}")
         
         articles = scrape_medium_search_page(medium_search_url, limit)
         if articles:
             print(f"✅ Successfully scraped {len(articles)} articles from Medium search page")
             
-            # Enhance articles with real metadata
-            enhanced_articles = []
+            # Enhance articles with real metadata (the scraped dicts are ours, so update them in place)
             for article in articles:
                 if article.get('url') and 'medium.com' in article['url']:
                     # Try to get real publication date and reading time
                     date, read_time, _ = fetch_article_metadata(article['url'])
                     
-                    enhanced_article = article.copy()
                     if date:
-                        enhanced_article['date'] = date
+                        article['date'] = date
                     if read_time:
-                        enhanced_article['read_time'] = read_time
-                    
-                    enhanced_articles.append(enhanced_article)
-                else:
-                    enhanced_articles.append(article)
+                        article['read_time'] = read_time
             
-            return sort_articles_by_date(enhanced_articles)
+            return sort_articles_by_date(articles)
         
         print("⚠️ Medium scraping failed, using Tavily search as fallback")
         
-        # Fallback: Use Tavily to search with the same query pattern as Medium search URL
-        search = TavilySearch()
-        
-        # Use a simplified search that matches what users would expect from the Medium URL
-        query = f'site:medium.com "{investor_name}"'
-        print(f"🔍 Searching for Medium articles with query: {query}")
-        
-        results = search.run(query)
+        # Medium pages the query planner's broad searches already returned save the fallback search
+        # (the news search is the one that usually has them; this waits for it if it is still running)
+        search_planner.broad_search('news')
+        pooled = [result for result in search_planner.pooled_results()
+                  if is_pooled_medium_article(result, investor_name)]
+        if pooled:
+            print(f"🔍 Using {len(pooled)} Medium results from the shared search results")
+            results = {'results': pooled}
+        else:
+            search_planner.record_follow_up("medium")
+            
+            # Fallback: Use Tavily to search with the same query pattern as Medium search URL
+            # Use a simplified search that matches what users would expect from the Medium URL
+            query = f'site:medium.com "{investor_name}"'
+            print(f"🔍 Searching for Medium articles with query: {query}")
+            
+            results = tavily_search(query, query_class="medium")
         
         articles = []
         if isinstance(results, dict) and 'results' in results:
@@ -515,39 +550,31 @@ def extract_date_from_content(content: str) -> str:
     """
     Try to extract a date from content using multiple patterns
     """
-    import re
-    from datetime import datetime
-    
     if not content:
         return ''
     
     # Pattern for "Jan 1, 2024" or "January 1, 2024"
-    date_pattern1 = r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]* \d{1,2}, \d{4}'
-    match = re.search(date_pattern1, content, re.IGNORECASE)
+    match = MONTH_DATE_PATTERN.search(content)
     if match:
         return match.group()
     
     # Pattern for "2024-01-01" format
-    date_pattern2 = r'\d{4}-\d{2}-\d{2}'
-    match2 = re.search(date_pattern2, content)
+    match2 = ISO_DATE_PATTERN.search(content)
     if match2:
         return match2.group()
     
     # Pattern for "2024/01/01" format
-    date_pattern3 = r'\d{4}/\d{2}/\d{2}'
-    match3 = re.search(date_pattern3, content)
+    match3 = SLASH_DATE_PATTERN.search(content)
     if match3:
         return match3.group()
     
     # Look for "ago" patterns like "3 days ago", "2 weeks ago"
-    ago_pattern = r'(\d+)\s+(day|week|month|year)s?\s+ago'
-    ago_match = re.search(ago_pattern, content, re.IGNORECASE)
+    ago_match = AGO_PATTERN.search(content)
     if ago_match:
         return ago_match.group()
     
     # Look for "Published on" or "Published in" patterns
-    pub_pattern = r'Published\s+(on|in)\s+([A-Za-z]+ \d{1,2}, \d{4})'
-    pub_match = re.search(pub_pattern, content, re.IGNORECASE)
+    pub_match = PUBLISHED_PATTERN.search(content)
     if pub_match:
         return pub_match.group(2)
     
@@ -559,9 +586,6 @@ def sort_articles_by_date(articles: List[Dict]) -> List[Dict]:
     """
     Sort articles by publication date - most recent first
     """
-    from datetime import datetime
-    import re
-    
     def parse_date(date_str: str) -> datetime:
         """Parse various date formats and return datetime object"""
         if not date_str:
@@ -569,8 +593,7 @@ def sort_articles_by_date(articles: List[Dict]) -> List[Dict]:
         
         try:
             # Handle "Dec 7, 2024" format
-            month_day_year = r'([A-Za-z]{3})\s+(\d{1,2}),\s+(\d{4})'
-            match = re.search(month_day_year, date_str)
+            match = SHORT_MONTH_DATE_PATTERN.search(date_str)
             if match:
                 month_str, day, year = match.groups()
                 month_map = {
@@ -585,11 +608,11 @@ def sort_articles_by_date(articles: List[Dict]) -> List[Dict]:
                 return datetime(int(date_str), 1, 1)
             
             # Handle "YYYY-MM-DD" format
-            if re.match(r'\d{4}-\d{2}-\d{2}', date_str):
+            if ISO_DATE_PATTERN.match(date_str):
                 return datetime.strptime(date_str, '%Y-%m-%d')
             
             # Handle "YYYY/MM/DD" format
-            if re.match(r'\d{4}/\d{2}/\d{2}', date_str):
+            if SLASH_DATE_PATTERN.match(date_str):
                 return datetime.strptime(date_str, '%Y/%m/%d')
             
             # Default to minimum date if can't parse
@@ -5,7 +5,7 @@ No Crunchbase API required.
 import os
 from typing import List, Dict
 from dotenv import load_dotenv
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
 
 load_dotenv()
 
@@ -16,27 +16,26 @@ def fetch_portfolio_from_web(investor_name: str, firm_name: str = None) -> List[
     This is a free alternative to Crunchbase API.
     """
     try:
-        search = TavilySearch()
         portfolio_companies = []
         
         # Search strategies:
         # 1. Search the VC firm's website for portfolio page
         if firm_name:
             firm_query = f'"{firm_name}" portfolio companies'
-            firm_results = search.run(firm_query)
+            firm_results = tavily_search(firm_query, query_class="portfolio")
             # Parse results to extract company names
             
         # 2. Search for investor + portfolio mentions
         investor_query = f'"{investor_name}" invested in backed funded portfolio'
-        investor_results = search.run(investor_query)
+        investor_results = tavily_search(investor_query, query_class="portfolio")
         
         # 3. Search news articles for recent investments
         news_query = f'"{investor_name}" leads investment round funding'
-        news_results = search.run(news_query)
+        news_results = tavily_search(news_query, query_class="portfolio")
         
         # 4. Check AngelList (often has public data)
         angellist_query = f'site:angel.co "{investor_name}" investments'
-        angellist_results = search.run(angellist_query)
+        angellist_results = tavily_search(angellist_query, query_class="portfolio")
         
         # Parse and combine results
         # In production, you would parse these results to extract:
@@ -70,9 +69,8 @@ def fetch_from_wikipedia(investor_name: str) -> List[Dict]:
     Many prominent VCs have Wikipedia pages with portfolio lists.
     """
     try:
-        search = TavilySearch()
         wiki_query = f'site:wikipedia.org "{investor_name}" investments portfolio'
-        results = search.run(wiki_query)
+        results = tavily_search(wiki_query, query_class="portfolio")
         # Parse Wikipedia content for portfolio companies
         return []
     except:
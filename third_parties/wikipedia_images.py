@@ -2,14 +2,20 @@
 Wikipedia image search and dynamic Cloudinary upload
 """
 import requests
-import re
-from typing import Optional, List
+import queue
+import threading
+import time
+from typing import Optional, List, Dict
 from urllib.parse import unquote
 import cloudinary
 import cloudinary.uploader
 from dotenv import load_dotenv
 import os
 
+from third_parties import image_cache
+import metrics
+import cancellation
+
 load_dotenv()
 
 # Configure Cloudinary
@@ -19,149 +25,238 @@ cloudinary.config(
     api_secret=os.getenv('CLOUDINARY_API_SECRET')
 )
 
+WIKIPEDIA_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+WIKIPEDIA_HEADERS = {
+    'User-Agent': 'InvestorResearch/1.0 (https://github.com/user/investor-research) Contact: user@example.com'
+}
+
+# MediaWiki accepts at most 50 titles per query for anonymous clients
+WIKIPEDIA_TITLES_PER_QUERY = 50
+
+# Cloudinary uploads run on background workers so requests never wait on them
+CLOUDINARY_UPLOAD_WORKERS = int(os.getenv("CLOUDINARY_UPLOAD_WORKERS", "2"))
+
+# After a failed upload, the same investor's image isn't queued again for this long (seconds)
+CLOUDINARY_UPLOAD_RETRY_AFTER = float(os.getenv("CLOUDINARY_UPLOAD_RETRY_AFTER", "3600"))
+
+upload_queue = queue.Queue()
+pending_uploads = set()
+upload_lock = threading.Lock()
+upload_threads = []
+
 
 def search_wikipedia_image(person_name: str) -> Optional[str]:
     """
     Search for a person's image on Wikipedia and return the best image URL
     """
-    try:
-        # Step 1: Search Wikipedia for the person
-        search_url = "https://en.wikipedia.org/api/rest_v1/page/summary/" + person_name.replace(" ", "_")
-        
-        headers = {
-            'User-Agent': 'InvestorResearch/1.0 (https://github.com/user/investor-research) Contact: user@example.com'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Check if there's a thumbnail (main image)
-            if 'thumbnail' in data and 'source' in data['thumbnail']:
-                image_url = data['thumbnail']['source']
-                
-                # Get higher resolution version
-                # Wikipedia thumbnails often have resolution in URL like /320px-image.jpg
-                # We can replace with higher res
-                high_res_url = re.sub(r'/\d+px-', '/800px-', image_url)
-                
-                print(f"📸 Found Wikipedia image: {high_res_url}")
-                return high_res_url
-        
-        # Step 2: If summary doesn't have image, try searching Wikipedia images directly
-        search_query = f"{person_name} investor entrepreneur"
-        return search_wikipedia_images_api(search_query)
-        
-    except Exception as e:
-        print(f"Wikipedia search error for {person_name}: {e}")
-        return None
+    candidate = resolve_wikipedia_image(person_name)
+    if candidate:
+        print(f"📸 Found Wikipedia image: {candidate['url']}")
+        return candidate['url']
+    return None
 
 
-def search_wikipedia_images_api(query: str) -> Optional[str]:
+def is_non_portrait_filename(filename: str) -> bool:
     """
-    Search Wikipedia Commons for images using the API
+    Check if a file name is obviously not a portrait (logos, charts, buildings)
     """
-    try:
-        # Use Wikipedia Commons API to search for images
-        api_url = "https://commons.wikimedia.org/w/api.php"
-        
-        params = {
-            'action': 'query',
-            'format': 'json',
-            'list': 'search',
-            'srsearch': query,
-            'srnamespace': '6',  # File namespace
-            'srlimit': '10'
+    skip_terms = ['logo', 'graph', 'chart', 'diagram', 'screenshot', 'building', 'company']
+    filename_lower = filename.lower()
+    return any(term in filename_lower for term in skip_terms)
+
+
+def query_wikipedia_api(params: Dict[str, str], timeout: int = 10) -> Optional[Dict]:
+    """
+    Run a single MediaWiki API query and return the decoded JSON body
+    """
+    base_params = {
+        'action': 'query',
+        'format': 'json',
+        'formatversion': '2',
+        'redirects': '1'
+    }
+    base_params.update(params)
+    
+    cancellation.check()
+    with metrics.external_call("wikipedia", "query") as call:
+        response = requests.get(WIKIPEDIA_API_URL, params=base_params, headers=WIKIPEDIA_HEADERS, timeout=timeout)
+        call['bytes'] = len(response.content)
+        if response.status_code != 200:
+            call['error'] = True
+            print(f"Wikipedia API error: {response.status_code}")
+            return None
+        return response.json()
+
+
+def extract_image_candidate(page: Dict) -> Optional[Dict]:
+    """
+    Turn one page from a pageimages/imageinfo query into an image candidate.
+    Article pages carry a lead-image thumbnail, File pages carry imageinfo.
+    """
+    if page.get('missing') or page.get('invalid'):
+        return None
+    
+    if 'thumbnail' in page:
+        thumbnail = page['thumbnail']
+        candidate = {
+            'url': thumbnail.get('source', ''),
+            'width': thumbnail.get('width', 0),
+            'height': thumbnail.get('height', 0),
+            'file': page.get('pageimage', ''),
+            'title': page.get('title', ''),
+            'namespace': page.get('ns', 0)
         }
-        
-        headers = {
-            'User-Agent': 'InvestorResearch/1.0 (https://github.com/user/investor-research)'
+    elif page.get('imageinfo'):
+        image_info = page['imageinfo'][0]
+        if not image_info.get('mime', 'image/').startswith('image/'):
+            return None
+        candidate = {
+            'url': image_info.get('thumburl') or image_info.get('url', ''),
+            'width': image_info.get('thumbwidth') or image_info.get('width', 0),
+            'height': image_info.get('thumbheight') or image_info.get('height', 0),
+            'file': page.get('title', ''),
+            'title': page.get('title', ''),
+            'namespace': page.get('ns', 6)
         }
-        
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'query' in data and 'search' in data['query']:
-                for result in data['query']['search'][:3]:  # Try first 3 results
-                    filename = result['title']
-                    
-                    # Get the actual image URL
-                    image_url = get_wikimedia_image_url(filename)
-                    if image_url and is_valid_portrait_image(image_url, filename):
-                        print(f"📸 Found Commons image: {image_url}")
-                        return image_url
-        
+    else:
         return None
-        
-    except Exception as e:
-        print(f"Commons search error: {e}")
+    
+    if not candidate['url'] or is_non_portrait_filename(candidate['file']):
         return None
+    if candidate['width'] and candidate['width'] < 100:
+        return None
+    return candidate
+
+
+def matches_person(candidate: Dict, person_name: str) -> bool:
+    """
+    Whether every part of the person's name appears in the candidate's page title or file name
+    """
+    name_parts = person_name.lower().split()
+    title = candidate['title'].lower()
+    file_name = candidate['file'].lower()
+    return all(part in title for part in name_parts) or all(part in file_name for part in name_parts)
+
+
+def rank_image_candidate(candidate: Dict, person_name: str) -> tuple:
+    """
+    Sort key for image candidates - lower is better.
+    Prefers the person's own article, then portrait-shaped images.
+    """
+    is_article = candidate['namespace'] == 0
+    is_portrait = bool(candidate['width']) and candidate['height'] >= candidate['width'] * 0.75
+    
+    return (
+        not matches_person(candidate, person_name),
+        not is_article,
+        not is_portrait,
+        candidate.get('index', 0)
+    )
 
 
-def get_wikimedia_image_url(filename: str) -> Optional[str]:
+def resolve_wikipedia_image(person_name: str, limit: int = 5) -> Optional[Dict]:
     """
-    Get the direct URL for a Wikimedia image file
+    Find the best Wikipedia image for a person with ONE API request.
+    
+    Uses generator=search over articles and files, combined with
+    prop=pageimages (article lead image) and prop=imageinfo (file URL and
+    size), so no follow-up imageinfo lookups or HEAD probes are needed.
+    
+    Returns a candidate dict with url, width, height, file and title, or None
+    when no candidate's page title or file name matches the person.
     """
     try:
-        api_url = "https://commons.wikimedia.org/w/api.php"
-        
-        params = {
-            'action': 'query',
-            'format': 'json',
-            'titles': filename,
-            'prop': 'imageinfo',
-            'iiprop': 'url',
-            'iiurlwidth': '400'  # Get 400px wide version
-        }
-        
-        headers = {
-            'User-Agent': 'InvestorResearch/1.0'
-        }
+        data = query_wikipedia_api({
+            'generator': 'search',
+            'gsrsearch': person_name,
+            'gsrnamespace': '0|6',
+            'gsrlimit': str(limit),
+            'prop': 'pageimages|imageinfo',
+            'piprop': 'thumbnail|name',
+            'pithumbsize': '800',
+            'pilimit': 'max',
+            'iiprop': 'url|size|mime',
+            'iiurlwidth': '400'
+        })
+        if not data:
+            return None
         
-        response = requests.get(api_url, params=params, headers=headers, timeout=10)
+        candidates = []
+        for page in data.get('query', {}).get('pages', []):
+            candidate = extract_image_candidate(page)
+            if candidate:
+                candidate['index'] = page.get('index', 0)
+                candidates.append(candidate)
         
-        if response.status_code == 200:
-            data = response.json()
-            
-            pages = data.get('query', {}).get('pages', {})
-            for page_id, page_data in pages.items():
-                if 'imageinfo' in page_data and len(page_data['imageinfo']) > 0:
-                    image_info = page_data['imageinfo'][0]
-                    # Prefer thumb URL if available, otherwise use full URL
-                    return image_info.get('thumburl') or image_info.get('url')
+        if not candidates:
+            print(f"ℹ️ No Wikipedia image candidates for {person_name}")
+            return None
         
-        return None
+        best = min(candidates, key=lambda c: rank_image_candidate(c, person_name))
+        # An image from an unrelated page may show someone else; let the other strategies try instead
+        if not matches_person(best, person_name):
+            print(f"ℹ️ No Wikipedia image matching {person_name}")
+            return None
+        return best
         
     except Exception as e:
-        print(f"Image URL fetch error: {e}")
+        print(f"Wikipedia image lookup error for {person_name}: {e}")
         return None
 
 
-def is_valid_portrait_image(image_url: str, filename: str) -> bool:
-    """
-    Check if this looks like a good portrait image based on filename and URL
+def resolve_wikipedia_images(person_names: List[str], fallback_search: bool = True) -> Dict[str, Optional[Dict]]:
     """
-    filename_lower = filename.lower()
+    Resolve images for many people at once (for cache warmup jobs).
     
-    # Skip obvious non-portrait images
-    skip_terms = ['logo', 'graph', 'chart', 'diagram', 'screenshot', 'building', 'company']
-    if any(term in filename_lower for term in skip_terms):
-        return False
+    Looks up up to 50 exact article titles per request with prop=pageimages.
+    Names whose article has no usable lead image fall back to the single-name
+    search query when fallback_search is True.
+    """
+    results = {}
+    unique_names = list(dict.fromkeys(name.strip() for name in person_names if name and name.strip()))
     
-    # Prefer images that likely contain portraits
-    good_terms = ['portrait', 'headshot', 'photo', '.jpg', 'cropped']
-    if any(term in filename_lower for term in good_terms):
-        return True
+    for start in range(0, len(unique_names), WIKIPEDIA_TITLES_PER_QUERY):
+        chunk = unique_names[start:start + WIKIPEDIA_TITLES_PER_QUERY]
+        pages_by_title = {}
+        title_map = {}
+        
+        try:
+            data = query_wikipedia_api({
+                'titles': '|'.join(chunk),
+                'prop': 'pageimages',
+                'piprop': 'thumbnail|name',
+                'pithumbsize': '800',
+                'pilimit': 'max'
+            })
+            query = (data or {}).get('query', {})
+            
+            # Follow title normalization and redirects back to the requested name
+            for mapping in query.get('normalized', []) + query.get('redirects', []):
+                title_map[mapping['from']] = mapping['to']
+            for page in query.get('pages', []):
+                pages_by_title[page.get('title', '')] = page
+                
+        except Exception as e:
+            print(f"Wikipedia batch lookup error: {e}")
+        
+        for name in chunk:
+            title = name
+            seen = set()
+            while title in title_map and title not in seen:
+                seen.add(title)
+                title = title_map[title]
+            
+            page = pages_by_title.get(title)
+            candidate = extract_image_candidate(page) if page else None
+            if candidate:
+                candidate['index'] = 0
+            elif fallback_search:
+                candidate = resolve_wikipedia_image(name)
+            results[name] = candidate
     
-    # Test if the image is accessible
-    try:
-        response = requests.head(image_url, timeout=5)
-        return response.status_code == 200
-    except:
-        return False
+    found = sum(1 for candidate in results.values() if candidate)
+    print(f"📸 Resolved Wikipedia images for {found}/{len(unique_names)} names")
+    return results
 
 
 def upload_to_cloudinary_dynamic(investor_name: str, image_url: str) -> Optional[str]:
@@ -174,22 +269,23 @@ def upload_to_cloudinary_dynamic(investor_name: str, image_url: str) -> Optional
         print(f"📤 Uploading {investor_name} to Cloudinary...")
         
         # Upload to Cloudinary with optimization
-        result = cloudinary.uploader.upload(
-            image_url,
-            public_id=f"investors/dynamic/{sanitized_name}",
-            folder="investors/dynamic",
-            overwrite=True,
-            quality="auto",
-            fetch_format="auto",
-            width=400,
-            height=400,
-            crop="fill",
-            gravity="face",  # Focus on face when cropping
-            transformation=[
-                {"quality": "auto"},
-                {"fetch_format": "auto"}
-            ]
-        )
+        with metrics.external_call("cloudinary", "upload"):
+            result = cloudinary.uploader.upload(
+                image_url,
+                public_id=f"investors/dynamic/{sanitized_name}",
+                folder="investors/dynamic",
+                overwrite=True,
+                quality="auto",
+                fetch_format="auto",
+                width=400,
+                height=400,
+                crop="fill",
+                gravity="face",  # Focus on face when cropping
+                transformation=[
+                    {"quality": "auto"},
+                    {"fetch_format": "auto"}
+                ]
+            )
         
         cloudinary_url = result['secure_url']
         print(f"✅ Uploaded successfully: {cloudinary_url}")
@@ -207,36 +303,130 @@ def upload_to_cloudinary_dynamic(investor_name: str, image_url: str) -> Optional
         return None
 
 
-def get_dynamic_investor_image(investor_name: str) -> Optional[str]:
+def enqueue_cloudinary_upload(investor_name: str, image_url: str) -> bool:
+    """
+    Queue a Wikipedia image for upload to Cloudinary in the background.
+    Returns False if an upload for this investor is already pending or failed recently.
+    """
+    failed = image_cache.get_cached_image(investor_name, kind="cloudinary_upload")
+    if failed and time.time() - failed['verified_at'] < CLOUDINARY_UPLOAD_RETRY_AFTER:
+        print(f"⏭️ Skipping Cloudinary upload for {investor_name} (failed recently)")
+        return False
+
+    key = image_cache.normalize_name(investor_name)
+    with upload_lock:
+        if key in pending_uploads:
+            return False
+        pending_uploads.add(key)
+        
+        # Start workers lazily so forked web workers get their own threads
+        alive = [t for t in upload_threads if t.is_alive()]
+        for i in range(len(alive), CLOUDINARY_UPLOAD_WORKERS):
+            worker = threading.Thread(target=cloudinary_upload_worker, name=f"cloudinary-upload-{i}", daemon=True)
+            worker.start()
+            alive.append(worker)
+        upload_threads[:] = alive
+    
+    upload_queue.put((investor_name, image_url))
+    print(f"📬 Queued Cloudinary upload for {investor_name}")
+    return True
+
+
+def cloudinary_upload_worker() -> None:
+    """
+    Upload queued images and swap the Cloudinary URL into the image cache
+    """
+    while True:
+        investor_name, image_url = upload_queue.get()
+        try:
+            cloudinary_url = upload_to_cloudinary_dynamic(investor_name, image_url)
+            if cloudinary_url:
+                image_cache.store_image(investor_name, cloudinary_url, "cloudinary", kind="cloudinary_dynamic")
+                # Later profile views get the optimized Cloudinary copy, unless a
+                # higher-priority strategy's image is what the cache serves
+                image_cache.replace_image(investor_name, cloudinary_url, "dynamic", ("dynamic", "wikipedia"))
+            else:
+                image_cache.store_miss(investor_name, kind="cloudinary_upload")
+        except Exception as e:
+            print(f"❌ Background upload failed for {investor_name}: {e}")
+            image_cache.store_miss(investor_name, kind="cloudinary_upload")
+        finally:
+            with upload_lock:
+                pending_uploads.discard(image_cache.normalize_name(investor_name))
+            upload_queue.task_done()
+
+
+def wait_for_cloudinary_uploads(timeout: Optional[float] = None) -> bool:
+    """
+    Block until queued uploads finish (for scripts and warmup jobs).
+    Returns False if uploads were still pending when the timeout expired.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with upload_lock:
+            if not pending_uploads:
+                return True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+
+
+def get_dynamic_investor_image(investor_name: str, background_upload: bool = True) -> Optional[str]:
     """
     Complete workflow: Search Wikipedia -> Upload to Cloudinary -> Return URL
+    
+    With background_upload (the default) the Wikipedia thumbnail is returned
+    straight away and the Cloudinary upload runs on a background worker;
+    once it finishes, later lookups get the Cloudinary URL from the cache.
     """
     print(f"🔍 Starting dynamic image search for: {investor_name}")
     
     # Step 1: Check if we already have this image in Cloudinary
     sanitized_name = investor_name.lower().replace(' ', '_').replace('-', '_')
     
-    try:
-        # Check dynamic folder first
-        result = cloudinary.api.resource(f"investors/dynamic/{sanitized_name}")
-        existing_url = result['secure_url']
-        print(f"✅ Found existing Cloudinary image: {existing_url}")
-        return existing_url
-    except:
-        pass  # Image doesn't exist yet, continue with search
+    cached = image_cache.get_cached_image(investor_name, kind="cloudinary_dynamic")
+    if cached and cached['url']:
+        print(f"✅ Found cached Cloudinary image: {cached['url']}")
+        return cached['url']
+    
+    if not cached:
+        try:
+            # Check dynamic folder first
+            result = cloudinary.api.resource(f"investors/dynamic/{sanitized_name}")
+            existing_url = result['secure_url']
+            print(f"✅ Found existing Cloudinary image: {existing_url}")
+            image_cache.store_image(investor_name, existing_url, "cloudinary", kind="cloudinary_dynamic")
+            return existing_url
+        except:
+            # Image doesn't exist yet, continue with search
+            image_cache.store_miss(investor_name, kind="cloudinary_dynamic")
+    
+    # Step 2: Search Wikipedia for image (skipped if we recently found none)
+    cached = image_cache.get_cached_image(investor_name, kind="wikipedia")
+    if cached and not cached['url']:
+        print(f"❌ No Wikipedia image for {investor_name} (cached)")
+        return None
     
-    # Step 2: Search Wikipedia for image
-    wikipedia_url = search_wikipedia_image(investor_name)
+    wikipedia_url = cached['url'] if cached else search_wikipedia_image(investor_name)
     
     if not wikipedia_url:
         print(f"❌ No Wikipedia image found for {investor_name}")
+        image_cache.store_miss(investor_name, kind="wikipedia")
         return None
     
+    if not cached:
+        image_cache.store_image(investor_name, wikipedia_url, "wikipedia", kind="wikipedia")
+    
     # Step 3: Upload to Cloudinary
+    if background_upload:
+        enqueue_cloudinary_upload(investor_name, wikipedia_url)
+        return wikipedia_url
+    
     cloudinary_url = upload_to_cloudinary_dynamic(investor_name, wikipedia_url)
     
     if cloudinary_url:
         print(f"🎉 Dynamic workflow complete for {investor_name}")
+        image_cache.store_image(investor_name, cloudinary_url, "cloudinary", kind="cloudinary_dynamic")
         return cloudinary_url
     else:
         print(f"❌ Dynamic workflow failed for {investor_name}")
@@ -262,7 +452,7 @@ def test_dynamic_workflow():
         print(f"\n👤 Testing: {investor}")
         print("-" * 40)
         
-        url = get_dynamic_investor_image(investor)
+        url = get_dynamic_investor_image(investor, background_upload=False)
         if url:
             print(f"✅ Success: {url}")
         else:
@@ -1,4 +1,4 @@
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
 
 
 def search_portfolio_companies(query: str):
@@ -6,10 +6,9 @@ def search_portfolio_companies(query: str):
     Search for portfolio companies of an investor using web search.
     """
     try:
-        search = TavilySearch()
         # Search for portfolio companies mentioned in articles, firm websites, etc.
         search_query = f"{query} portfolio companies investments backed funded"
-        results = search.run(search_query)
+        results = tavily_search(search_query, query_class="portfolio")
         return results
     except:
         # Return mock data if search fails
@@ -4,7 +4,7 @@ Find and validate actual profile URLs for investors
 import requests
 import re
 from typing import Optional, Dict
-from langchain_tavily import TavilySearch
+from tools.search_tools import tavily_search
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -44,11 +44,9 @@ def find_linkedin_url(investor_name: str) -> Optional[str]:
             print(f"✅ Found LinkedIn via known profile: {clean_url}")
             return clean_url
         
-        search = TavilySearch()
-        
         # Search specifically for LinkedIn profile
         query = f'site:linkedin.com/in/ "{investor_name}" investor venture capital'
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             for result in results['results'][:3]:
@@ -113,11 +111,9 @@ def find_crunchbase_url(investor_name: str) -> Optional[str]:
             return url
         
         # If not in known profiles, search
-        search = TavilySearch()
-        
         # Search specifically for Crunchbase profile
         query = f'site:crunchbase.com/person/ "{investor_name}"'
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             for result in results['results'][:3]:
@@ -160,11 +156,9 @@ def find_twitter_url(investor_name: str) -> Optional[str]:
     Find the actual Twitter/X URL for an investor
     """
     try:
-        search = TavilySearch()
-        
         # Search for Twitter profile
         query = f'"{investor_name}" Twitter profile investor site:twitter.com OR site:x.com'
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             for result in results['results'][:5]:
@@ -219,11 +213,9 @@ def find_medium_url(investor_name: str) -> Optional[str]:
     Returns a Medium search/tag URL that shows articles about them
     """
     try:
-        search = TavilySearch()
-        
         # Search for Medium articles ABOUT the investor
         query = f'site:medium.com "{investor_name}"'
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             # Get the first Medium article about them
@@ -0,0 +1,160 @@
+"""
+Query planner: a few broad Tavily searches per investor, shared by every consumer.
+
+Researching an investor used to send a separate search for the Twitter,
+LinkedIn and Crunchbase profiles, the firm website, five portfolio queries,
+news, two quote queries, the Medium fallback and the headshot, and many of
+them came back with the same pages. Within research_investor() a pool
+(a context variable, like the trace and the cancellation token) holds the
+results of at most three broad searches:
+
+    profile     profile URLs, firm website, headshot images
+    portfolio   portfolio companies
+    news        news, quotes, Medium articles
+
+Each broad search runs on first use and asks for SEARCH_POOL_MAX_RESULTS
+results (Tavily charges a basic search the same for 5 or 20). Concurrent
+consumers wait for the one in flight instead of repeating it. Consumers look
+in the pool first, and only send their own targeted search when it can't
+answer. Outside a pool, or with SEARCH_PLANNER=0, every consumer searches as
+before.
+
+    with search_planner.pool(name):
+        ...
+        results = search_planner.broad_search('news')   # Tavily response dict, or None without a pool
+        items = search_planner.pooled_results()         # every result fetched so far, deduplicated by URL
+"""
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Dict, List
+
+import metrics
+
+current_pool = contextvars.ContextVar("search_pool", default=None)
+
+# Set to 0 to send every consumer's targeted searches again
+SEARCH_PLANNER_ENABLED = os.getenv("SEARCH_PLANNER", "1").lower() in ("1", "true", "yes")
+
+# Results requested per broad search (Tavily allows up to 20)
+SEARCH_POOL_MAX_RESULTS = int(os.getenv("SEARCH_POOL_MAX_RESULTS", "15"))
+
+# The broad searches, as (query template, query class, extra Tavily args).
+# Templates are filled in with the investor's name and firm.
+BROAD_SEARCHES = {
+    'profile': ('"{name}" investor Twitter LinkedIn Crunchbase firm', 'profile', {"include_images": True}),
+    'portfolio': ('"{name}" {firm} portfolio companies invested in backed startups', 'portfolio', {}),
+    'news': ('"{name}" latest news interview investments', 'news', {}),
+}
+
+
+@contextmanager
+def pool(investor_name: str, firm: str = ""):
+    """
+    Share broad search results between every consumer in the block
+    """
+    if not SEARCH_PLANNER_ENABLED:
+        yield None
+        return
+
+    active = {
+        'name': investor_name,
+        'firm': firm,
+        'searches': {purpose: {'lock': threading.Lock(), 'results': None} for purpose in BROAD_SEARCHES},
+    }
+    token = current_pool.set(active)
+    try:
+        yield active
+    finally:
+        current_pool.reset(token)
+
+
+def set_firm(firm: str) -> None:
+    """
+    Record the investor's firm once the profile lookup has found it (used by later broad searches)
+    """
+    active = current_pool.get()
+    if active is not None and firm:
+        active['firm'] = firm
+
+
+def broad_query(purpose: str, investor_name: str, firm: str = ""):
+    """
+    The Tavily query for a broad search
+    """
+    template, _, extra = BROAD_SEARCHES[purpose]
+    query = " ".join(template.format(name=investor_name, firm=firm).split())
+    return dict(extra, query=query) if extra else query
+
+
+def broad_search(purpose: str) -> Optional[Dict]:
+    """
+    The Tavily response for one of the pool's broad searches, running it on first
+    use. None when there is no pool, so the caller searches on its own.
+    """
+    active = current_pool.get()
+    if active is None:
+        return None
+
+    search = active['searches'][purpose]
+    with search['lock']:
+        if search['results'] is not None:
+            metrics.inc("search_pool_total", purpose=purpose, result="shared")
+            return search['results']
+
+        from tools.search_tools import tavily_search
+        _, query_class, _ = BROAD_SEARCHES[purpose]
+        query = broad_query(purpose, active['name'], active['firm'])
+        print(f"🔍 Broad {purpose} search: {query.get('query') if isinstance(query, dict) else query}")
+        results = tavily_search(query, query_class=query_class, max_results=SEARCH_POOL_MAX_RESULTS)
+        metrics.inc("search_pool_total", purpose=purpose, result="searched")
+        search['results'] = results if isinstance(results, dict) else {}
+        return search['results']
+
+
+def pooled_results() -> List[Dict]:
+    """
+    Every result the pool's broad searches have returned so far, deduplicated by URL
+    (no new searches are sent)
+    """
+    active = current_pool.get()
+    if active is None:
+        return []
+
+    seen = set()
+    items = []
+    for search in active['searches'].values():
+        results = search['results'] or {}
+        for item in results.get('results') or []:
+            url = item.get('url', '')
+            if url in seen:
+                continue
+            seen.add(url)
+            items.append(item)
+    return items
+
+
+def pooled_images() -> List[str]:
+    """
+    Image URLs returned with the pool's broad searches so far
+    """
+    active = current_pool.get()
+    if active is None:
+        return []
+
+    images = []
+    for search in active['searches'].values():
+        for image in (search['results'] or {}).get('images') or []:
+            image_url = image.get('url', '') if isinstance(image, dict) else image
+            if image_url and image_url not in images:
+                images.append(image_url)
+    return images
+
+
+def record_follow_up(consumer: str) -> None:
+    """
+    Count a targeted search sent because the pool couldn't answer
+    """
+    if current_pool.get() is not None:
+        metrics.inc("search_pool_follow_ups_total", consumer=consumer)
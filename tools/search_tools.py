@@ -1,4 +1,58 @@
-from langchain_tavily import TavilySearch
+import os
+from typing import Optional
+import metrics
+import tracing
+import cancellation
+import research_cache
+import serialization
+import tavily_quota
+from provider_budgets import provider_slot
+
+# Send Tavily searches to another endpoint (e.g. the load-test stand-ins)
+TAVILY_API_BASE_URL = os.getenv("TAVILY_API_BASE_URL")
+
+
+def tavily_search(query, query_class: str = "general", optional: bool = False, max_results: Optional[int] = None):
+    """
+    Run a Tavily search and record it in the metrics.
+    query may be a string or a dict of tool args (e.g. {"query": ..., "include_images": True}).
+    max_results overrides Tavily's default of 5 results (the query planner's broad searches ask for more).
+    TavilySearch reports API failures as {"error": ...} instead of raising, so those count as errors too.
+    Successful results are kept in the research cache, so repeat searches across investors are free.
+    Searches that miss the cache count against the Tavily quota; when it runs low, low-priority
+    classes (and optional=True supplementary searches) are shed and return {"error": ...} at once.
+    """
+    cache_key = research_cache.make_key(query, max_results) if max_results else research_cache.make_key(query)
+    cached = research_cache.get('search', cache_key)
+    if cached is not None:
+        return cached
+
+    cancellation.check()
+    shed_reason = tavily_quota.acquire(query_class, optional)
+    if shed_reason:
+        print(f"🪫 {shed_reason}")
+        return {"error": shed_reason}
+
+    # Imported on the first real search: langchain_tavily takes about a second to load
+    from langchain_tavily import TavilySearch
+    with provider_slot("tavily"), metrics.external_call("tavily", query_class) as call:
+        options = {'max_results': max_results} if max_results else {}
+        if TAVILY_API_BASE_URL:
+            options['api_base_url'] = TAVILY_API_BASE_URL
+        search = TavilySearch(**options)
+        results = search.run(query)
+        if isinstance(results, dict) and 'error' in results:
+            call['error'] = True
+            error_msg = str(results['error'])
+            if 'usage limit' in error_msg.lower() or '432' in error_msg:
+                tavily_quota.record_exhausted()
+        if tracing.is_active():
+            call['query'] = query.get('query') if isinstance(query, dict) else query
+            call['bytes'] = len(serialization.dumps(results))
+
+    if not call.get('error'):
+        research_cache.put('search', cache_key, results)
+    return results
 
 
 def search_investor_profiles(query: str):
@@ -8,7 +62,6 @@ def search_investor_profiles(query: str):
     # For mock mode, return placeholder
     if True:  # Mock mode
         return f"Found profiles for {query}"
-    
-    search = TavilySearch()
-    res = search.run(query)
-    return res
\ No newline at end of file
+
+    res = tavily_search(query, query_class="profile")
+    return res
@@ -3,12 +3,57 @@ Smart profile finder that searches the internet to find and verify actual profil
 """
 import requests
 import re
-from typing import Optional, Dict
-from langchain_tavily import TavilySearch
+from typing import Optional, Dict, List
+from tools.search_tools import tavily_search
+from tools import search_planner
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Patterns compiled once at import (shared by forked web workers)
+LINKEDIN_URL_PATTERN = re.compile(r'(https?://(?:www\.)?linkedin\.com/[^\s]+)')
+TWITTER_URL_PATTERN = re.compile(r'(https?://(?:www\.)?(?:twitter\.com|x\.com)/[^\s\)]+)')
+TRAILING_PUNCTUATION_PATTERN = re.compile(r'[.,;!?\'")\]]+$')
+CRUNCHBASE_URL_PATTERN = re.compile(r'(https?://(?:www\.)?crunchbase\.com/person/[^\s]+)')
+DOMAIN_PATTERN = re.compile(r'https?://(?:www\.)?([a-zA-Z0-9\-]+\.[a-zA-Z]+)')
+LINKEDIN_PROFILE_PATTERN = re.compile(r'https?://(?:[a-z]{2,3}\.)?linkedin\.com/in/[^\s]+')
+TWITTER_PROFILE_PATTERN = re.compile(r'https?://(?:www\.)?(?:twitter\.com|x\.com)/(?!search|hashtag|i/|intent)[^\s/?#]+')
+CRUNCHBASE_PROFILE_PATTERN = re.compile(r'https?://(?:www\.)?crunchbase\.com/person/[^\s]+')
+
+# Sites that are never an investor's own firm website
+FIRM_SKIP_DOMAINS = ['twitter.com', 'linkedin.com', 'facebook.com', 'wikipedia.org',
+                     'forbes.com', 'techcrunch.com', 'bloomberg.com', 'cnbc.com']
+FIRM_KEYWORDS = ['ventures', 'capital', 'partners', 'fund', 'invest', 'companies']
+
+# The broad profile search also returns directory and press pages, which a firm-focused search ranks lower
+POOLED_FIRM_SKIP_DOMAINS = FIRM_SKIP_DOMAINS + ['crunchbase.com', '//x.com', 'www.x.com', 'medium.com', 'youtube.com',
+                                                'instagram.com', 'reddit.com', 'pitchbook.com', 'cbinsights.com',
+                                                'businessinsider.com', 'nytimes.com', 'wsj.com', 'reuters.com']
+
+
+def mentions_investor(result: dict, investor_name: str) -> bool:
+    """
+    Whether a search result's title or URL names the investor (by full or last name)
+    """
+    text = f"{result.get('title', '')} {result.get('url', '')}".lower()
+    last_name = investor_name.split()[-1].lower() if investor_name.split() else ""
+    return investor_name.lower() in text or (len(last_name) > 2 and last_name in text)
+
+
+def find_in_pool(investor_name: str, url_pattern) -> Optional[str]:
+    """
+    A profile URL from the query planner's broad profile search: a result about
+    the investor on the platform itself. None without a pool, or when the pool has none.
+    """
+    results = search_planner.broad_search('profile')
+    if not isinstance(results, dict):
+        return None
+    for result in results.get('results') or []:
+        url = result.get('url', '')
+        if url_pattern.match(url) and mentions_investor(result, investor_name):
+            return url
+    return None
+
 
 def convert_to_profile_url(url: str) -> str:
     """
@@ -39,13 +84,18 @@ def smart_find_linkedin(investor_name: str) -> Optional[str]:
     Simply search for "[investor name] LinkedIn" and use the first result
     """
     try:
-        search = TavilySearch()
+        # The planner's broad profile search usually has the profile page already
+        pooled_url = find_in_pool(investor_name, LINKEDIN_PROFILE_PATTERN)
+        if pooled_url:
+            print(f"✅ Found LinkedIn profile in shared results: {pooled_url}")
+            return pooled_url
+        search_planner.record_follow_up("linkedin")
         
         # Simple search for LinkedIn profile
         query = f'"{investor_name}" LinkedIn'
         print(f"🔍 Searching: {query}")
         
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             # Just use the first result that contains a LinkedIn URL
@@ -59,7 +109,7 @@ def smart_find_linkedin(investor_name: str) -> Optional[str]:
                 
                 # Otherwise, check if there's a LinkedIn URL in the content
                 content = result.get('content', '')
-                linkedin_match = re.search(r'(https?://(?:www\.)?linkedin\.com/[^\s]+)', content)
+                linkedin_match = LINKEDIN_URL_PATTERN.search(content)
                 if linkedin_match:
                     url = linkedin_match.group(1)
                     print(f"✅ Found LinkedIn in content: {url}")
@@ -78,13 +128,18 @@ def smart_find_twitter(investor_name: str) -> Optional[str]:
     Simply search for "[investor name] Twitter" and use the first result
     """
     try:
-        search = TavilySearch()
+        pooled_url = find_in_pool(investor_name, TWITTER_PROFILE_PATTERN)
+        if pooled_url:
+            profile_url = convert_to_profile_url(pooled_url)
+            print(f"✅ Found Twitter profile in shared results: {profile_url}")
+            return profile_url
+        search_planner.record_follow_up("twitter")
         
         # Simple search for Twitter profile
         query = f'"{investor_name}" Twitter'
         print(f"🔍 Searching: {query}")
         
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             # Check first few results for Twitter URLs
@@ -103,11 +158,11 @@ def smart_find_twitter(investor_name: str) -> Optional[str]:
                 
                 # Check content and title for Twitter URLs
                 all_text = f"{content} {title}"
-                twitter_matches = re.findall(r'(https?://(?:www\.)?(?:twitter\.com|x\.com)/[^\s\)]+)', all_text)
+                twitter_matches = TWITTER_URL_PATTERN.findall(all_text)
                 
                 for twitter_url in twitter_matches:
                     # Clean up the URL (remove trailing punctuation)
-                    clean_twitter_url = re.sub(r'[.,;!?\'")\]]+$', '', twitter_url)
+                    clean_twitter_url = TRAILING_PUNCTUATION_PATTERN.sub('', twitter_url)
                     profile_url = convert_to_profile_url(clean_twitter_url)
                     print(f"✅ Found Twitter in content: {profile_url}")
                     return profile_url
@@ -125,13 +180,17 @@ def smart_find_crunchbase(investor_name: str) -> Optional[str]:
     Simply search for "[investor name] Crunchbase" and use the first result
     """
     try:
-        search = TavilySearch()
+        pooled_url = find_in_pool(investor_name, CRUNCHBASE_PROFILE_PATTERN)
+        if pooled_url:
+            print(f"✅ Found Crunchbase profile in shared results: {pooled_url}")
+            return pooled_url
+        search_planner.record_follow_up("crunchbase")
         
         # Simple search for Crunchbase profile
         query = f'"{investor_name}" Crunchbase'
         print(f"🔍 Searching: {query}")
         
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
             # Just use the first result that contains a Crunchbase URL
@@ -145,7 +204,7 @@ def smart_find_crunchbase(investor_name: str) -> Optional[str]:
                     return url
                 
                 # Otherwise, check if there's a Crunchbase URL in the content
-                cb_match = re.search(r'(https?://(?:www\.)?crunchbase\.com/person/[^\s]+)', content)
+                cb_match = CRUNCHBASE_URL_PATTERN.search(content)
                 if cb_match:
                     url = cb_match.group(1)
                     print(f"✅ Found Crunchbase in content: {url}")
@@ -164,40 +223,26 @@ def find_firm_website(investor_name: str) -> Optional[str]:
     Search for the investor's firm website
     """
     try:
-        search = TavilySearch()
+        # A firm site among the planner's broad profile results saves the search
+        pooled = search_planner.broad_search('profile')
+        if isinstance(pooled, dict):
+            firm_url = firm_website_from_results(pooled.get('results') or [], POOLED_FIRM_SKIP_DOMAINS)
+            if firm_url:
+                print(f"✅ Found potential firm website in shared results: {firm_url}")
+                return firm_url
+            search_planner.record_follow_up("firm")
         
         # Search for firm information
         query = f'"{investor_name}" venture capital firm company website'
         print(f"🔍 Searching for firm: {query}")
         
-        results = search.run(query)
+        results = tavily_search(query, query_class="profile")
         
         if isinstance(results, dict) and 'results' in results:
-            for result in results['results'][:5]:
-                content = result.get('content', '').lower()
-                url = result.get('url', '')
-                
-                # Look for mentions of firms
-                firm_keywords = ['ventures', 'capital', 'partners', 'fund', 'invest', 'companies']
-                
-                # Skip social media and news sites
-                skip_domains = ['twitter.com', 'linkedin.com', 'facebook.com', 'wikipedia.org', 
-                               'forbes.com', 'techcrunch.com', 'bloomberg.com', 'cnbc.com']
-                
-                if any(domain in url for domain in skip_domains):
-                    continue
-                
-                # Check if this might be a firm website
-                if any(keyword in content for keyword in firm_keywords):
-                    # Extract the base domain
-                    domain_match = re.search(r'https?://(?:www\.)?([a-zA-Z0-9\-]+\.[a-zA-Z]+)', url)
-                    if domain_match:
-                        firm_url = f"https://{domain_match.group(1)}"
-                        
-                        # Verify it's not a generic platform
-                        if not any(skip in firm_url for skip in skip_domains):
-                            print(f"✅ Found potential firm website: {firm_url}")
-                            return firm_url
+            firm_url = firm_website_from_results(results['results'][:5])
+            if firm_url:
+                print(f"✅ Found potential firm website: {firm_url}")
+                return firm_url
         
         return None
         
@@ -206,6 +251,31 @@ def find_firm_website(investor_name: str) -> Optional[str]:
         return None
 
 
+def firm_website_from_results(results: List[dict], skip_domains: List[str] = FIRM_SKIP_DOMAINS) -> Optional[str]:
+    """
+    The first result that looks like an investment firm's own site, as its base URL
+    """
+    for result in results:
+        content = result.get('content', '').lower()
+        url = result.get('url', '')
+        
+        # Skip social media and news sites
+        if any(domain in url for domain in skip_domains):
+            continue
+        
+        # Check if this might be a firm website
+        if any(keyword in content for keyword in FIRM_KEYWORDS):
+            # Extract the base domain
+            domain_match = DOMAIN_PATTERN.search(url)
+            if domain_match:
+                firm_url = f"https://{domain_match.group(1)}"
+                
+                # Verify it's not a generic platform
+                if not any(skip in firm_url for skip in skip_domains):
+                    return firm_url
+    return None
+
+
 def smart_find_all_profiles(investor_name: str) -> Dict[str, str]:
     """
     Use intelligent search to find all profile URLs for an investor
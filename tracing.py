@@ -0,0 +1,146 @@
+"""
+Per-request timelines in Chrome trace-event format.
+
+While a trace is active (see trace()), every metrics span and external call
+made by the request is also recorded here with its start/end offsets and
+details such as bytes transferred and cache status. export() returns JSON
+that can be loaded into chrome://tracing or https://ui.perfetto.dev.
+"""
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Dict, Callable
+
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def new_trace(name: str) -> Dict:
+    """
+    Create an empty trace; events are offsets from its start time
+    """
+    return {
+        'name': name,
+        'start': time.perf_counter(),
+        'end': None,
+        'events': [],
+        'threads': {},
+        'lock': threading.Lock()
+    }
+
+
+@contextmanager
+def trace(name: str):
+    """
+    Record a timeline for everything run inside the block:
+
+        with tracing.trace("research Marc Andreessen") as timeline:
+            research_investor(...)
+        tracing.export(timeline)
+    """
+    active = new_trace(name)
+    token = current_trace.set(active)
+    try:
+        yield active
+    finally:
+        active['end'] = time.perf_counter()
+        current_trace.reset(token)
+
+
+def is_active() -> bool:
+    """
+    Check whether the current request is being traced
+    """
+    return current_trace.get() is not None
+
+
+def thread_id(active: Dict) -> int:
+    """
+    Map the current thread to a small, stable id for the trace viewer
+    """
+    ident = threading.get_ident()
+    threads = active['threads']
+    if ident not in threads:
+        threads[ident] = {'tid': len(threads) + 1, 'name': threading.current_thread().name}
+    return threads[ident]['tid']
+
+
+def record_span(name: str, category: str, start: float, end: float, args: Optional[Dict] = None) -> None:
+    """
+    Add a completed span (perf_counter start/end) to the active trace
+    """
+    active = current_trace.get()
+    if active is None:
+        return
+    with active['lock']:
+        active['events'].append({
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round((start - active['start']) * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': 1,
+            'tid': thread_id(active),
+            'args': {k: v for k, v in (args or {}).items() if v is not None}
+        })
+
+
+def record_instant(name: str, category: str, args: Optional[Dict] = None) -> None:
+    """
+    Add a point-in-time event (for example a cache hit) to the active trace
+    """
+    active = current_trace.get()
+    if active is None:
+        return
+    with active['lock']:
+        active['events'].append({
+            'name': name,
+            'cat': category,
+            'ph': 'i',
+            's': 't',
+            'ts': round((time.perf_counter() - active['start']) * 1e6),
+            'pid': 1,
+            'tid': thread_id(active),
+            'args': args or {}
+        })
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Carry the current trace into another thread. Call once per submit:
+
+        executor.submit(tracing.bind(fetch), name)
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+def export(active: Dict) -> Dict:
+    """
+    Render a trace as Chrome trace-event JSON
+    """
+    with active['lock']:
+        events = sorted(active['events'], key=lambda event: event['ts'])
+        threads = list(active['threads'].values())
+
+    end = active['end'] if active['end'] is not None else time.perf_counter()
+    metadata = [{'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': active['name']}}]
+    metadata += [
+        {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': thread['tid'], 'args': {'name': thread['name']}}
+        for thread in threads
+    ]
+
+    return {
+        'traceEvents': metadata + events,
+        'displayTimeUnit': 'ms',
+        'otherData': {
+            'name': active['name'],
+            'duration_ms': round((end - active['start']) * 1000, 1),
+            'span_count': sum(1 for event in events if event['ph'] == 'X')
+        }
+    }
@@ -0,0 +1,98 @@
+"""
+Warm up a process before it serves traffic.
+
+Builds the heavy read-only objects the pipeline otherwise creates on first
+use: the LangChain/Groq/Gemini/Tavily SDK modules, the vendored ReAct
+prompt, the insights parser and its format instructions, the mock datasets
+and the modules holding the company registry and compiled regexes.
+
+Under gunicorn with preload_app (see gunicorn.conf.py) this runs once in the
+master before it forks its workers, and gc.freeze() then moves everything
+into the permanent generation. The workers share those pages copy-on-write,
+so they start without import stalls and each holds only its own per-request
+state. API clients (LLM, Tavily, HTTP sessions) and sqlite connections are
+deliberately not built here: their sockets and locks don't survive a fork,
+so every worker still creates its own on first use.
+
+    python warmup.py        # print how long each step takes
+"""
+import gc
+import sys
+import time
+import importlib
+from typing import Dict, List, Optional
+
+# Modules imported lazily by the pipeline that build registries or compile regexes at import
+WARM_MODULES = (
+    "investor_research",
+    "third_parties.news",
+    "third_parties.medium_articles",
+    "third_parties.company_links",
+    "third_parties.image_search",
+    "tools.smart_profile_finder",
+    "tools.profile_url_finder",
+)
+
+
+def warm_modules() -> None:
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+
+
+def warm_sdks() -> None:
+    import investor_research
+    investor_research.preload_sdks()
+
+
+def warm_prompts() -> None:
+    from agents.react_prompt import get_react_prompt
+    from output_parsers import get_insights_parser, get_insights_format_instructions
+    get_react_prompt()
+    get_insights_parser()
+    get_insights_format_instructions()
+
+
+def warm_mock_data() -> None:
+    import mock_data
+    mock_data.load()
+
+
+WARMUP_STEPS = (
+    ("modules", warm_modules),
+    ("sdks", warm_sdks),
+    ("prompts", warm_prompts),
+    ("mock_data", warm_mock_data),
+)
+
+
+def warm_up(freeze: bool = False) -> Dict[str, float]:
+    """
+    Run every warm-up step and return how long each took (seconds).
+    A failing step is reported and skipped; it will simply happen on first use instead.
+    With freeze, collect garbage and gc.freeze() what's left so forked workers
+    don't touch (and copy) the shared pages during their own collections.
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️ Warm-up step {name} failed: {e}")
+        timings[name] = time.perf_counter() - started
+    print("🔥 Warmed up: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+        print(f"🧊 Froze {gc.get_freeze_count()} objects for the forked workers")
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    warm_up()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())